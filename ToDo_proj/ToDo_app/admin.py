@@ -1,5 +1,8 @@
 from django.contrib import admin
-from .models import Task
+from .models import ArchivedTask, Job, Task, TaskStats
 
 # Register your models here.
-admin.site.register(Task)
\ No newline at end of file
+admin.site.register(Task)
+admin.site.register(TaskStats)
+admin.site.register(ArchivedTask)
+admin.site.register(Job)
@@ -1,6 +1,21 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_save
 
 
 class TodoAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'ToDo_app'
+
+    def ready(self):
+        from .db import apply_sqlite_pragmas
+        from .metrics import install_query_tracker
+        from .stats import create_user_stats
+
+        # WAL e demais pragmas do perfil de banco (DB_PROFILE em settings.py)
+        connection_created.connect(apply_sqlite_pragmas, dispatch_uid='todo_sqlite_pragmas')
+        # Contagem de consultas por requisição para o MetricsMiddleware
+        connection_created.connect(install_query_tracker, dispatch_uid='todo_metrics_query_tracker')
+        # Contadores de tarefas criados junto com o usuário (leituras sem reconstrução)
+        post_save.connect(create_user_stats, sender=settings.AUTH_USER_MODEL, dispatch_uid='todo_create_user_stats')
@@ -0,0 +1,234 @@
+"""
+Versões assíncronas das APIs de tarefas, para o deploy ASGI.
+
+As leituras usam o ORM async do Django (afirst, aaggregate, async for) e não
+ocupam uma thread do adaptador sync_to_async durante toda a requisição. As
+escritas passam pelas funções de services.py dentro de sync_to_async, pois
+transações ainda não são suportadas em código async e os contadores e o
+índice de busca precisam ser atualizados na mesma transação da tarefa.
+"""
+
+import logging
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.views import View
+
+from . import services, stats
+from .events import get_event_broker
+from .forms import TaskForm, parse_expected_version, parse_include_archived, partial_task_form
+from .mixins import AsyncLoginRequiredMixin, ConditionalResponseMixin, JsonResponseMixin
+from .models import Task
+from .pagination import CursorPaginator, InvalidCursor
+from .serializers import FastJsonResponse, InvalidFields, select_fields, serialize_rows, serialize_task
+
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncTaskMixin(AsyncLoginRequiredMixin, JsonResponseMixin):
+    json_response_class = FastJsonResponse
+
+    async def get_task(self):
+        try:
+            return await Task.objects.aget(id=self.kwargs['pk'], user=self.request.user)
+        except Task.DoesNotExist:
+            raise Http404('Tarefa não encontrada')
+
+
+class AsyncCreateTaskView(AsyncTaskMixin, View):
+
+    async def post(self, request, *args, **kwargs):
+        try:
+            data = self.validate_json_request(request)
+            if isinstance(data, HttpResponse):
+                return data
+            form = TaskForm(data)
+            if not form.is_valid():
+                return self.json_error(form.errors.as_json())
+            task = await sync_to_async(services.create_task)(request.user, form)
+            return self.json_success('Tarefa criada com sucesso!', {'task': serialize_task(task)})
+        except Exception:
+            logger.exception('Erro ao criar tarefa do usuário %s', request.user.pk)
+            return self.json_error('Erro interno do servidor', 500)
+
+
+class AsyncUpdateTaskView(AsyncTaskMixin, View):
+
+    async def post(self, request, *args, **kwargs):
+        try:
+            data = self.validate_json_request(request)
+            if isinstance(data, HttpResponse):
+                return data
+            form = partial_task_form(data)
+            if not form.fields:
+                return self.json_error('Nenhum campo para atualizar')
+            if not form.is_valid():
+                return self.json_error(form.errors.as_json())
+            expected_version = parse_expected_version(data)
+            row = await sync_to_async(services.update_task)(
+                request.user, self.kwargs['pk'], form.cleaned_data, expected_version
+            )
+            return self.json_success('Tarefa atualizada com sucesso!', {'task': serialize_rows([row])[0]})
+        except ValueError as e:
+            return self.json_error(str(e), 400)
+        except services.TaskNotFound:
+            return self.json_error('Tarefa não encontrada', 404)
+        except services.VersionConflict as e:
+            return self.json_error(str(e), 409, {'current_version': e.current_version})
+        except Exception:
+            logger.exception('Erro ao atualizar tarefa do usuário %s', request.user.pk)
+            return self.json_error('Erro interno do servidor', 500)
+
+
+class AsyncTaskCompleteView(AsyncTaskMixin, View):
+
+    async def post(self, request, *args, **kwargs):
+        try:
+            data = self.validate_json_request(request) if request.content_type == 'application/json' else {}
+            if isinstance(data, HttpResponse):
+                return data
+            expected_version = parse_expected_version(data)
+            row = await sync_to_async(services.complete_task)(request.user, self.kwargs['pk'], expected_version)
+            return self.json_success(
+                f'Tarefa "{row["title"]}" marcada como concluída!',
+                {'task': serialize_rows([row])[0]}
+            )
+        except ValueError as e:
+            return self.json_error(str(e), 400)
+        except services.TaskNotFound:
+            return self.json_error('Tarefa não encontrada', 404)
+        except services.VersionConflict as e:
+            return self.json_error(str(e), 409, {'current_version': e.current_version})
+        except Exception:
+            logger.exception('Erro ao concluir tarefa do usuário %s', request.user.pk)
+            return self.json_error('Erro interno do servidor', 500)
+
+
+class AsyncTaskDeleteView(AsyncTaskMixin, View):
+
+    async def delete(self, request, *args, **kwargs):
+        task = await self.get_task()
+        try:
+            task_title = task.title
+            await sync_to_async(services.delete_task)(task)
+            return self.json_success(f'Tarefa "{task_title}" removida com sucesso!')
+        except Exception:
+            logger.exception('Erro ao excluir tarefa do usuário %s', request.user.pk)
+            return self.json_error('Erro interno do servidor', 500)
+
+
+class AsyncTaskDetailView(AsyncTaskMixin, ConditionalResponseMixin, View):
+
+    async def get(self, request, *args, **kwargs):
+        try:
+            fields = select_fields(request.GET.get('fields'))
+        except InvalidFields as e:
+            return self.json_error(str(e), 400)
+
+        columns = dict.fromkeys((*fields, 'id', 'updated_at'))
+        row = await Task.objects.filter(id=self.kwargs['pk'], user=request.user).values(*columns).afirst()
+        if row is None:
+            raise Http404('Tarefa não encontrada')
+
+        updated_at = row['updated_at']
+        etag = f'task-{row["id"]}-{updated_at.timestamp()}'
+        not_modified = self.not_modified(request, etag)
+        if not_modified is not None:
+            return not_modified
+        response = self.json_success('', {'task': serialize_rows([row], fields)[0]})
+        return self.with_validators(response, etag)
+
+
+class AsyncTaskStatsView(AsyncTaskMixin, ConditionalResponseMixin, View):
+
+    async def get(self, request, *args, **kwargs):
+        include_archived = parse_include_archived(request.GET)
+        snapshot = await stats.aget_user_snapshot(request.user.pk)
+        changed_at = snapshot['changed_at']
+        etag = f'stats-{request.user.pk}-{snapshot["version"]}-{changed_at.timestamp()}-{int(include_archived)}'
+        not_modified = self.not_modified(request, etag)
+        if not_modified is not None:
+            return not_modified
+        response = self.json_success('', {'stats': stats.public_counts(snapshot, include_archived)})
+        return self.with_validators(response, etag)
+
+
+class AsyncTaskListView(AsyncTaskMixin, View):
+
+    default_page_size = 20
+    max_page_size = 100
+
+    async def get(self, request, *args, **kwargs):
+        try:
+            fields = select_fields(request.GET.get('fields'))
+            page_size = int(request.GET.get('page_size', self.default_page_size))
+        except InvalidFields as e:
+            return self.json_error(str(e), 400)
+        except ValueError:
+            return self.json_error('Tamanho de página inválido', 400)
+        page_size = max(1, min(page_size, self.max_page_size))
+
+        queryset = Task.objects.filter(user=request.user)
+        status_filter = request.GET.get('status', '')
+        if status_filter:
+            queryset = queryset.filter(status=status_filter)
+        queryset = queryset.values(*dict.fromkeys((*fields, 'id', 'created_at')))
+
+        try:
+            page = await CursorPaginator(queryset, page_size).apage(request.GET.get('cursor'))
+        except InvalidCursor as e:
+            return self.json_error(str(e), 400)
+
+        return self.json_success('', {
+            'tasks': serialize_rows(page, fields),
+            'next_cursor': page.next_cursor,
+            'previous_cursor': page.previous_cursor,
+        })
+
+
+class TaskEventsView(AsyncTaskMixin, View):
+    """
+    Feed SSE com as alterações das tarefas do usuário:
+    task.created, task.updated, task.completed, task.deleted e stats (variação
+    dos contadores). Um evento "reset" indica que o cliente perdeu eventos e
+    deve recarregar os dados completos.
+
+    Cada conexão fica aberta indefinidamente, então o endpoint só é servido
+    pelo handler ASGI.
+    """
+
+    heartbeat = 15
+    retry_ms = 3000
+
+    async def get(self, request, *args, **kwargs):
+        if not isinstance(request, ASGIRequest):
+            return self.json_error('Feed de eventos disponível apenas no deploy ASGI', 501)
+
+        try:
+            last_event_id = int(request.headers.get('Last-Event-ID') or request.GET.get('last_event_id', ''))
+        except ValueError:
+            last_event_id = None
+
+        response = StreamingHttpResponse(
+            self.stream(request.user.pk, last_event_id), content_type='text/event-stream'
+        )
+        response.headers['Cache-Control'] = 'no-cache'
+        response.headers['X-Accel-Buffering'] = 'no'
+        return response
+
+    async def stream(self, user_id, last_event_id):
+        # A assinatura nasce junto com o stream para ser sempre encerrada por ele
+        subscription = get_event_broker().subscribe(user_id, last_event_id)
+        try:
+            yield b'retry: %d\n\n' % self.retry_ms
+            while True:
+                event = await subscription.get(timeout=self.heartbeat)
+                if event is None:
+                    # Comentário SSE: mantém proxies com a conexão aberta
+                    yield b': ping\n\n'
+                    continue
+                yield event.encode()
+        finally:
+            subscription.close()
@@ -0,0 +1,87 @@
+"""
+Cache dos dados do dashboard com chaves versionadas por usuário.
+
+Cada usuário tem um token de versão guardado no cache compartilhado entre os
+workers (TASK_CACHE_VERSIONS, padrão "shared"). Os dados ficam no LRU em
+memória do processo (TASK_CACHE_DATA, padrão "default") sob chaves que
+incluem esse token:
+
+    tasks:<user_id>:<token>:<nome>
+
+Toda escrita troca o token (services.record_changes), então tudo o que
+estava em cache para o usuário deixa de ser alcançável de uma vez, sem
+precisar apagar chave por chave; as entradas antigas saem pelo LRU ou pelo
+timeout. O token é aleatório, e não um contador, para que a perda da chave
+de versão (cull ou reinício do cache compartilhado) nunca reaproveite uma
+versão antiga.
+"""
+
+import uuid
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+
+def _versions():
+    return caches[getattr(settings, 'TASK_CACHE_VERSIONS', 'shared')]
+
+
+def _data():
+    return caches[getattr(settings, 'TASK_CACHE_DATA', 'default')]
+
+
+def _version_key(user_id):
+    return f'tasks:{user_id}:version'
+
+
+def get_user_token(user_id):
+    """Token de versão atual do usuário (criado na primeira leitura)"""
+    versions = _versions()
+    key = _version_key(user_id)
+    token = versions.get(key)
+    if token is None:
+        versions.add(key, uuid.uuid4().hex, None)
+        token = versions.get(key)
+    return token
+
+
+def bump_user_version(user_id):
+    """
+    Invalida todo o cache do usuário.
+
+    Troca o token na hora, para que a própria requisição já leia dados novos,
+    e de novo após o commit: um leitor concorrente que leu o banco antes do
+    commit pode ter gravado dados antigos sob o token intermediário.
+    """
+    versions = _versions()
+    key = _version_key(user_id)
+    versions.set(key, uuid.uuid4().hex, None)
+    transaction.on_commit(lambda: versions.set(key, uuid.uuid4().hex, None))
+
+
+class UserCache:
+    """Acesso ao cache de um usuário; lê o token de versão uma vez por instância"""
+
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self._token = None
+
+    def key(self, name):
+        if self._token is None:
+            self._token = get_user_token(self.user_id)
+        return f'tasks:{self.user_id}:{self._token}:{quote(name, safe=":,=")}'
+
+    def get_or_set(self, name, default, timeout=None):
+        """Valor em cache ou o resultado de default(), que é então guardado"""
+        cache = _data()
+        key = self.key(name)
+        value = cache.get(key)
+        if value is None:
+            value = default()
+            if timeout is None:
+                cache.set(key, value)
+            else:
+                cache.set(key, value, timeout)
+        return value
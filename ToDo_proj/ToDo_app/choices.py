@@ -6,6 +6,13 @@ class Status(models.TextChoices):
     COMPLETED = 'COMPLETADO', 'Concluído'
 
 
+class JobStatus(models.TextChoices):
+    PENDING = 'PENDENTE', 'Pendente'
+    RUNNING = 'EXECUTANDO', 'Executando'
+    DONE = 'CONCLUIDO', 'Concluído'
+    FAILED = 'FALHOU', 'Falhou'
+
+
 class Months(models.TextChoices):
     JANUARY = '01', 'Janeiro'
     FEBRUARY = '02', 'Fevereiro'
@@ -0,0 +1,22 @@
+"""
+Ajustes aplicados a cada conexão nova com o banco (perfis em DB_PROFILE,
+settings.py).
+
+No SQLite os pragmas valem por conexão (exceto journal_mode=WAL, que fica
+gravado no arquivo), então são reaplicados pelo receiver de
+connection_created registrado em apps.py.
+"""
+
+from django.conf import settings
+
+
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """Executa os SQLITE_PRAGMAS configurados para o alias da conexão"""
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', {}).get(connection.alias)
+    if not pragmas:
+        return
+    # Direto na conexão do driver: fora dos execute_wrappers (métricas)
+    for name, value in pragmas.items():
+        connection.connection.execute(f'PRAGMA {name} = {value}')
@@ -0,0 +1,205 @@
+"""
+Feed de alterações das tarefas por usuário (Server-Sent Events).
+
+As escritas de services.py publicam eventos depois do commit e o endpoint
+SSE (async_views.TaskEventsView) os repassa ao navegador. O broker é
+plugável pela setting TASK_EVENTS_BROKER, no mesmo estilo do backend de
+busca: o padrão LocalEventBroker distribui os eventos dentro do processo e
+serve como substituto local de um broker compartilhado (ex.: Redis pub/sub)
+quando a aplicação roda com vários workers.
+"""
+
+import asyncio
+import threading
+from collections import OrderedDict, defaultdict, deque
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from .serializers import dumps
+
+
+class Event:
+    """Evento do feed; id é crescente dentro do broker"""
+
+    __slots__ = ('id', 'type', 'data')
+
+    def __init__(self, id, type, data):
+        self.id = id
+        self.type = type
+        self.data = data
+
+    def encode(self):
+        """Formato de mensagem do text/event-stream"""
+        return b'id: %d\nevent: %s\ndata: %s\n\n' % (self.id, self.type.encode(), dumps(self.data))
+
+
+class BaseEventBroker:
+    """Interface dos brokers de eventos"""
+
+    def publish(self, user_id, events):
+        """Publica uma lista de (tipo, dados) para os assinantes do usuário"""
+        raise NotImplementedError
+
+    def subscribe(self, user_id, last_event_id=None):
+        """
+        Retorna uma Subscription. Com last_event_id, os eventos perdidos desde
+        então são reenviados (ou um evento "reset" se não estiverem mais
+        disponíveis).
+        """
+        raise NotImplementedError
+
+
+class Subscription:
+    """Fila de eventos de um cliente conectado, presa ao event loop dele"""
+
+    max_pending = 1000
+
+    def __init__(self, broker, user_id, backlog=()):
+        self.broker = broker
+        self.user_id = user_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue()
+        for event in backlog:
+            self.queue.put_nowait(event)
+
+    def deliver(self, events):
+        """Chamado pelo broker em qualquer thread"""
+        try:
+            self.loop.call_soon_threadsafe(self._put, events)
+        except RuntimeError:
+            # Event loop do cliente já foi encerrado
+            pass
+
+    def _put(self, events):
+        if self.queue.qsize() + len(events) > self.max_pending:
+            # Cliente lento demais: descarta o acumulado e pede recarga
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(Event(events[-1].id, 'reset', {}))
+            return
+        for event in events:
+            self.queue.put_nowait(event)
+
+    async def get(self, timeout=None):
+        """
+        Próximo evento, ou None se nada chegar em timeout segundos.
+
+        O timeout é um timer que enfileira None, e não asyncio.wait_for: no
+        Python 3.11 o wait_for pode engolir o cancelamento da desconexão do
+        cliente quando um evento chega no mesmo instante.
+        """
+        timer = self.loop.call_later(timeout, self.queue.put_nowait, None) if timeout else None
+        try:
+            return await self.queue.get()
+        finally:
+            if timer is not None:
+                timer.cancel()
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class LocalEventBroker(BaseEventBroker):
+    """
+    Broker em memória. Guarda os últimos eventos de cada usuário para que um
+    EventSource reconectado (cabeçalho Last-Event-ID) não perca alterações.
+
+    Os ids vêm de um contador único do broker, e o histórico fica em um LRU de
+    no máximo max_users usuários: os menos recentes sem assinantes são
+    descartados e, se reconectarem, recebem um "reset".
+    """
+
+    history_size = 100
+    max_users = 10000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+        # user_id -> (floor, histórico); floor é o maior id que pode ter sido
+        # perdido para esse usuário (anterior ao histórico guardado)
+        self._history = OrderedDict()
+        self._sequence = 0
+
+    def publish(self, user_id, events):
+        with self._lock:
+            stamped = []
+            for kind, data in events:
+                self._sequence += 1
+                stamped.append(Event(self._sequence, kind, data))
+            if stamped:
+                self._remember(user_id, stamped)
+            subscribers = list(self._subscribers.get(user_id, ()))
+        if stamped:
+            for subscription in subscribers:
+                subscription.deliver(stamped)
+        return stamped
+
+    def subscribe(self, user_id, last_event_id=None):
+        with self._lock:
+            backlog = self._backlog(user_id, last_event_id)
+            subscription = Subscription(self, user_id, backlog)
+            self._subscribers[user_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.user_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.user_id]
+            self._evict()
+
+    def subscriber_count(self, user_id=None):
+        with self._lock:
+            if user_id is not None:
+                return len(self._subscribers.get(user_id, ()))
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    def _remember(self, user_id, stamped):
+        entry = self._history.get(user_id)
+        if entry is None:
+            # Eventos anteriores deste usuário, se houve, já foram descartados
+            entry = [stamped[0].id - 1, deque(maxlen=self.history_size)]
+            self._history[user_id] = entry
+        else:
+            self._history.move_to_end(user_id)
+        history = entry[1]
+        if len(history) + len(stamped) > self.history_size:
+            combined = [*history, *stamped]
+            entry[0] = combined[-self.history_size - 1].id
+        history.extend(stamped)
+        self._evict()
+
+    def _evict(self):
+        """Descarta os usuários menos recentes sem assinantes acima de max_users"""
+        excess = len(self._history) - self.max_users
+        if excess <= 0:
+            return
+        for user_id in list(self._history):
+            if user_id not in self._subscribers:
+                del self._history[user_id]
+                excess -= 1
+                if not excess:
+                    break
+
+    def _backlog(self, user_id, last_event_id):
+        if last_event_id is None:
+            return []
+        entry = self._history.get(user_id)
+        if last_event_id > self._sequence or entry is None or last_event_id < entry[0]:
+            # Processo reiniciado ou eventos já descartados: o cliente recarrega
+            return [Event(self._sequence, 'reset', {})]
+        return [event for event in entry[1] if event.id > last_event_id]
+
+
+_brokers = {}
+
+
+def get_event_broker():
+    """Broker configurado em TASK_EVENTS_BROKER (padrão: LocalEventBroker)"""
+    path = getattr(settings, 'TASK_EVENTS_BROKER', None) or 'ToDo_app.events.LocalEventBroker'
+    if path not in _brokers:
+        _brokers[path] = import_string(path)()
+    return _brokers[path]
@@ -7,7 +7,23 @@ class TaskForm(forms.ModelForm):
         fields = ['title', 'description', 'status']
 
 
+def partial_task_form(data):
+    """TaskForm restrito aos campos enviados, para atualizações parciais"""
+    fields = [field for field in TaskForm.Meta.fields if field in data]
+    form_class = forms.modelform_factory(Task, form=TaskForm, fields=fields)
+    return form_class(data)
 
 
+def parse_expected_version(data):
+    """Versão da tarefa conhecida pelo cliente (None quando não enviada)"""
+    version = data.get('version') if isinstance(data, dict) else None
+    if version is None:
+        return None
+    if isinstance(version, bool) or not isinstance(version, int) or version < 1:
+        raise ValueError('Versão inválida')
+    return version
 
 
+def parse_include_archived(params):
+    """Parâmetro ?include_archived=1 dos endpoints que podem somar as tarefas arquivadas"""
+    return params.get('include_archived', '').lower() in ('1', 'true', 'sim')
@@ -0,0 +1,152 @@
+"""
+Fila de trabalhos em segundo plano guardada no próprio banco (modelo Job).
+
+As views enfileiram com enqueue() e respondem na hora; o comando run_jobs,
+que pode rodar em vários processos ao mesmo tempo, reserva e executa os
+jobs. Cada job é uma função registrada com @job que recebe o payload como
+argumentos nomeados; como pode ser repetida após uma falha, deve ser
+idempotente.
+
+A reserva usa SELECT ... FOR UPDATE SKIP LOCKED quando o banco suporta. No
+SQLite, que não tem trava por linha, ela é um compare-and-set: um UPDATE
+condicionado a status = PENDENTE, que só um dos workers consegue aplicar.
+"""
+
+import logging
+import random
+import traceback
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import services
+from .choices import JobStatus
+from .models import Job
+
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+
+# Backoff exponencial entre tentativas: 10s, 20s, 40s... até 1h
+RETRY_BASE_SECONDS = 10
+RETRY_MAX_SECONDS = 3600
+
+
+def job(name):
+    """Registra a função como job com o nome informado"""
+    def register(func):
+        _registry[name] = func
+        return func
+    return register
+
+
+def enqueue(name, payload=None, run_at=None, max_attempts=5):
+    """Enfileira o job; dentro de uma transação, só fica visível após o commit"""
+    if name not in _registry:
+        raise ValueError(f'Job desconhecido: {name}')
+    return Job.objects.create(
+        name=name,
+        payload=payload or {},
+        run_at=run_at or timezone.now(),
+        max_attempts=max_attempts,
+    )
+
+
+def enqueue_many(name, payloads, run_at=None, max_attempts=5):
+    """Enfileira um job por payload com um único INSERT"""
+    if name not in _registry:
+        raise ValueError(f'Job desconhecido: {name}')
+    run_at = run_at or timezone.now()
+    return Job.objects.bulk_create([
+        Job(name=name, payload=payload, run_at=run_at, max_attempts=max_attempts)
+        for payload in payloads
+    ])
+
+
+def claim(worker_id, candidates=10):
+    """Reserva o próximo job pronto para o worker, ou None se a fila estiver vazia"""
+    now = timezone.now()
+    ready = Job.objects.filter(status=JobStatus.PENDING, run_at__lte=now).order_by('run_at', 'id')
+    reserve = {'status': JobStatus.RUNNING, 'locked_by': worker_id, 'locked_at': now, 'attempts': F('attempts') + 1}
+
+    if connections[Job.objects.db].features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            job_id = ready.select_for_update(skip_locked=True).values_list('id', flat=True).first()
+            if job_id is None:
+                return None
+            Job.objects.filter(pk=job_id).update(**reserve)
+        return Job.objects.get(pk=job_id)
+
+    # Vários candidatos por consulta: se outro worker levar o primeiro, tenta o seguinte
+    while True:
+        job_ids = list(ready.values_list('id', flat=True)[:candidates])
+        if not job_ids:
+            return None
+        for job_id in job_ids:
+            if Job.objects.filter(pk=job_id, status=JobStatus.PENDING).update(**reserve):
+                return Job.objects.get(pk=job_id)
+
+
+def retry_delay(attempts):
+    delay = min(RETRY_BASE_SECONDS * 2 ** (attempts - 1), RETRY_MAX_SECONDS)
+    # Jitter para que jobs que falharam juntos não voltem todos no mesmo instante
+    return timedelta(seconds=delay * random.uniform(1.0, 1.25))
+
+
+def run_job(job):
+    """Executa um job reservado por claim(); retorna True se concluiu"""
+    handler = _registry.get(job.name)
+    owned = Job.objects.filter(pk=job.pk, status=JobStatus.RUNNING, locked_by=job.locked_by)
+    try:
+        if handler is None:
+            raise LookupError(f'Job desconhecido: {job.name}')
+        handler(**job.payload)
+    except Exception:
+        error = traceback.format_exc()
+        now = timezone.now()
+        if handler is None or job.attempts >= job.max_attempts:
+            logger.error('Job %s #%s falhou definitivamente', job.name, job.pk)
+            owned.update(status=JobStatus.FAILED, last_error=error, finished_at=now, locked_by='', locked_at=None)
+        else:
+            logger.warning('Job %s #%s falhou (tentativa %s), nova tentativa agendada', job.name, job.pk, job.attempts)
+            owned.update(
+                status=JobStatus.PENDING, last_error=error, run_at=now + retry_delay(job.attempts),
+                locked_by='', locked_at=None,
+            )
+        return False
+    owned.update(status=JobStatus.DONE, finished_at=timezone.now(), locked_by='', locked_at=None)
+    return True
+
+
+def requeue_stale(timeout):
+    """
+    Devolve à fila os jobs reservados há mais de timeout (worker que morreu
+    no meio da execução). A tentativa já foi contada na reserva.
+    """
+    stale = Job.objects.filter(status=JobStatus.RUNNING, locked_at__lt=timezone.now() - timeout)
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status=JobStatus.FAILED, last_error='Worker interrompido durante a execução',
+        finished_at=timezone.now(), locked_by='', locked_at=None,
+    )
+    requeued = stale.update(status=JobStatus.PENDING, locked_by='', locked_at=None)
+    return requeued, failed
+
+
+@job('purge_account')
+def purge_account(user_id, chunk_size=500):
+    services.purge_account(user_id, chunk_size)
+
+
+@job('rebuild_task_stats')
+def rebuild_task_stats(user_ids=None):
+    call_command('rebuild_task_stats', users=user_ids, stdout=StringIO())
+
+
+@job('archive_tasks')
+def archive_tasks(older_than_days=180, batch_size=1000):
+    services.archive_completed(timezone.now() - timedelta(days=older_than_days), batch_size)
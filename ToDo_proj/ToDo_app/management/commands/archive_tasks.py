@@ -0,0 +1,35 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from ToDo_app import services
+
+
+class Command(BaseCommand):
+    help = (
+        'Move para a tabela de arquivo (ArchivedTask) as tarefas concluídas sem alteração há mais de N dias, '
+        'em lotes. Cada lote é uma transação própria; se interrompido, basta rodar de novo.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than', type=int, metavar='DIAS',
+                            default=getattr(settings, 'TASK_ARCHIVE_AFTER_DAYS', 180),
+                            help='Idade mínima, pela última alteração (padrão: TASK_ARCHIVE_AFTER_DAYS ou 180)')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Tarefas movidas por transação')
+        parser.add_argument('--pause', type=float, default=0.0, metavar='SEGUNDOS',
+                            help='Pausa entre lotes, para liberar o banco às requisições')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['older_than'])
+        pause = options['pause']
+
+        def report(done, total):
+            self.stdout.write(f'{done}/{total} tarefas arquivadas')
+            if pause:
+                time.sleep(pause)
+
+        archived = services.archive_completed(cutoff, max(1, options['batch_size']), report)
+        self.stdout.write(self.style.SUCCESS(f'Arquivamento concluído: {archived} tarefas concluídas antes de {cutoff:%d/%m/%Y}'))
@@ -0,0 +1,128 @@
+import asyncio
+import statistics
+import time
+import uuid
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand
+from django.test import Client
+
+from ToDo_app.models import Task
+from ToDo_app.stats import rebuild_user_stats
+
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Compara a vazão das APIs de tarefas sync e async servidas pelo handler ASGI'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help='Requisições por endpoint')
+        parser.add_argument('--concurrency', type=int, default=50, help='Requisições simultâneas')
+        parser.add_argument('--tasks', type=int, default=200, help='Tarefas do usuário de benchmark')
+
+    def handle(self, *args, **options):
+        # Usuário temporário, removido ao final
+        email = f'bench-asgi-{uuid.uuid4().hex[:8]}@example.com'
+        user = User.objects.create_user(username=email, email=email, password=uuid.uuid4().hex)
+        try:
+            tasks = Task.objects.bulk_create(
+                [Task(user=user, title=f'Tarefa {i}', description='benchmark') for i in range(options['tasks'])]
+            )
+            # Contadores prontos antes da carga: o benchmark mede apenas leituras
+            rebuild_user_stats(user.pk)
+            client = Client()
+            client.force_login(user)
+            cookie = f'{settings.SESSION_COOKIE_NAME}={client.cookies[settings.SESSION_COOKIE_NAME].value}'
+
+            task_id = tasks[0].id
+            endpoints = [
+                ('detalhe', f'/get/{task_id}/', f'/async/get/{task_id}/'),
+                ('stats', '/stats/', '/async/stats/'),
+                ('lista', '/list/', '/async/list/'),
+            ]
+            application = get_asgi_application()
+
+            self.stdout.write(
+                f'{options["requests"]} requisições por endpoint, concorrência {options["concurrency"]}\n'
+            )
+            self.stdout.write(f'{"endpoint":<10} {"modo":<6} {"req/s":>9} {"p50 ms":>8} {"p95 ms":>8} {"erros":>6}')
+            for name, sync_path, async_path in endpoints:
+                for mode, path in (('sync', sync_path), ('async', async_path)):
+                    result = asyncio.run(self.run_load(
+                        application, path, cookie, options['requests'], options['concurrency']
+                    ))
+                    self.stdout.write(
+                        f'{name:<10} {mode:<6} {result["rps"]:>9.1f} {result["p50"]:>8.2f} '
+                        f'{result["p95"]:>8.2f} {result["errors"]:>6}'
+                    )
+        finally:
+            user.delete()
+
+    async def run_load(self, application, path, cookie, total, concurrency):
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies = []
+        errors = 0
+
+        async def one():
+            nonlocal errors
+            async with semaphore:
+                start = time.perf_counter()
+                status = await self.asgi_get(application, path, cookie)
+                latencies.append((time.perf_counter() - start) * 1000)
+                if status != 200:
+                    errors += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(total)))
+        elapsed = time.perf_counter() - start
+
+        latencies.sort()
+        return {
+            'rps': total / elapsed,
+            'p50': statistics.median(latencies),
+            'p95': latencies[int(len(latencies) * 0.95) - 1],
+            'errors': errors,
+        }
+
+    @staticmethod
+    async def asgi_get(application, path, cookie):
+        """Executa um GET direto no callable ASGI, como um servidor (uvicorn/daphne) faria"""
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': path,
+            'raw_path': path.encode(),
+            'query_string': b'',
+            'root_path': '',
+            'headers': [(b'host', b'localhost'), (b'cookie', cookie.encode())],
+            'client': ('127.0.0.1', 50000),
+            'server': ('localhost', 80),
+        }
+        body_sent = False
+        finished = asyncio.Event()
+        status = None
+
+        async def receive():
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {'type': 'http.request', 'body': b'', 'more_body': False}
+            await finished.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            elif message['type'] == 'http.response.body' and not message.get('more_body'):
+                finished.set()
+
+        await application(scope, receive, send)
+        return status
@@ -0,0 +1,181 @@
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+def run_worker(profile, db_name, user_id, duration, write_ratio, seed, ready, start, results):
+    """
+    Processo de carga (multiprocessing spawn): configura o Django com o
+    perfil pedido e executa leituras e escritas até o fim do tempo.
+    """
+    os.environ['DJANGO_DB_PROFILE'] = profile
+    os.environ['DJANGO_DB_NAME'] = db_name
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ToDo_proj.settings')
+    import django
+    django.setup()
+
+    from django.contrib.auth import get_user_model
+    from django.db import OperationalError, connection
+
+    from ToDo_app import services, stats
+    from ToDo_app.forms import TaskForm
+    from ToDo_app.models import Task
+
+    rng = random.Random(seed)
+    user = get_user_model().objects.get(pk=user_id)
+    task_ids = list(Task.objects.filter(user=user).values_list('id', flat=True)[:200])
+    counters = {'reads': 0, 'writes': 0, 'locked': 0, 'errors': 0}
+    latencies = []
+
+    def write():
+        kind = rng.random()
+        if task_ids and kind < 0.5:
+            services.update_task(user, rng.choice(task_ids), {'title': f'Concorrência {rng.random():.6f}'})
+        elif kind < 0.75:
+            # Transação que lê e depois escreve (update_or_create), como no job de contadores:
+            # no modo DEFERRED é a que recebe "database is locked" sem esperar o timeout
+            stats.rebuild_user_stats(user.pk)
+        else:
+            form = TaskForm({'title': f'Concorrência {rng.random():.6f}', 'description': '', 'status': 'PENDENTE'})
+            form.is_valid()
+            task_ids.append(services.create_task(user, form).id)
+
+    def read():
+        stats.get_user_snapshot(user.pk)
+        list(Task.objects.filter(user=user).order_by('-created_at', '-id').values('id', 'title', 'status')[:20])
+
+    ready.put(True)
+    start.wait()
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        is_write = rng.random() < write_ratio
+        began = time.perf_counter()
+        try:
+            write() if is_write else read()
+        except OperationalError as e:
+            counters['locked' if 'locked' in str(e) else 'errors'] += 1
+            continue
+        except Exception:
+            counters['errors'] += 1
+            continue
+        latencies.append((time.perf_counter() - began) * 1000)
+        counters['writes' if is_write else 'reads'] += 1
+
+    connection.close()
+    results.put({**counters, 'latencies': latencies})
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara perfis de banco SQLite sob escritores concorrentes (processos separados): '
+        'vazão, latência e erros "database is locked". Roda sobre cópias do banco atual.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profiles', nargs='+', default=['sqlite-basic', 'sqlite'],
+                            help='Perfis de DJANGO_DB_PROFILE a comparar')
+        parser.add_argument('--workers', type=int, default=8, help='Processos concorrentes')
+        parser.add_argument('--duration', type=float, default=5.0, help='Segundos de carga por perfil')
+        parser.add_argument('--write-ratio', type=float, default=0.5, help='Fração das operações que escrevem')
+        parser.add_argument('--output', help='Arquivo JSON de saída (padrão: stdout)')
+
+    def handle(self, *args, **options):
+        source = settings.DATABASES['default']
+        if source['ENGINE'] != 'django.db.backends.sqlite3':
+            raise CommandError('O benchmark compara perfis SQLite; o banco atual não é SQLite')
+        user_ids = self.pick_users(source['NAME'], options['workers'])
+
+        results = []
+        for profile in options['profiles']:
+            if not profile.startswith('sqlite'):
+                raise CommandError(f'Perfil não suportado pelo benchmark: {profile}')
+            result = self.run_profile(profile, source['NAME'], user_ids, options)
+            results.append(result)
+            self.stderr.write(
+                f'{profile:<14} {result["throughput_ops"]:>8.1f} ops/s  '
+                f'p95 {(result["latency_ms"] or {}).get("p95", 0):>8.2f} ms  '
+                f'travado {result["locked_errors"]:>5}  outros erros {result["other_errors"]:>3}'
+            )
+
+        report = {
+            'meta': {
+                'workers': options['workers'],
+                'duration_s': options['duration'],
+                'write_ratio': options['write_ratio'],
+                'sqlite': sqlite3.sqlite_version,
+            },
+            'profiles': results,
+        }
+        output = json.dumps(report, indent=2, ensure_ascii=False)
+        if options['output']:
+            Path(options['output']).write_text(output, encoding='utf-8')
+            self.stderr.write(self.style.SUCCESS(f'Relatório salvo em {options["output"]}'))
+        else:
+            self.stdout.write(output)
+
+    @staticmethod
+    def pick_users(db_name, count):
+        with sqlite3.connect(db_name) as db:
+            rows = db.execute(
+                'SELECT user_id FROM ToDo_app_task WHERE deleted_at IS NULL '
+                'GROUP BY user_id ORDER BY COUNT(*) DESC LIMIT ?', [count]
+            ).fetchall()
+        if not rows:
+            raise CommandError('Nenhum usuário com tarefas; rode "python manage.py seed_data" antes')
+        return [row[0] for row in rows]
+
+    def run_profile(self, profile, source, user_ids, options):
+        workdir = Path(tempfile.mkdtemp(prefix='todo-bench-db-'))
+        db_name = str(workdir / 'db.sqlite3')
+        try:
+            # Cópia consistente pela API de backup (o original pode estar em WAL)
+            with sqlite3.connect(source) as src, sqlite3.connect(db_name) as dst:
+                src.backup(dst)
+                if profile == 'sqlite-basic':
+                    # journal_mode fica gravado no arquivo; volta ao padrão do SQLite
+                    dst.execute('PRAGMA journal_mode = DELETE')
+
+            context = multiprocessing.get_context('spawn')
+            ready, start, results = context.Queue(), context.Event(), context.Queue()
+            processes = [
+                context.Process(target=run_worker, args=(
+                    profile, db_name, user_ids[index % len(user_ids)], options['duration'],
+                    options['write_ratio'], index, ready, start, results,
+                ))
+                for index in range(options['workers'])
+            ]
+            for process in processes:
+                process.start()
+            # Todos os processos prontos (Django carregado) antes de liberar a carga
+            for _ in processes:
+                ready.get()
+            start.set()
+            collected = [results.get() for _ in processes]
+            for process in processes:
+                process.join()
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+        from ToDo_app.management.commands.bench_endpoints import Command as EndpointsCommand
+
+        latencies = [value for result in collected for value in result['latencies']]
+        total = sum(result['reads'] + result['writes'] for result in collected)
+        return {
+            'profile': profile,
+            'operations': total,
+            'reads': sum(result['reads'] for result in collected),
+            'writes': sum(result['writes'] for result in collected),
+            'throughput_ops': round(total / options['duration'], 1),
+            'locked_errors': sum(result['locked'] for result in collected),
+            'other_errors': sum(result['errors'] for result in collected),
+            'latency_ms': EndpointsCommand.summarize(latencies) if latencies else None,
+        }
@@ -0,0 +1,295 @@
+import itertools
+import json
+import platform
+import statistics
+import time
+import tracemalloc
+import uuid
+from collections import Counter
+
+import django
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from ToDo_app import services
+from ToDo_app.forms import TaskForm
+from ToDo_app.models import Job, Task
+
+from .seed_data import SEED_PREFIX
+
+
+User = get_user_model()
+
+
+class Endpoint:
+    """Endpoint medido; prepare() devolve (path, corpo) de cada requisição, fora da medição"""
+
+    def __init__(self, name, method, path, prepare=None, admin=False):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.prepare = prepare or (lambda: (path, None))
+        self.admin = admin
+
+
+class Command(BaseCommand):
+    help = 'Mede latência, número de consultas e pico de memória dos endpoints pelo test client (saída em JSON)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=30, help='Requisições medidas por endpoint')
+        parser.add_argument('--warmup', type=int, default=3, help='Requisições de aquecimento por endpoint')
+        parser.add_argument('--user', type=int, help='ID do usuário do seed_data cujas tarefas são usadas (padrão: o que tem mais tarefas)')
+        parser.add_argument('--only', action='append', help='Mede só endpoints cujo nome contém o texto (pode repetir)')
+        parser.add_argument('--cold', action='store_true', help='Limpa os caches antes de cada requisição medida')
+        parser.add_argument('--output', help='Arquivo de saída (padrão: stdout)')
+
+    def handle(self, *args, **options):
+        user = self.get_user(options['user'])
+        suffix = uuid.uuid4().hex[:8]
+        # Usuários temporários: o admin que chama as APIs e o alvo das ações de administração
+        admin = User.objects.create_user(
+            username=f'bench-admin-{suffix}@example.com', email=f'bench-admin-{suffix}@example.com',
+            password=uuid.uuid4().hex, is_staff=True, user_type='A',
+        )
+        target = User.objects.create_user(
+            username=f'bench-target-{suffix}@example.com', email=f'bench-target-{suffix}@example.com',
+            password=uuid.uuid4().hex,
+        )
+        self.created_task_ids = []
+        self.created_user_ids = [admin.pk, target.pk]
+        self.suffix = suffix
+
+        try:
+            clients = {False: self.logged_client(user), True: self.logged_client(admin)}
+            endpoints = self.build_endpoints(user, target)
+            if options['only']:
+                endpoints = [e for e in endpoints if any(text in e.name for text in options['only'])]
+
+            results = []
+            for endpoint in endpoints:
+                result = self.measure(clients[endpoint.admin], endpoint, options)
+                results.append(result)
+                self.stderr.write(
+                    f'{endpoint.name:<22} p50 {result["latency_ms"]["p50"]:>8.2f} ms  '
+                    f'p95 {result["latency_ms"]["p95"]:>8.2f} ms  consultas {result["queries"]["max"]:>3}  '
+                    f'erros {result["errors"]}'
+                )
+
+            report = {
+                'meta': self.build_meta(user, options),
+                'endpoints': results,
+            }
+        finally:
+            for task in Task.objects.filter(id__in=self.created_task_ids, user=user):
+                services.delete_task(task)
+            # all_objects: admin_delete deixa as contas excluídas (e renomeadas) à espera do expurgo
+            Job.objects.filter(name='purge_account', payload__user_id__in=self.created_user_ids).delete()
+            User.all_objects.filter(pk__in=self.created_user_ids).delete()
+
+        output = json.dumps(report, indent=2, ensure_ascii=False)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                f.write(output)
+            self.stderr.write(self.style.SUCCESS(f'Relatório salvo em {options["output"]}'))
+        else:
+            self.stdout.write(output)
+
+    def get_user(self, user_id):
+        # As escritas medidas alteram de vez as tarefas do usuário: só contas
+        # sintéticas do seed_data, nunca a de uma pessoa real
+        seeded = User.objects.filter(username__startswith=SEED_PREFIX)
+        if user_id:
+            try:
+                return seeded.get(pk=user_id)
+            except User.DoesNotExist:
+                raise CommandError(f'Usuário {user_id} não encontrado entre os gerados pelo seed_data')
+        user = seeded.annotate(task_count=Count('tasks')).filter(task_count__gt=0).order_by('-task_count').first()
+        if user is None:
+            raise CommandError('Nenhum usuário do seed_data com tarefas; rode "python manage.py seed_data" antes')
+        return user
+
+    @staticmethod
+    def logged_client(user):
+        client = Client(HTTP_HOST='localhost')
+        client.force_login(user)
+        return client
+
+    def build_endpoints(self, user, target):
+        task_ids = list(Task.objects.filter(user=user).order_by('-created_at').values_list('id', flat=True)[:50])
+        if not task_ids:
+            raise CommandError(f'O usuário {user.pk} não tem tarefas')
+        counter = itertools.count()
+        rotating = itertools.cycle(task_ids)
+
+        def task_path(template):
+            return lambda: (template.replace('<id>', str(next(rotating))), None)
+
+        def update(template):
+            return lambda: (template.replace('<id>', str(next(rotating))), {'title': f'Benchmark {next(counter)}'})
+
+        def create(path):
+            return lambda: (path, {'title': f'Benchmark {next(counter)}', 'description': 'bench', 'status': 'PENDENTE'})
+
+        def fresh_task(template):
+            # Tarefa descartável criada fora da medição, para os endpoints de exclusão
+            def prepare():
+                form = TaskForm({'title': f'Excluir {next(counter)}', 'description': '', 'status': 'PENDENTE'})
+                form.is_valid()
+                task = services.create_task(user, form)
+                return template.replace('<id>', str(task.id)), None
+            return prepare
+
+        def bulk():
+            ids = [next(rotating) for _ in range(10)]
+            operations = [{'op': 'update', 'id': task_id, 'data': {'title': f'Lote {next(counter)}', 'status': 'PENDENTE'}} for task_id in ids]
+            return '/bulk/', {'operations': operations}
+
+        def target_type():
+            return f'/user/api/user/update-type/{target.pk}/', {'user_type': 'O' if next(counter) % 2 else 'U'}
+
+        def throwaway_user():
+            doomed = User.objects.create_user(
+                username=f'bench-delete-{self.suffix}-{next(counter)}@example.com', email='', password=None,
+            )
+            self.created_user_ids.append(doomed.pk)
+            return f'/user/api/user/delete/{doomed.pk}/', None
+
+        def target_path(template):
+            return lambda: (template.replace('<id>', str(target.pk)), None)
+
+        return [
+            # ToDo_app
+            Endpoint('dashboard', 'GET', '/dashboard/'),
+            Endpoint('dashboard_cursor', 'GET', '/dashboard/?pagination=cursor'),
+            Endpoint('create', 'POST', '/create/', create('/create/')),
+            Endpoint('update', 'POST', '/update/<id>/', update('/update/<id>/')),
+            Endpoint('complete', 'POST', '/complete/<id>/', task_path('/complete/<id>/')),
+            Endpoint('delete', 'DELETE', '/delete/<id>/', fresh_task('/delete/<id>/')),
+            Endpoint('get', 'GET', '/get/<id>/', task_path('/get/<id>/')),
+            Endpoint('bulk', 'POST', '/bulk/', bulk),
+            Endpoint('list', 'GET', '/list/'),
+            Endpoint('search', 'GET', '/search/?q=relatório'),
+            Endpoint('stats', 'GET', '/stats/'),
+            Endpoint('all_dates', 'GET', '/all_dates/'),
+            Endpoint('export_ndjson', 'GET', '/export/?format=ndjson'),
+            Endpoint('export_csv', 'GET', '/export/?format=csv'),
+            Endpoint('async_create', 'POST', '/async/create/', create('/async/create/')),
+            Endpoint('async_update', 'POST', '/async/update/<id>/', update('/async/update/<id>/')),
+            Endpoint('async_complete', 'POST', '/async/complete/<id>/', task_path('/async/complete/<id>/')),
+            Endpoint('async_delete', 'DELETE', '/async/delete/<id>/', fresh_task('/async/delete/<id>/')),
+            Endpoint('async_get', 'GET', '/async/get/<id>/', task_path('/async/get/<id>/')),
+            Endpoint('async_list', 'GET', '/async/list/'),
+            Endpoint('async_stats', 'GET', '/async/stats/'),
+            # ToDo_user_app (APIs do administrador)
+            Endpoint('admin_dashboard', 'GET', '/user/admin-dashboard/', admin=True),
+            Endpoint('admin_users', 'GET', '/user/api/users/', admin=True),
+            Endpoint('admin_gender_stats', 'GET', '/user/api/gender-stats/', admin=True),
+            Endpoint('admin_age_stats', 'GET', '/user/api/age-stats/', admin=True),
+            Endpoint('admin_user_details', 'GET', '/user/api/user/details/<id>/',
+                     lambda: (f'/user/api/user/details/{user.pk}/', None), admin=True),
+            Endpoint('admin_update_type', 'POST', '/user/api/user/update-type/<id>/', target_type, admin=True),
+            Endpoint('admin_deactivate', 'POST', '/user/api/user/deactivate/<id>/',
+                     target_path('/user/api/user/deactivate/<id>/'), admin=True),
+            Endpoint('admin_activate', 'POST', '/user/api/user/activate/<id>/',
+                     target_path('/user/api/user/activate/<id>/'), admin=True),
+            Endpoint('admin_delete', 'DELETE', '/user/api/user/delete/<id>/', throwaway_user, admin=True),
+        ]
+
+    def measure(self, client, endpoint, options):
+        for _ in range(options['warmup']):
+            self.request(client, endpoint)
+
+        latencies, query_counts, statuses = [], [], Counter()
+        for _ in range(options['requests']):
+            path, body = endpoint.prepare()
+            if options['cold']:
+                for alias in caches:
+                    caches[alias].clear()
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                status = self.send(client, endpoint.method, path, body)
+                latencies.append((time.perf_counter() - start) * 1000)
+            query_counts.append(len(queries))
+            statuses[status] += 1
+
+        # Pico de memória numa requisição separada: o tracemalloc distorceria a latência
+        path, body = endpoint.prepare()
+        tracemalloc.start()
+        self.send(client, endpoint.method, path, body)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        return {
+            'name': endpoint.name,
+            'method': endpoint.method,
+            'path': endpoint.path,
+            'requests': len(latencies),
+            'errors': sum(count for status, count in statuses.items() if status >= 400),
+            'status_codes': {str(status): count for status, count in sorted(statuses.items())},
+            'latency_ms': self.summarize(latencies),
+            'queries': {
+                'min': min(query_counts),
+                'max': max(query_counts),
+                'mean': round(statistics.fmean(query_counts), 2),
+            },
+            'peak_memory_kb': round(peak / 1024, 1),
+        }
+
+    def request(self, client, endpoint):
+        path, body = endpoint.prepare()
+        return self.send(client, endpoint.method, path, body)
+
+    def send(self, client, method, path, body):
+        if method == 'GET':
+            response = client.get(path)
+        elif method == 'DELETE':
+            response = client.delete(path)
+        else:
+            response = client.post(path, json.dumps(body or {}), content_type='application/json')
+        if response.streaming:
+            # Exportações: o tempo inclui gerar o corpo inteiro
+            for _ in response.streaming_content:
+                pass
+        elif path.endswith('create/') and response.status_code == 200:
+            self.created_task_ids.append(response.json()['task']['id'])
+        return response.status_code
+
+    @staticmethod
+    def summarize(values):
+        ordered = sorted(values)
+        if len(ordered) > 1:
+            cuts = statistics.quantiles(ordered, n=100, method='inclusive')
+            p50, p90, p95, p99 = cuts[49], cuts[89], cuts[94], cuts[98]
+        else:
+            p50 = p90 = p95 = p99 = ordered[0]
+        return {
+            'min': round(ordered[0], 3),
+            'mean': round(statistics.fmean(ordered), 3),
+            'p50': round(p50, 3),
+            'p90': round(p90, 3),
+            'p95': round(p95, 3),
+            'p99': round(p99, 3),
+            'max': round(ordered[-1], 3),
+        }
+
+    @staticmethod
+    def build_meta(user, options):
+        return {
+            'timestamp': timezone.now().isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'requests': options['requests'],
+            'warmup': options['warmup'],
+            'cold_cache': options['cold'],
+            'user_id': user.pk,
+            'user_tasks': Task.objects.filter(user=user).count(),
+            'total_users': User.objects.count(),
+            'total_tasks': Task.objects.count(),
+        }
@@ -0,0 +1,83 @@
+import json
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.http import JsonResponse
+from django.utils import timezone
+
+from ToDo_app import serializers
+from ToDo_app.choices import Status
+from ToDo_app.models import Task
+
+
+def legacy_format(task):
+    """Formatação antiga (format_task_data), mantida aqui só para comparação"""
+    return {
+        'id': task.id,
+        'title': task.title,
+        'description': task.description,
+        'status': task.status,
+        'created_at': task.created_at.strftime('%d/%m/%Y %H:%M'),
+        'updated_at': task.updated_at.strftime('%d/%m/%Y %H:%M')
+    }
+
+
+class Command(BaseCommand):
+    help = 'Micro-benchmark do custo de serialização por tarefa (sem banco de dados)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=10000, help='Tarefas por rodada')
+        parser.add_argument('--repeat', type=int, default=5, help='Rodadas (vale a melhor)')
+
+    def handle(self, *args, **options):
+        count = options['tasks']
+        now = timezone.now()
+        statuses = list(Status.values)
+        rows = [
+            {
+                'id': i,
+                'title': f'Tarefa {i}',
+                'description': 'Descrição da tarefa ' * 5,
+                'status': statuses[i % len(statuses)],
+                'created_at': now - timedelta(minutes=i),
+                'updated_at': now,
+            }
+            for i in range(count)
+        ]
+        instances = [Task(**row) for row in rows]
+
+        def legacy():
+            data = {'success': True, 'message': ''}
+            data.update({'tasks': [legacy_format(task) for task in instances]})
+            return JsonResponse(data).content
+
+        def rows_stdlib():
+            data = {'success': True, 'message': '', 'tasks': serializers.serialize_rows(rows)}
+            return json.dumps(data).encode()
+
+        def rows_fast():
+            data = {'success': True, 'message': '', 'tasks': serializers.serialize_rows(rows)}
+            return serializers.FastJsonResponse(data).content
+
+        def rows_fields():
+            data = {'success': True, 'message': '', 'tasks': serializers.serialize_rows(rows, ('id', 'title', 'status'))}
+            return serializers.FastJsonResponse(data).content
+
+        cases = [
+            ('format_task_data + JsonResponse', legacy),
+            ('serialize_rows + json stdlib', rows_stdlib),
+            (f'serialize_rows + {"orjson" if serializers.orjson else "json stdlib"}', rows_fast),
+            ('serialize_rows (id,title,status)', rows_fields),
+        ]
+
+        baseline = None
+        for name, func in cases:
+            best = float('inf')
+            for _ in range(options['repeat']):
+                start = time.perf_counter()
+                func()
+                best = min(best, time.perf_counter() - start)
+            per_task = best / count * 1e6
+            baseline = baseline or per_task
+            self.stdout.write(f'{name:<40} {per_task:8.3f} µs/tarefa  ({baseline / per_task:4.1f}x)')
@@ -0,0 +1,52 @@
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from ToDo_app import services
+from ToDo_app.models import Task
+
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Apaga de vez as tarefas e contas excluídas (deleted_at preenchido) em blocos de tamanho limitado. '
+        'Cada bloco é uma transação própria: se interrompido, basta rodar de novo para continuar de onde parou.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500, help='Tarefas apagadas por transação')
+        parser.add_argument('--older-than', type=int, default=0, metavar='MINUTOS',
+                            help='Só expurga o que foi excluído há pelo menos esse tempo')
+        parser.add_argument('--pause', type=float, default=0.0, metavar='SEGUNDOS',
+                            help='Pausa entre blocos, para liberar o banco às requisições')
+
+    def handle(self, *args, **options):
+        chunk_size = max(1, options['chunk_size'])
+        cutoff = timezone.now() - timedelta(minutes=options['older_than'])
+
+        purged = services.purge_tasks(
+            Task.all_objects.filter(deleted_at__isnull=False, deleted_at__lte=cutoff),
+            chunk_size, self.progress('Tarefas excluídas', options['pause']),
+        )
+
+        user_ids = list(
+            User.all_objects.filter(deleted_at__isnull=False, deleted_at__lte=cutoff)
+            .order_by('pk').values_list('pk', flat=True)
+        )
+        for position, user_id in enumerate(user_ids, 1):
+            label = f'Conta {user_id} ({position}/{len(user_ids)})'
+            purged += services.purge_account(user_id, chunk_size, self.progress(label, options['pause']))
+
+        self.stdout.write(self.style.SUCCESS(f'Expurgo concluído: {purged} tarefas e {len(user_ids)} contas apagadas'))
+
+    def progress(self, label, pause):
+        def report(done, total):
+            self.stdout.write(f'{label}: {done}/{total}')
+            if pause:
+                time.sleep(pause)
+        return report
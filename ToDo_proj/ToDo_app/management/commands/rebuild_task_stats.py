@@ -0,0 +1,56 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from ToDo_app.cache import bump_user_version
+from ToDo_app.models import ArchivedTask, Task, TaskStats
+from ToDo_app.stats import COUNTER_FIELDS, stats_aggregate
+
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Reconstrói os contadores de tarefas por status de todos os usuários (ou dos informados)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append', dest='users', help='ID do usuário (pode repetir)')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Usuários processados por lote')
+
+    def handle(self, *args, **options):
+        user_ids = options['users'] or list(User.objects.order_by('id').values_list('id', flat=True))
+        batch_size = options['batch_size']
+        processed = 0
+
+        for start in range(0, len(user_ids), batch_size):
+            batch = user_ids[start:start + batch_size]
+            with transaction.atomic():
+                # Uma consulta agrupada por lote de usuários
+                grouped = {
+                    row.pop('user'): row
+                    for row in Task.objects.filter(user_id__in=batch).values('user').annotate(**stats_aggregate()).order_by()
+                }
+                archived = dict(
+                    ArchivedTask.objects.filter(user_id__in=batch).values('user').annotate(count=Count('id'))
+                    .order_by().values_list('user', 'count')
+                )
+                empty = dict.fromkeys(COUNTER_FIELDS, 0)
+                now = timezone.now()
+                TaskStats.objects.bulk_create(
+                    [
+                        TaskStats(user_id=user_id, changed_at=now, archived=archived.get(user_id, 0), **grouped.get(user_id, empty))
+                        for user_id in batch
+                    ],
+                    update_conflicts=True,
+                    unique_fields=['user'],
+                    # changed_at invalida os validadores de respostas condicionais
+                    update_fields=[*COUNTER_FIELDS, 'archived', 'changed_at'],
+                )
+                for user_id in batch:
+                    bump_user_version(user_id)
+            processed += len(batch)
+            self.stdout.write(f'{processed}/{len(user_ids)} usuários processados')
+
+        self.stdout.write(self.style.SUCCESS('Contadores de tarefas reconstruídos com sucesso!'))
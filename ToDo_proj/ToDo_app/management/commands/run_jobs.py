@@ -0,0 +1,72 @@
+import os
+import signal
+import socket
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, close_old_connections
+
+from ToDo_app import jobs
+
+
+class Command(BaseCommand):
+    help = (
+        'Worker da fila de jobs: reserva e executa os jobs pendentes. '
+        'Pode rodar em vários processos ao mesmo tempo; SIGINT/SIGTERM encerram após o job atual.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Sai quando a fila estiver vazia')
+        parser.add_argument('--poll', type=float, default=1.0, metavar='SEGUNDOS', help='Intervalo de consulta com a fila vazia')
+        parser.add_argument('--max-jobs', type=int, help='Sai depois de executar essa quantidade de jobs')
+        parser.add_argument('--stale-after', type=int, default=600, metavar='SEGUNDOS',
+                            help='Jobs reservados há mais tempo que isso voltam para a fila')
+        parser.add_argument('--worker-id', help='Identificação do worker (padrão: host:pid)')
+
+    def handle(self, *args, **options):
+        worker_id = options['worker_id'] or f'{socket.gethostname()}:{os.getpid()}'
+        stale_after = timedelta(seconds=options['stale_after'])
+        self.stopping = False
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, self.stop)
+
+        self.stdout.write(f'Worker {worker_id} iniciado')
+        executed = failed = 0
+        last_sweep = 0.0
+        while not self.stopping:
+            if options['max_jobs'] is not None and executed >= options['max_jobs']:
+                break
+            # Processo de longa duração: respeita CONN_MAX_AGE e descarta conexões quebradas
+            close_old_connections()
+            try:
+                if time.monotonic() - last_sweep >= 60:
+                    requeued, expired = jobs.requeue_stale(stale_after)
+                    if requeued or expired:
+                        self.stdout.write(f'{requeued} jobs presos devolvidos à fila, {expired} marcados como falha')
+                    last_sweep = time.monotonic()
+                job = jobs.claim(worker_id)
+            except DatabaseError as e:
+                # Ex.: "database is locked" no SQLite com muitos escritores; tenta de novo
+                self.stderr.write(f'Erro ao consultar a fila: {e}')
+                time.sleep(options['poll'])
+                continue
+            if job is None:
+                if options['once']:
+                    break
+                time.sleep(options['poll'])
+                continue
+
+            start = time.perf_counter()
+            ok = jobs.run_job(job)
+            executed += 1
+            failed += not ok
+            elapsed = (time.perf_counter() - start) * 1000
+            status = self.style.SUCCESS('ok') if ok else self.style.ERROR('falhou')
+            self.stdout.write(f'{job.name} #{job.pk} (tentativa {job.attempts}): {status} em {elapsed:.0f} ms')
+
+        close_old_connections()
+        self.stdout.write(f'Worker {worker_id} encerrado: {executed} jobs executados, {failed} com falha')
+
+    def stop(self, signum, frame):
+        self.stopping = True
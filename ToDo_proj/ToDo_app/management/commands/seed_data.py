@@ -0,0 +1,126 @@
+import random
+import uuid
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from ToDo_app.choices import Status
+from ToDo_app.models import Task
+from ToDo_app.search import get_search_backend
+from ToDo_user_app.choices import Gender, States
+from ToDo_user_app.models import Address
+
+
+User = get_user_model()
+
+SEED_PREFIX = 'seed-'
+
+TITLES = [
+    'Comprar pão', 'Reunião com o time', 'Pagar contas', 'Estudar Django', 'Revisar PR',
+    'Ligar para o cliente', 'Agendar consulta', 'Enviar relatório', 'Limpar a casa', 'Treino na academia',
+]
+WORDS = 'urgente semana projeto cliente mercado relatório entrega revisão orçamento viagem'.split()
+STREETS = ['Rua das Flores', 'Av. Paulista', 'Rua XV de Novembro', 'Av. Brasil', 'Rua da Praia']
+CITIES = ['São Paulo', 'Rio de Janeiro', 'Curitiba', 'Porto Alegre', 'Salvador', 'Recife']
+
+
+class Command(BaseCommand):
+    help = 'Gera usuários, endereços e tarefas sintéticos com bulk_create (para benchmarks)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100, help='Usuários a criar')
+        parser.add_argument('--tasks', type=int, default=50, help='Tarefas por usuário')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Linhas por INSERT')
+        parser.add_argument('--password', default='senha-benchmark', help='Senha dos usuários gerados')
+        parser.add_argument('--seed', type=int, default=None, help='Semente do gerador aleatório')
+        parser.add_argument('--clear', action='store_true', help='Remove os usuários gerados anteriormente antes')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        batch_size = options['batch_size']
+
+        if options['clear']:
+            deleted, _ = User.objects.filter(username__startswith=SEED_PREFIX).delete()
+            call_command('rebuild_search_index', stdout=self.stdout)
+            self.stdout.write(f'{deleted} registros de carga anterior removidos')
+
+        run = uuid.uuid4().hex[:6]
+        # Mesmo hash para todos: make_password é lento de propósito
+        password = make_password(options['password'])
+        now = timezone.now()
+        today = timezone.localdate()
+
+        users = [self.build_user(rng, run, i, password, now, today) for i in range(options['users'])]
+        with transaction.atomic():
+            users = User.objects.bulk_create(users, batch_size=batch_size)
+            Address.objects.bulk_create([self.build_address(rng, user) for user in users], batch_size=batch_size)
+        self.stdout.write(f'{len(users)} usuários e endereços criados')
+
+        created = 0
+        search_backend = get_search_backend()
+        per_batch = max(1, batch_size // max(1, options['tasks']))
+        for start in range(0, len(users), per_batch):
+            chunk = users[start:start + per_batch]
+            tasks = [self.build_task(rng, user, i) for user in chunk for i in range(options['tasks'])]
+            with transaction.atomic():
+                tasks = Task.objects.bulk_create(tasks, batch_size=batch_size)
+                # auto_now_add/auto_now ignoram o valor informado no INSERT;
+                # bulk_update grava as datas espalhadas pelo último ano
+                for task in tasks:
+                    task.created_at = now - timedelta(minutes=rng.randint(0, 365 * 24 * 60))
+                    task.updated_at = task.created_at + timedelta(minutes=rng.randint(0, 7 * 24 * 60))
+                Task.objects.bulk_update(tasks, ['created_at', 'updated_at'], batch_size=batch_size)
+                search_backend.index_tasks(tasks)
+            created += len(tasks)
+            self.stdout.write(f'{created} tarefas criadas')
+
+        if users:
+            call_command('rebuild_task_stats', users=[user.pk for user in users], stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS(
+            f'Carga gerada: {len(users)} usuários, {created} tarefas (senha: {options["password"]})'
+        ))
+
+    @staticmethod
+    def build_user(rng, run, index, password, now, today):
+        username = f'{SEED_PREFIX}{run}-{index}@example.com'
+        return User(
+            username=username,
+            email=username,
+            password=password,
+            first_name=f'Usuário {index}',
+            last_name=f'Carga {run}',
+            birthdate=today - timedelta(days=rng.randint(18 * 365, 70 * 365)),
+            gender=rng.choice(Gender.values),
+            phone=f'119{rng.randint(10000000, 99999999)}',
+            date_joined=now - timedelta(days=rng.randint(0, 730)),
+            profile_completed=True,
+        )
+
+    @staticmethod
+    def build_address(rng, user):
+        address = Address(
+            user=user,
+            zipcode=f'{rng.randint(10000, 99999)}-{rng.randint(100, 999)}',
+            street=rng.choice(STREETS),
+            number=str(rng.randint(1, 3000)),
+            neighborhood='Centro',
+            city=rng.choice(CITIES),
+            state=rng.choice(States.values),
+        )
+        # bulk_create não chama save(), que é quem monta o endereço formatado
+        address.formatted_address = address.build_formatted_address()
+        return address
+
+    @staticmethod
+    def build_task(rng, user, index):
+        return Task(
+            user=user,
+            title=f'{rng.choice(TITLES)} #{index}',
+            description=' '.join(rng.choices(WORDS, k=rng.randint(0, 12))),
+            status=rng.choice(Status.values),
+        )
@@ -0,0 +1,256 @@
+"""
+Métricas de latência e de consultas ao banco por view.
+
+O MetricsMiddleware (middleware.py) mede, para cada requisição, o tempo
+total, o número de consultas e o tempo gasto no banco, e registra tudo em
+histogramas por nome de URL (ex.: "tasks:dashboard"). O endpoint
+/tasks/metrics/ expõe os valores no formato texto do Prometheus.
+
+O registro é plugável pela setting TASK_METRICS_BACKEND, no mesmo estilo do
+backend de busca: o padrão LocalMetrics agrega só dentro do processo;
+FileMetrics grava o estado de cada processo em um arquivo próprio e soma os
+arquivos na leitura, para deploys com vários workers.
+"""
+
+import bisect
+import json
+import os
+import tempfile
+import threading
+import time
+from contextvars import ContextVar
+from pathlib import Path
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+
+# nome -> (tipo, descrição, buckets)
+METRICS = {
+    'todo_http_requests_total': (
+        'counter', 'Requisições por view, método e status', None),
+    'todo_http_request_duration_seconds': (
+        'histogram', 'Tempo total da requisição por view', DURATION_BUCKETS),
+    'todo_db_queries_per_request': (
+        'histogram', 'Consultas ao banco por requisição', QUERY_BUCKETS),
+    'todo_db_duration_seconds': (
+        'histogram', 'Tempo gasto no banco por requisição', DURATION_BUCKETS),
+}
+
+
+class QueryStats:
+    """Consultas e tempo de banco acumulados na requisição atual"""
+
+    __slots__ = ('count', 'duration')
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+
+# ContextVar, e não thread local: as views async rodam o ORM em outra thread
+# via sync_to_async, que copia o contexto (e este mesmo objeto) para ela
+current_query_stats = ContextVar('todo_query_stats', default=None)
+
+
+def track_queries(execute, sql, params, many, context):
+    """execute_wrapper instalado em todas as conexões (ver install_query_tracker)"""
+    stats = current_query_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.count += 1
+        stats.duration += time.perf_counter() - start
+
+
+def install_query_tracker(sender, connection, **kwargs):
+    """Receiver de connection_created; o wrapper sobrevive às reconexões"""
+    if track_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(track_queries)
+
+
+class LocalMetrics:
+    """Histogramas e contadores em memória do processo"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        # (nome, labels) -> [contagens por bucket..., soma, total]
+        self._histograms = {}
+        # (nome, labels) -> valor
+        self._counters = {}
+
+    def _check_fork(self):
+        # Registro herdado de um fork (ex.: gunicorn --preload): recomeça do
+        # zero para não contar em dobro as requisições do processo pai
+        if os.getpid() != self._pid:
+            self._reset()
+
+    def observe(self, name, labels, value):
+        buckets = METRICS[name][2]
+        key = (name, labels)
+        with self._lock:
+            self._check_fork()
+            entry = self._histograms.get(key)
+            if entry is None:
+                entry = self._histograms[key] = [0] * (len(buckets) + 2)
+            index = bisect.bisect_left(buckets, value)
+            if index < len(buckets):
+                entry[index] += 1
+            entry[-2] += value
+            entry[-1] += 1
+
+    def inc(self, name, labels, amount=1):
+        key = (name, labels)
+        with self._lock:
+            self._check_fork()
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def record_request(self, view, method, status, duration, queries, db_duration):
+        labels = (('view', view), ('method', method))
+        self.inc('todo_http_requests_total', labels + (('status', str(status)),))
+        self.observe('todo_http_request_duration_seconds', labels, duration)
+        self.observe('todo_db_queries_per_request', labels, queries)
+        self.observe('todo_db_duration_seconds', labels, db_duration)
+
+    def snapshot(self):
+        """Cópia do estado deste processo"""
+        with self._lock:
+            self._check_fork()
+            return {
+                'histograms': {key: list(entry) for key, entry in self._histograms.items()},
+                'counters': dict(self._counters),
+            }
+
+    def collect(self):
+        """Estado agregado exposto pelo endpoint de métricas"""
+        return self.snapshot()
+
+    def clear(self):
+        with self._lock:
+            self._reset()
+
+
+class FileMetrics(LocalMetrics):
+    """
+    Agregação entre processos: cada processo grava seu snapshot em
+    <TASK_METRICS_DIR>/<pid>.json (no máximo uma vez por flush_interval
+    segundos) e a leitura soma todos os arquivos do diretório.
+
+    A gravação é atômica (arquivo temporário + os.replace), então não há
+    trava entre processos. Os arquivos de processos encerrados continuam
+    somando até o diretório ser limpo; apague-o ao reiniciar o serviço.
+    """
+
+    flush_interval = 1.0
+
+    def __init__(self, directory=None):
+        super().__init__()
+        directory = directory or getattr(settings, 'TASK_METRICS_DIR', None)
+        self.directory = Path(directory or Path(tempfile.gettempdir()) / 'todo_metrics')
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._last_flush = 0.0
+
+    def record_request(self, *args, **kwargs):
+        super().record_request(*args, **kwargs)
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        snapshot = self.snapshot()
+        self._last_flush = time.monotonic()
+        payload = {
+            'histograms': [[name, labels, entry] for (name, labels), entry in snapshot['histograms'].items()],
+            'counters': [[name, labels, value] for (name, labels), value in snapshot['counters'].items()],
+        }
+        path = self.directory / f'{os.getpid()}.json'
+        temporary = path.with_name(f'{path.name}.{threading.get_ident()}.tmp')
+        temporary.write_text(json.dumps(payload))
+        os.replace(temporary, path)
+
+    def collect(self):
+        self.flush()
+        histograms, counters = {}, {}
+        for path in self.directory.glob('*.json'):
+            try:
+                payload = json.loads(path.read_text())
+            except (OSError, ValueError):
+                # Arquivo removido ou de outra versão: ignora
+                continue
+            for name, labels, entry in payload['histograms']:
+                key = (name, tuple(tuple(pair) for pair in labels))
+                current = histograms.get(key)
+                if current is None or len(current) != len(entry):
+                    histograms[key] = list(entry)
+                else:
+                    histograms[key] = [a + b for a, b in zip(current, entry)]
+            for name, labels, value in payload['counters']:
+                key = (name, tuple(tuple(pair) for pair in labels))
+                counters[key] = counters.get(key, 0) + value
+        return {'histograms': histograms, 'counters': counters}
+
+    def clear(self):
+        super().clear()
+        for path in self.directory.glob('*.json'):
+            path.unlink(missing_ok=True)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in pairs) + '}'
+
+
+def _number(value):
+    if isinstance(value, float):
+        return repr(value) if value != int(value) else f'{value:.1f}'
+    return str(value)
+
+
+def render_prometheus(collected):
+    """Formato texto de exposição do Prometheus (versão 0.0.4)"""
+    lines = []
+    for name, (kind, description, buckets) in METRICS.items():
+        lines.append(f'# HELP {name} {description}')
+        lines.append(f'# TYPE {name} {kind}')
+        if kind == 'counter':
+            for (metric, labels), value in sorted(collected['counters'].items()):
+                if metric == name:
+                    lines.append(f'{name}{_labels(labels)} {_number(value)}')
+            continue
+        for (metric, labels), entry in sorted(collected['histograms'].items()):
+            if metric != name:
+                continue
+            cumulative = 0
+            for bound, count in zip(buckets, entry):
+                cumulative += count
+                lines.append(f'{name}_bucket{_labels(labels, [("le", _number(float(bound)))])} {cumulative}')
+            lines.append(f'{name}_bucket{_labels(labels, [("le", "+Inf")])} {entry[-1]}')
+            lines.append(f'{name}_sum{_labels(labels)} {_number(float(entry[-2]))}')
+            lines.append(f'{name}_count{_labels(labels)} {entry[-1]}')
+    return '\n'.join(lines) + '\n'
+
+
+_registries = {}
+
+
+def get_metrics():
+    """Registro configurado em TASK_METRICS_BACKEND (padrão: LocalMetrics)"""
+    path = getattr(settings, 'TASK_METRICS_BACKEND', None) or 'ToDo_app.metrics.LocalMetrics'
+    if path not in _registries:
+        _registries[path] = import_string(path)()
+    return _registries[path]
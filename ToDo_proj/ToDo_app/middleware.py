@@ -0,0 +1,61 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from .metrics import QueryStats, current_query_stats, get_metrics
+
+
+KNOWN_METHODS = frozenset(('GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'))
+
+
+class MetricsMiddleware:
+    """
+    Registra tempo, número de consultas e tempo de banco de cada requisição
+    por nome de URL (ver metrics.py).
+
+    Fica no topo de MIDDLEWARE para que o tempo inclua os demais middlewares.
+    Atende sync e async sem trocar de thread; em respostas em streaming o
+    tempo vai até a resposta ser devolvida, não até o fim do corpo.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        stats = QueryStats()
+        token = current_query_stats.set(stats)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_query_stats.reset(token)
+        self.record(request, response, stats, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        stats = QueryStats()
+        token = current_query_stats.set(stats)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_query_stats.reset(token)
+        self.record(request, response, stats, time.perf_counter() - start)
+        return response
+
+    @staticmethod
+    def record(request, response, stats, duration):
+        # Só nomes de URL resolvidos: caminhos arbitrários (404) explodiriam
+        # a cardinalidade das séries
+        match = request.resolver_match
+        view = match.view_name if match is not None else 'unresolved'
+        method = request.method if request.method in KNOWN_METHODS else 'other'
+        get_metrics().record_request(view, method, response.status_code, duration, stats.count, stats.duration)
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:04
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ToDo_app', '0006_task_indexes'),
+        ('ToDo_user_app', '0003_address_formatted_address'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='task_stats', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Usuário')),
+                ('total', models.IntegerField(default=0, verbose_name='Total')),
+                ('pending', models.IntegerField(default=0, verbose_name='Pendentes')),
+                ('in_progress', models.IntegerField(default=0, verbose_name='Em Andamento')),
+                ('completed', models.IntegerField(default=0, verbose_name='Concluídas')),
+            ],
+            options={
+                'verbose_name': 'Estatística de Tarefas',
+                'verbose_name_plural': 'Estatísticas de Tarefas',
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:06
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ToDo_app', '0007_taskstats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='taskstats',
+            name='changed_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, help_text='Data da última escrita nas tarefas do usuário', verbose_name='Alterado em'),
+        ),
+        migrations.AddField(
+            model_name='taskstats',
+            name='version',
+            field=models.PositiveBigIntegerField(default=0, help_text='Incrementada a cada escrita nas tarefas do usuário', verbose_name='Versão'),
+        ),
+    ]
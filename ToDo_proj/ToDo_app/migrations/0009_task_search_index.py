@@ -0,0 +1,31 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS todo_task_search "
+        "USING fts5(title, description, owner, tokenize='unicode61 remove_diacritics 2')"
+    )
+    schema_editor.execute(
+        "INSERT INTO todo_task_search (rowid, title, description, owner) "
+        "SELECT id, title, description, 'u' || user_id FROM ToDo_app_task"
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute("DROP TABLE IF EXISTS todo_task_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ToDo_app', '0008_taskstats_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ToDo_app', '0009_task_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='version',
+            field=models.PositiveIntegerField(default=1, help_text='Incrementada a cada alteração, usada no controle de concorrência otimista', verbose_name='Versão'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+from django.conf import settings
+from django.db import migrations
+from django.db.models import Count, Q
+
+
+def backfill_task_stats(apps, schema_editor):
+    """Cria os contadores dos usuários que ainda não têm, a partir das tarefas"""
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    Task = apps.get_model('ToDo_app', 'Task')
+    ArchivedTask = apps.get_model('ToDo_app', 'ArchivedTask')
+    TaskStats = apps.get_model('ToDo_app', 'TaskStats')
+
+    missing = list(User._base_manager.filter(task_stats__isnull=True).values_list('pk', flat=True))
+    for start in range(0, len(missing), 1000):
+        user_ids = missing[start:start + 1000]
+        counts = {
+            row.pop('user_id'): row
+            for row in Task._base_manager.filter(user_id__in=user_ids, deleted_at__isnull=True)
+            .values('user_id')
+            .annotate(
+                total=Count('id'),
+                pending=Count('id', filter=Q(status='PENDENTE')),
+                in_progress=Count('id', filter=Q(status='EM ANDAMENTO')),
+                completed=Count('id', filter=Q(status='COMPLETADO')),
+            )
+            .order_by()
+        }
+        archived = dict(
+            ArchivedTask._base_manager.filter(user_id__in=user_ids)
+            .values('user_id').annotate(count=Count('id')).values_list('user_id', 'count').order_by()
+        )
+        TaskStats.objects.bulk_create([
+            TaskStats(user_id=user_id, archived=archived.get(user_id, 0), **counts.get(user_id, {}))
+            for user_id in user_ids
+        ], ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ToDo_app', '0013_archived_task'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_task_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+from django.db import migrations
+
+
+INDEX_NAME = 'task_search_gin_idx'
+
+
+def task_search_index():
+    from django.contrib.postgres.indexes import GinIndex
+    from django.contrib.postgres.search import SearchVector
+
+    # Mesma expressão de PostgresSearchBackend.vector(): só assim o planner usa o índice
+    vector = (
+        SearchVector('title', weight='A', config='portuguese')
+        + SearchVector('description', weight='B', config='portuguese')
+    )
+    return GinIndex(vector, name=INDEX_NAME)
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.add_index(apps.get_model('ToDo_app', 'Task'), task_search_index())
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.remove_index(apps.get_model('ToDo_app', 'Task'), task_search_index())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ToDo_app', '0014_backfill_task_stats'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
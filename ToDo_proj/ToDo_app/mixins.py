@@ -1,31 +1,85 @@
 import json
+from django.contrib.auth.views import redirect_to_login
+from django.utils.functional import cached_property
 from django.http import JsonResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+
+from . import stats
+from .cache import UserCache
 
 class JsonResponseMixin:
     """Mixin para padronizar respostas JSON"""
 
+    json_response_class = JsonResponse
+
     def json_error(self, error_message, status_code=400, extra_data=None):
         response_data = {'success': False, 'error': error_message}
         if extra_data:
             response_data.update(extra_data)
-        return JsonResponse(response_data, status=status_code)
+        return self.json_response_class(response_data, status=status_code)
 
     def json_success(self, message, data=None):
         response_data = {'success': True, 'message': message}
         if data:
             response_data.update(data)
-        return JsonResponse(response_data)
+        return self.json_response_class(response_data)
 
     def validate_json_request(self, request):
-        """Valida se a requisição é JSON e retorna o dict carregado"""
+        """Valida se a requisição é um objeto JSON e retorna o dict carregado"""
         if request.content_type != 'application/json':
             return self.json_error('Formato inválido', 400)
         try:
-            return json.loads(request.body)
+            data = json.loads(request.body)
         except json.JSONDecodeError:
             return self.json_error('Formato JSON inválido', 400)
-    
-    
+        if not isinstance(data, dict):
+            return self.json_error('O corpo deve ser um objeto JSON', 400)
+        return data
+
+
+class ConditionalResponseMixin:
+    """
+    Mixin para respostas condicionais (ETag) nas APIs JSON.
+
+    O ETag é o único validador: o Last-Modified tem precisão de um segundo,
+    e um cliente que mandasse só If-Modified-Since receberia 304 depois de
+    uma escrita no mesmo segundo da leitura anterior.
+    """
+
+    def not_modified(self, request, etag):
+        """Retorna 304 se o ETag enviado pelo cliente ainda confere, senão None"""
+        response = get_conditional_response(request, etag=quote_etag(etag))
+        if response is not None:
+            response.headers['ETag'] = quote_etag(etag)
+        return response
+
+    def with_validators(self, response, etag):
+        """Anexa o ETag à resposta e obriga o navegador a revalidar"""
+        if response.status_code == 200:
+            response.headers['ETag'] = quote_etag(etag)
+            patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+
+class AsyncLoginRequiredMixin:
+    """Equivalente ao LoginRequiredMixin para views com handlers async"""
+
+    async def dispatch(self, request, *args, **kwargs):
+        # request.user é lazy e síncrono; auser() carrega o usuário sem bloquear o event loop
+        request.user = await request.auser()
+        if not request.user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        return await super().dispatch(request, *args, **kwargs)
+
 
+class UserCacheMixin:
+    """Cache versionado dos dados do usuário logado (ver ToDo_app/cache.py)"""
 
+    @cached_property
+    def user_cache(self):
+        return UserCache(self.request.user.pk)
 
+    def get_cached_snapshot(self):
+        """Contadores e versão de alterações, lidos do cache quando possível"""
+        return self.user_cache.get_or_set('snapshot', lambda: stats.get_user_snapshot(self.request.user.pk))
@@ -1,6 +1,14 @@
 from django.db import models
 from django.conf import settings
-from .choices import Status
+from django.utils import timezone
+from .choices import JobStatus, Status
+
+
+class TaskManager(models.Manager):
+    """Gerenciador padrão: esconde as tarefas excluídas que aguardam o expurgo"""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
 
 
 # Create your models here.
@@ -26,6 +34,122 @@ class Task(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='Criado em', help_text='Data de criação da tarefa')
     updated_at = models.DateTimeField(auto_now=True, verbose_name='Atualizado em', help_text='Data de atualização da tarefa')
+    version = models.PositiveIntegerField(default=1, verbose_name='Versão', help_text='Incrementada a cada alteração, usada no controle de concorrência otimista')
+    deleted_at = models.DateTimeField(null=True, blank=True, verbose_name='Excluído em', help_text='Preenchido na exclusão; a linha é apagada depois pelo comando purge_deleted')
+
+    objects = TaskManager()
+    # Inclui as excluídas (expurgo e manutenção)
+    all_objects = models.Manager()
+
+    class Meta:
+        indexes = [
+            # Índices parciais: as consultas do gerenciador padrão sempre têm
+            # "deleted_at IS NULL", e as tarefas excluídas ficam fora do índice
+            # Dashboard filtrado por status e ordenado pelas mais recentes
+            models.Index(fields=['user', 'status', '-created_at'], name='task_user_status_created_idx',
+                         condition=models.Q(deleted_at__isnull=True)),
+            # Dashboard sem filtro, estatísticas e gráfico por mês
+            models.Index(fields=['user', '-created_at'], name='task_user_created_idx',
+                         condition=models.Q(deleted_at__isnull=True)),
+            # Candidatas ao arquivamento (comando archive_tasks)
+            models.Index(fields=['updated_at', 'id'], name='task_completed_updated_idx',
+                         condition=models.Q(status=Status.COMPLETED, deleted_at__isnull=True)),
+            # Fila do expurgo
+            models.Index(fields=['deleted_at'], name='task_deleted_idx',
+                         condition=models.Q(deleted_at__isnull=False)),
+        ]
+
+    # Tarefas arquivadas (ArchivedTask) são exibidas sem ações
+    is_archived = False
+
+    def __str__(self):
+        return f'{self.title} - {self.status}'
+
+
+class ArchivedTask(models.Model):
+    """
+    Tarefas concluídas antigas, movidas da tabela Task pelo comando
+    archive_tasks para que ela fique pequena. Mantém o id original; só é
+    consultada quando o cliente pede os dados arquivados.
+    """
+
+    id = models.BigIntegerField(primary_key=True, verbose_name='ID', help_text='Mesmo id da tarefa original')
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='archived_tasks',
+        verbose_name='Usuário'
+    )
+    title = models.CharField(max_length=200)
+    description = models.TextField(blank=True)
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.COMPLETED, verbose_name='Status')
+    created_at = models.DateTimeField(verbose_name='Criado em')
+    updated_at = models.DateTimeField(verbose_name='Atualizado em')
+    version = models.PositiveIntegerField(default=1, verbose_name='Versão')
+    archived_at = models.DateTimeField(default=timezone.now, verbose_name='Arquivado em')
+
+    is_archived = True
+
+    class Meta:
+        verbose_name = 'Tarefa Arquivada'
+        verbose_name_plural = 'Tarefas Arquivadas'
+        indexes = [
+            # Dashboard e gráfico por mês com include_archived
+            models.Index(fields=['user', '-created_at'], name='archived_user_created_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.title} - arquivada'
+
+
+class TaskStats(models.Model):
+    """Contadores de tarefas por status mantidos incrementalmente a cada escrita"""
+
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='task_stats',
+        verbose_name='Usuário'
+    )
+    total = models.IntegerField(default=0, verbose_name='Total')
+    pending = models.IntegerField(default=0, verbose_name='Pendentes')
+    in_progress = models.IntegerField(default=0, verbose_name='Em Andamento')
+    completed = models.IntegerField(default=0, verbose_name='Concluídas')
+    archived = models.IntegerField(default=0, verbose_name='Arquivadas', help_text='Tarefas concluídas movidas para ArchivedTask (fora de total e completed)')
+    version = models.PositiveBigIntegerField(default=0, verbose_name='Versão', help_text='Incrementada a cada escrita nas tarefas do usuário')
+    changed_at = models.DateTimeField(default=timezone.now, verbose_name='Alterado em', help_text='Data da última escrita nas tarefas do usuário')
+
+    class Meta:
+        verbose_name = 'Estatística de Tarefas'
+        verbose_name_plural = 'Estatísticas de Tarefas'
+
+    def __str__(self):
+        return f'{self.user_id} - {self.total} tarefas'
+
+
+class Job(models.Model):
+    """Trabalho em segundo plano executado pelo comando run_jobs (ver jobs.py)"""
+
+    name = models.CharField(max_length=100, verbose_name='Nome', help_text='Nome registrado com @job em jobs.py')
+    payload = models.JSONField(default=dict, blank=True, verbose_name='Parâmetros')
+    status = models.CharField(max_length=20, choices=JobStatus.choices, default=JobStatus.PENDING, verbose_name='Status')
+    attempts = models.PositiveIntegerField(default=0, verbose_name='Tentativas')
+    max_attempts = models.PositiveIntegerField(default=5, verbose_name='Máximo de tentativas')
+    run_at = models.DateTimeField(default=timezone.now, verbose_name='Executar a partir de')
+    locked_by = models.CharField(max_length=100, blank=True, verbose_name='Worker')
+    locked_at = models.DateTimeField(null=True, blank=True, verbose_name='Reservado em')
+    last_error = models.TextField(blank=True, verbose_name='Último erro')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Criado em')
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name='Finalizado em')
+
+    class Meta:
+        verbose_name = 'Job'
+        verbose_name_plural = 'Jobs'
+        indexes = [
+            # Próximo job a executar e jobs presos em workers que morreram
+            models.Index(fields=['status', 'run_at'], name='job_status_run_at_idx'),
+        ]
 
     def __str__(self):
-        return f'{self.title} - {self.status}'
\ No newline at end of file
+        return f'{self.name} #{self.pk} - {self.status}'
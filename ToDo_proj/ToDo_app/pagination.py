@@ -0,0 +1,115 @@
+import base64
+import json
+from datetime import datetime
+
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    """Cursor recebido pelo cliente não pôde ser decodificado"""
+
+
+class CursorPage:
+    """Página de uma paginação por cursor (keyset)"""
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """
+    Paginação por cursor ordenada por (created_at, id) decrescente.
+
+    Cada página custa uma única consulta com LIMIT sobre o índice
+    (user, -created_at), sem COUNT(*) e sem OFFSET, então o custo é o mesmo
+    para a primeira página e para a milésima.
+    """
+
+    NEXT = 'n'
+    PREVIOUS = 'p'
+
+    def __init__(self, queryset, per_page):
+        self.queryset = queryset.order_by('-created_at', '-id')
+        self.per_page = per_page
+
+    @staticmethod
+    def encode_cursor(task, direction):
+        # Aceita instâncias de Task ou linhas de values() (dicts)
+        if isinstance(task, dict):
+            created_at, task_id = task['created_at'], task['id']
+        else:
+            created_at, task_id = task.created_at, task.id
+        payload = {'c': created_at.isoformat(), 'i': task_id, 'd': direction}
+        raw = json.dumps(payload, separators=(',', ':')).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    @staticmethod
+    def decode_cursor(cursor):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            created_at = datetime.fromisoformat(payload['c'])
+            task_id = int(payload['i'])
+            direction = payload['d']
+        except (ValueError, TypeError, KeyError):
+            raise InvalidCursor('Cursor inválido')
+        if direction not in (CursorPaginator.NEXT, CursorPaginator.PREVIOUS):
+            raise InvalidCursor('Cursor inválido')
+        return created_at, task_id, direction
+
+    def page(self, cursor=None):
+        queryset, direction = self._page_queryset(cursor)
+        return self._finish_page(list(queryset), direction)
+
+    async def apage(self, cursor=None):
+        """Versão assíncrona de page(), para as views async"""
+        queryset, direction = self._page_queryset(cursor)
+        return self._finish_page([row async for row in queryset], direction)
+
+    def _page_queryset(self, cursor):
+        if not cursor:
+            return self.queryset[:self.per_page + 1], None
+
+        created_at, task_id, direction = self.decode_cursor(cursor)
+        if direction == self.NEXT:
+            keyset = Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=task_id)
+            return self.queryset.filter(keyset)[:self.per_page + 1], direction
+
+        # Voltando: percorre o índice no sentido crescente e inverte o resultado
+        keyset = Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=task_id)
+        return self.queryset.filter(keyset).order_by('created_at', 'id')[:self.per_page + 1], direction
+
+    def _finish_page(self, rows, direction):
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if direction is None:
+            return self._build_page(rows, has_next=has_more, has_previous=False)
+        if direction == self.NEXT:
+            return self._build_page(rows, has_next=has_more, has_previous=True)
+        rows.reverse()
+        return self._build_page(rows, has_next=True, has_previous=has_more)
+
+    def _build_page(self, rows, has_next, has_previous):
+        next_cursor = self.encode_cursor(rows[-1], self.NEXT) if rows and has_next else None
+        previous_cursor = self.encode_cursor(rows[0], self.PREVIOUS) if rows and has_previous else None
+        return CursorPage(rows, next_cursor, previous_cursor)
@@ -0,0 +1,183 @@
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Case, F, IntegerField, Q, Value, When
+from django.utils.module_loading import import_string
+
+from .models import Task
+
+
+FTS_TABLE = 'todo_task_search'
+
+
+class BaseSearchBackend:
+    """
+    Interface dos backends de busca textual de tarefas.
+
+    index_tasks/remove_tasks são chamados pelos caminhos de escrita das
+    tarefas, dentro da mesma transação; search devolve os ids das tarefas do
+    usuário ordenados por relevância.
+    """
+
+    def index_tasks(self, tasks):
+        pass
+
+    def remove_tasks(self, task_ids):
+        pass
+
+    def rebuild(self):
+        pass
+
+    def search(self, user_id, query, limit, offset=0):
+        raise NotImplementedError
+
+
+class SQLiteFTSSearchBackend(BaseSearchBackend):
+    """
+    Busca com índice FTS5 do SQLite.
+
+    A tabela virtual guarda título, descrição e um token do dono (u<id>), de
+    modo que o filtro por usuário também é resolvido pelo índice invertido.
+    """
+
+    title_weight = 10.0
+    description_weight = 1.0
+
+    @staticmethod
+    def owner_token(user_id):
+        return f'u{user_id}'
+
+    @staticmethod
+    def build_match(query):
+        # Cada termo vira uma frase entre aspas com busca por prefixo, o que
+        # neutraliza a sintaxe do FTS5 digitada pelo usuário
+        terms = re.findall(r'\w+', query)
+        return ' AND '.join(f'"{term}"*' for term in terms)
+
+    def index_tasks(self, tasks):
+        tasks = list(tasks)
+        if not tasks:
+            return
+        with connection.cursor() as cursor:
+            self._delete(cursor, [task.id for task in tasks])
+            cursor.executemany(
+                f'INSERT INTO {FTS_TABLE} (rowid, title, description, owner) VALUES (%s, %s, %s, %s)',
+                [(task.id, task.title, task.description, self.owner_token(task.user_id)) for task in tasks],
+            )
+
+    def remove_tasks(self, task_ids):
+        task_ids = list(task_ids)
+        if not task_ids:
+            return
+        with connection.cursor() as cursor:
+            self._delete(cursor, task_ids)
+
+    def _delete(self, cursor, task_ids):
+        placeholders = ', '.join(['%s'] * len(task_ids))
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})', task_ids)
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} (rowid, title, description, owner) "
+                f"SELECT id, title, description, 'u' || user_id FROM {Task._meta.db_table} "
+                f"WHERE deleted_at IS NULL"
+            )
+
+    def search(self, user_id, query, limit, offset=0):
+        match = self.build_match(query)
+        if not match:
+            return []
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {FTS_TABLE} '
+                f'WHERE {FTS_TABLE} MATCH %s '
+                f'ORDER BY bm25({FTS_TABLE}, %s, %s, 0.0), rowid DESC '
+                f'LIMIT %s OFFSET %s',
+                [
+                    f'owner:{self.owner_token(user_id)} AND ({match})',
+                    self.title_weight,
+                    self.description_weight,
+                    limit,
+                    offset,
+                ],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    """
+    Busca com o full-text do PostgreSQL.
+
+    O filtro é um "vetor @@ consulta" sobre a mesma expressão do índice GIN
+    task_search_gin_idx (migração 0015), para que o planner use o índice em
+    vez de calcular o tsvector de cada tarefa.
+    """
+
+    config = 'portuguese'
+
+    @classmethod
+    def vector(cls):
+        from django.contrib.postgres.search import SearchVector
+
+        return (
+            SearchVector('title', weight='A', config=cls.config)
+            + SearchVector('description', weight='B', config=cls.config)
+        )
+
+    def search(self, user_id, query, limit, offset=0):
+        from django.contrib.postgres.search import SearchQuery, SearchRank
+
+        search_query = SearchQuery(query, config=self.config, search_type='websearch')
+        return list(
+            Task.objects
+            .filter(user_id=user_id)
+            .annotate(document=self.vector())
+            .filter(document=search_query)
+            .annotate(rank=SearchRank(F('document'), search_query))
+            .order_by('-rank', '-id')
+            .values_list('id', flat=True)[offset:offset + limit]
+        )
+
+
+class DatabaseSearchBackend(BaseSearchBackend):
+    """Busca genérica com icontains, sem índice textual (apenas para fallback)"""
+
+    def search(self, user_id, query, limit, offset=0):
+        terms = re.findall(r'\w+', query)
+        if not terms:
+            return []
+        matches = Q()
+        for term in terms:
+            matches &= Q(title__icontains=term) | Q(description__icontains=term)
+        return list(
+            Task.objects
+            .filter(matches, user_id=user_id)
+            .annotate(rank=Case(
+                When(title__icontains=terms[0], then=Value(1)),
+                default=Value(0),
+                output_field=IntegerField(),
+            ))
+            .order_by('-rank', '-id')
+            .values_list('id', flat=True)[offset:offset + limit]
+        )
+
+
+DEFAULT_BACKENDS = {
+    'sqlite': 'ToDo_app.search.SQLiteFTSSearchBackend',
+    'postgresql': 'ToDo_app.search.PostgresSearchBackend',
+}
+
+_backends = {}
+
+
+def get_search_backend():
+    """Backend configurado em TASK_SEARCH_BACKEND ou o padrão do banco em uso"""
+    path = getattr(settings, 'TASK_SEARCH_BACKEND', None) or DEFAULT_BACKENDS.get(
+        connection.vendor, 'ToDo_app.search.DatabaseSearchBackend'
+    )
+    if path not in _backends:
+        _backends[path] = import_string(path)()
+    return _backends[path]
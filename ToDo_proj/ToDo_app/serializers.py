@@ -0,0 +1,78 @@
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+
+try:
+    import orjson
+except ImportError:  # orjson é opcional; sem ele usamos o json da stdlib
+    orjson = None
+
+
+TASK_FIELDS = ('id', 'title', 'description', 'status', 'created_at', 'updated_at', 'version')
+
+
+def format_datetime(value):
+    """Mesmo formato de strftime('%d/%m/%Y %H:%M'), sem o custo do strftime"""
+    if value is None:
+        return None
+    return '%02d/%02d/%d %02d:%02d' % (value.day, value.month, value.year, value.hour, value.minute)
+
+
+FORMATTERS = {
+    'created_at': format_datetime,
+    'updated_at': format_datetime,
+}
+
+
+class InvalidFields(ValueError):
+    """Campo pedido em ?fields= não existe na tarefa"""
+
+
+def select_fields(raw):
+    """Converte o parâmetro ?fields=id,title em uma tupla validada de campos"""
+    if not raw:
+        return TASK_FIELDS
+    fields = tuple(dict.fromkeys(field.strip() for field in raw.split(',') if field.strip()))
+    invalid = [field for field in fields if field not in TASK_FIELDS]
+    if invalid or not fields:
+        raise InvalidFields(f'Campos inválidos: {", ".join(invalid)}')
+    return fields
+
+
+def serialize_rows(rows, fields=TASK_FIELDS):
+    """Serializa linhas de values() (dicts) mantendo apenas os campos pedidos"""
+    plain = [field for field in fields if field not in FORMATTERS]
+    formatted = [(field, FORMATTERS[field]) for field in fields if field in FORMATTERS]
+    result = []
+    for row in rows:
+        item = {field: row[field] for field in plain}
+        for field, formatter in formatted:
+            item[field] = formatter(row[field])
+        result.append(item)
+    return result
+
+
+def serialize_task(task, fields=TASK_FIELDS):
+    """Serializa uma instância já carregada (ex.: logo após criar ou atualizar)"""
+    item = {}
+    for field in fields:
+        value = getattr(task, field)
+        formatter = FORMATTERS.get(field)
+        item[field] = formatter(value) if formatter else value
+    return item
+
+
+def dumps(data):
+    """Codifica em bytes com orjson quando disponível"""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, cls=DjangoJSONEncoder).encode()
+
+
+class FastJsonResponse(HttpResponse):
+    """JsonResponse equivalente que usa o codificador mais rápido disponível"""
+
+    def __init__(self, data, **kwargs):
+        kwargs.setdefault('content_type', 'application/json')
+        super().__init__(content=dumps(data), **kwargs)
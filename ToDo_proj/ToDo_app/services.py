@@ -0,0 +1,291 @@
+from functools import partial
+
+from django.contrib.auth import get_user_model
+from django.db import connections, transaction
+from django.db.models import F
+from django.db.models.sql import UpdateQuery
+from django.utils import timezone
+
+from . import stats
+from .cache import bump_user_version
+from .choices import Status
+from .events import get_event_broker
+from .models import ArchivedTask, Task
+from .search import get_search_backend
+from .serializers import TASK_FIELDS, serialize_rows, serialize_task
+
+
+class TaskNotFound(Exception):
+    """Tarefa não existe ou não pertence ao usuário"""
+
+
+class VersionConflict(Exception):
+    """A versão enviada pelo cliente não é mais a versão atual da tarefa"""
+
+    def __init__(self, current_version):
+        super().__init__('A tarefa foi alterada em outra aba ou dispositivo. Recarregue e tente novamente.')
+        self.current_version = current_version
+
+
+def record_changes(user_id, delta, indexed=(), removed=(), events=()):
+    """
+    Efeitos colaterais de toda escrita nas tarefas de um usuário: contadores,
+    versão de alterações, cache do dashboard, índice de busca e feed de
+    eventos.
+
+    Deve ser chamada dentro da transação da própria escrita; os eventos só
+    são publicados depois do commit.
+    """
+    stats.apply_delta(user_id, delta)
+    bump_user_version(user_id)
+    search_backend = get_search_backend()
+    search_backend.index_tasks(indexed)
+    search_backend.remove_tasks(removed)
+
+    events = list(events)
+    counters = {field: value for field, value in delta.items() if value}
+    if counters:
+        events.append(('stats', counters))
+    if events:
+        transaction.on_commit(partial(get_event_broker().publish, user_id, events))
+
+
+def create_task(user, form):
+    """Cria a tarefa a partir de um TaskForm válido"""
+    task = form.save(commit=False)
+    task.user = user
+    with transaction.atomic():
+        task.save()
+        record_changes(
+            user.pk,
+            stats.created_delta(task.status),
+            indexed=[task],
+            events=[('task.created', serialize_task(task))],
+        )
+    return task
+
+
+def update_task(user, task_id, changes, expected_version=None):
+    """
+    Aplica as alterações com um UPDATE condicional que toca só os campos
+    enviados:
+
+        UPDATE ... SET <campos>, version = version + 1
+        WHERE id = ? AND user_id = ? [AND version = ?]
+
+    Quando o status muda, o status anterior (necessário para os contadores)
+    é descoberto pelo próprio UPDATE, guardado também por status: a primeira
+    tentativa que afetar a linha indica de qual status a tarefa saiu. Não há
+    SELECT prévio; a tarefa só é lida de novo quando o banco não suporta
+    UPDATE ... RETURNING.
+
+    Retorna a tarefa atualizada como dict. Levanta TaskNotFound ou
+    VersionConflict quando nenhuma linha é afetada.
+    """
+    queryset = Task.objects.filter(id=task_id, user_id=user.pk)
+    if expected_version is not None:
+        queryset = queryset.filter(version=expected_version)
+    values = {**changes, 'version': F('version') + 1, 'updated_at': timezone.now()}
+
+    with transaction.atomic():
+        new_status = changes.get('status')
+        if new_status is None:
+            row, old_status = _update_returning(queryset, values, task_id), None
+        else:
+            # Primeiro o caso sem troca de status (toda edição pelo dashboard
+            # reenvia o status atual), depois as transições
+            row = None
+            for old_status in [new_status, *(status for status in Status.values if status != new_status)]:
+                row = _update_returning(queryset.filter(status=old_status), values, task_id)
+                if row is not None:
+                    break
+
+        if row is None:
+            current = Task.objects.filter(id=task_id, user_id=user.pk).values_list('version', flat=True).first()
+            if current is None:
+                raise TaskNotFound()
+            raise VersionConflict(current)
+
+        delta = stats.status_change_delta(old_status, new_status) if new_status else {}
+        indexed = []
+        if 'title' in changes or 'description' in changes:
+            indexed = [Task(id=row['id'], user_id=user.pk, title=row['title'], description=row['description'])]
+        completed = new_status == Status.COMPLETED and old_status != Status.COMPLETED
+        event = ('task.completed' if completed else 'task.updated', serialize_rows([row])[0])
+        record_changes(user.pk, delta, indexed=indexed, events=[event])
+    return row
+
+
+def complete_task(user, task_id, expected_version=None):
+    """Marca a tarefa como concluída pelo mesmo caminho de escrita condicional"""
+    return update_task(user, task_id, {'status': Status.COMPLETED}, expected_version)
+
+
+def conditional_update(user_id, task_id, changes, expected_version, expected_status):
+    """
+    Só o UPDATE condicional de update_task, sem os efeitos colaterais:
+
+        UPDATE ... SET <campos>, version = version + 1
+        WHERE id = ? AND user_id = ? AND version = ? AND status = ?
+
+    Retorna a linha atualizada ou None se a tarefa mudou. Para escritas em
+    lote, que chamam record_changes uma única vez no fim (TaskBulkView).
+    """
+    queryset = Task.objects.filter(id=task_id, user_id=user_id, version=expected_version, status=expected_status)
+    values = {**changes, 'version': F('version') + 1, 'updated_at': timezone.now()}
+    return _update_returning(queryset, values, task_id)
+
+
+def _update_returning(queryset, values, task_id):
+    """
+    Executa o UPDATE do queryset e devolve a linha atualizada (ou None se
+    nenhuma linha foi afetada) usando RETURNING quando o banco suporta.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor not in ('sqlite', 'postgresql') or not connection.features.can_return_columns_from_insert:
+        if not queryset.update(**values):
+            return None
+        return Task.objects.filter(id=task_id).values(*TASK_FIELDS).first()
+
+    query = queryset.query.chain(UpdateQuery)
+    query.add_update_values(values)
+    compiler = query.get_compiler(queryset.db)
+    compiler.pre_sql_setup()
+    sql, params = compiler.as_sql()
+
+    fields = [Task._meta.get_field(name) for name in TASK_FIELDS]
+    columns = [field.get_col(Task._meta.db_table) for field in fields]
+    returning = ', '.join(connection.ops.quote_name(field.column) for field in fields)
+    with connection.cursor() as cursor:
+        cursor.execute(f'{sql} RETURNING {returning}', params)
+        raw = cursor.fetchone()
+    if raw is None:
+        return None
+
+    # Mesmos conversores que o ORM aplicaria (ex.: datas do SQLite)
+    select_compiler = Task.objects.none().query.get_compiler(queryset.db)
+    converters = select_compiler.get_converters(columns)
+    row = next(iter(select_compiler.apply_converters([raw], converters)))
+    return dict(zip(TASK_FIELDS, row))
+
+
+def delete_task(task):
+    """
+    Exclui a tarefa marcando deleted_at; a linha é apagada depois pelo
+    comando purge_deleted. O UPDATE é condicional para que duas exclusões
+    simultâneas não descontem a tarefa duas vezes dos contadores, e também
+    guardado por status, como em update_task: a tentativa que afetar a linha
+    indica de qual status descontar, mesmo que a tarefa tenha mudado depois
+    de carregada.
+    """
+    task_id = task.id
+    now = timezone.now()
+    queryset = Task.objects.filter(id=task_id)
+    with transaction.atomic():
+        # O status carregado primeiro; os demais só se ele mudou nesse meio-tempo
+        for status in [task.status, *(status for status in Status.values if status != task.status)]:
+            if queryset.filter(status=status).update(deleted_at=now):
+                break
+        else:
+            return
+        record_changes(
+            task.user_id,
+            stats.deleted_delta(status),
+            removed=[task_id],
+            events=[('task.deleted', {'id': task_id})],
+        )
+
+
+def purge_tasks(queryset, chunk_size=500, on_progress=None):
+    """
+    Apaga de vez as tarefas do queryset (de Task.all_objects ou de
+    ArchivedTask) em blocos de
+    chunk_size, cada um na sua transação, removendo também as entradas do
+    índice de busca. on_progress(apagadas, total) é chamado a cada bloco.
+    """
+    model = queryset.model
+    total = queryset.count()
+    done = 0
+    search_backend = get_search_backend()
+    while done < total:
+        with transaction.atomic():
+            ids = list(queryset.order_by('pk').values_list('pk', flat=True)[:chunk_size])
+            if not ids:
+                break
+            if model is Task:
+                search_backend.remove_tasks(ids)
+            # Sem dependentes: o DELETE sai direto, sem carregar as linhas
+            model._base_manager.filter(pk__in=ids).delete()
+        done += len(ids)
+        if on_progress is not None:
+            on_progress(done, total)
+    return done
+
+
+def purge_account(user_id, chunk_size=500, on_progress=None):
+    """
+    Apaga de vez uma conta excluída (deleted_at preenchido) e as tarefas dela.
+    A conta é a última a sair, então uma execução interrompida retoma pelo
+    mesmo usuário. Retorna o número de tarefas apagadas.
+    """
+    User = get_user_model()
+    if not User.all_objects.filter(pk=user_id, deleted_at__isnull=False).exists():
+        return 0
+    purged = purge_tasks(Task.all_objects.filter(user_id=user_id), chunk_size, on_progress)
+    purged += purge_tasks(ArchivedTask.objects.filter(user_id=user_id), chunk_size, on_progress)
+    # Sem tarefas, o cascade restante (endereço, contadores, permissões) é pequeno
+    with transaction.atomic():
+        User.all_objects.filter(pk=user_id, deleted_at__isnull=False).delete()
+    return purged
+
+
+class _BatchChanged(Exception):
+    """Uma tarefa do lote foi alterada durante o arquivamento"""
+
+
+ARCHIVE_COLUMNS = ('id', 'user_id', 'title', 'description', 'status', 'created_at', 'updated_at', 'version')
+
+
+def archive_completed(cutoff, batch_size=1000, on_progress=None):
+    """
+    Move para ArchivedTask as tarefas concluídas sem alteração desde cutoff,
+    em lotes de batch_size, cada um na sua transação: copia as linhas,
+    apaga da tabela Task, remove do índice de busca e passa as tarefas de
+    completed/total para archived nos contadores de cada usuário.
+
+    O DELETE repete as condições da seleção; se uma tarefa do lote foi
+    alterada nesse meio-tempo, o lote é desfeito e selecionado de novo.
+    on_progress(arquivadas, total) é chamado a cada lote.
+    """
+    candidates = Task.objects.filter(status=Status.COMPLETED, updated_at__lt=cutoff)
+    total = candidates.count()
+    done = 0
+    while True:
+        try:
+            with transaction.atomic():
+                rows = list(candidates.order_by('updated_at', 'id').values(*ARCHIVE_COLUMNS)[:batch_size])
+                if not rows:
+                    break
+                ids = [row['id'] for row in rows]
+                now = timezone.now()
+                ArchivedTask.objects.bulk_create([ArchivedTask(archived_at=now, **row) for row in rows])
+                deleted, _ = candidates.filter(pk__in=ids).delete()
+                if deleted != len(rows):
+                    raise _BatchChanged()
+
+                by_user = {}
+                for row in rows:
+                    by_user.setdefault(row['user_id'], []).append(row['id'])
+                for user_id, task_ids in by_user.items():
+                    record_changes(
+                        user_id,
+                        stats.archived_delta(len(task_ids)),
+                        removed=task_ids,
+                        events=[('task.archived', {'id': task_id}) for task_id in task_ids],
+                    )
+        except _BatchChanged:
+            continue
+        done += len(rows)
+        if on_progress is not None:
+            on_progress(done, total)
+    return done
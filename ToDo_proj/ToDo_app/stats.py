@@ -0,0 +1,142 @@
+from collections import Counter
+
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from .choices import Status
+from .models import ArchivedTask, Task, TaskStats
+
+
+STATUS_FIELDS = {
+    Status.PENDING: 'pending',
+    Status.IN_PROGRESS: 'in_progress',
+    Status.COMPLETED: 'completed',
+}
+
+COUNTER_FIELDS = ('total', 'pending', 'in_progress', 'completed')
+SNAPSHOT_FIELDS = (*COUNTER_FIELDS, 'archived', 'version', 'changed_at')
+
+
+def created_delta(status):
+    """Variação dos contadores ao criar uma tarefa com o status informado"""
+    return Counter({'total': 1, STATUS_FIELDS[status]: 1})
+
+
+def deleted_delta(status):
+    """Variação dos contadores ao remover uma tarefa com o status informado"""
+    return Counter({'total': -1, STATUS_FIELDS[status]: -1})
+
+
+def status_change_delta(old_status, new_status):
+    """Variação dos contadores quando uma tarefa muda de status"""
+    delta = Counter()
+    if old_status != new_status:
+        delta[STATUS_FIELDS[old_status]] -= 1
+        delta[STATUS_FIELDS[new_status]] += 1
+    return delta
+
+
+def stats_aggregate():
+    return {
+        'total': Count('id'),
+        'pending': Count('id', filter=Q(status=Status.PENDING)),
+        'in_progress': Count('id', filter=Q(status=Status.IN_PROGRESS)),
+        'completed': Count('id', filter=Q(status=Status.COMPLETED)),
+    }
+
+
+def archived_delta(count):
+    """Variação dos contadores ao arquivar tarefas concluídas"""
+    return Counter({'total': -count, 'completed': -count, 'archived': count})
+
+
+def public_counts(snapshot, include_archived=False):
+    """
+    Contadores expostos pelas APIs. As arquivadas (todas concluídas) só
+    entram em total e completed quando o cliente pede.
+    """
+    counts = {field: snapshot[field] for field in COUNTER_FIELDS}
+    if include_archived:
+        archived = snapshot.get('archived', 0)
+        counts['total'] += archived
+        counts['completed'] += archived
+    return counts
+
+
+def apply_delta(user_id, delta):
+    """
+    Aplica a variação nos contadores do usuário e incrementa sua versão de
+    alterações com um único UPDATE.
+
+    Deve ser chamada dentro da mesma transação de toda escrita na tabela de
+    tarefas, mesmo quando a variação é vazia (ex.: edição sem troca de
+    status), pois a versão é o validador usado pelas respostas condicionais.
+    Se o usuário ainda não tem linha de contadores ela é reconstruída a
+    partir das tarefas, já incluindo a escrita atual.
+    """
+    changes = {field: F(field) + value for field, value in delta.items() if value}
+    updated = TaskStats.objects.filter(user_id=user_id).update(
+        version=F('version') + 1,
+        changed_at=timezone.now(),
+        **changes
+    )
+    if not updated:
+        rebuild_user_stats(user_id)
+
+
+def rebuild_user_stats(user_id):
+    """Recalcula os contadores de um usuário a partir da tabela de tarefas"""
+    counts = Task.objects.filter(user_id=user_id).aggregate(**stats_aggregate())
+    archived = ArchivedTask.objects.filter(user_id=user_id).count()
+    TaskStats.objects.update_or_create(
+        user_id=user_id, defaults={**counts, 'archived': archived, 'changed_at': timezone.now()}
+    )
+    return counts
+
+
+def create_user_stats(sender, instance, created, raw=False, **kwargs):
+    """
+    Receiver de post_save do usuário: cria a linha de contadores (zerada)
+    junto com a conta, para que as leituras não precisem reconstruí-la
+    """
+    if created and not raw:
+        TaskStats.objects.get_or_create(user_id=instance.pk)
+
+
+def get_user_version(user_id):
+    """Versão de alterações e data da última escrita nas tarefas do usuário"""
+    row = TaskStats.objects.filter(user_id=user_id).values_list('version', 'changed_at').first()
+    if row is None:
+        rebuild_user_stats(user_id)
+        row = TaskStats.objects.filter(user_id=user_id).values_list('version', 'changed_at').first()
+    return row
+
+
+def get_user_snapshot(user_id):
+    """Contadores junto com a versão de alterações, em uma única leitura"""
+    snapshot = TaskStats.objects.filter(user_id=user_id).values(*SNAPSHOT_FIELDS).first()
+    if snapshot is None:
+        rebuild_user_stats(user_id)
+        snapshot = TaskStats.objects.filter(user_id=user_id).values(*SNAPSHOT_FIELDS).first()
+    return snapshot
+
+
+def get_user_stats(user_id):
+    """Leitura O(1) dos contadores do usuário"""
+    counts = TaskStats.objects.filter(user_id=user_id).values(*COUNTER_FIELDS).first()
+    if counts is None:
+        counts = rebuild_user_stats(user_id)
+    return counts
+
+
+async def aget_user_snapshot(user_id):
+    """Versão assíncrona de get_user_snapshot, para as views async"""
+    snapshot = await TaskStats.objects.filter(user_id=user_id).values(*SNAPSHOT_FIELDS).afirst()
+    if snapshot is None:
+        counts = await Task.objects.filter(user_id=user_id).aaggregate(**stats_aggregate())
+        archived = await ArchivedTask.objects.filter(user_id=user_id).acount()
+        await TaskStats.objects.aupdate_or_create(
+            user_id=user_id, defaults={**counts, 'archived': archived, 'changed_at': timezone.now()}
+        )
+        snapshot = await TaskStats.objects.filter(user_id=user_id).values(*SNAPSHOT_FIELDS).afirst()
+    return snapshot
@@ -1,3 +1,1415 @@
-from django.test import TestCase
+import asyncio
+import csv
+import json
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from io import StringIO
+from unittest import mock, skipIf, skipUnless
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.http import http_date
+from django.urls import reverse
+
+from . import events, jobs, metrics, services, stats
+from .cache import UserCache, bump_user_version, get_user_token
+from .events import LocalEventBroker
+from .search import FTS_TABLE
+from .choices import JobStatus, Status
+from .models import ArchivedTask, Job, Task, TaskStats
+from .pagination import CursorPaginator
+
+
+User = get_user_model()
+
+
+class TaskIndexQueryPlanTests(TestCase):
+    """Garante que as consultas quentes do dashboard usam os índices compostos de Task"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='plano@teste.com', email='plano@teste.com', password='Senha@123')
+        other = User.objects.create_user(username='outro@teste.com', email='outro@teste.com', password='Senha@123')
+        statuses = [Status.PENDING, Status.IN_PROGRESS, Status.COMPLETED]
+        Task.objects.bulk_create(
+            [Task(user=cls.user, title=f'Tarefa {i}', status=statuses[i % 3]) for i in range(30)]
+            + [Task(user=other, title=f'Outra {i}', status=statuses[i % 3]) for i in range(30)]
+        )
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(index_name, plan)
+        if connection.vendor == 'sqlite':
+            # Ordenação resolvida pelo índice, sem ordenar em memória
+            self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_dashboard_status_filter_uses_status_index(self):
+        queryset = Task.objects.filter(user=self.user, status=Status.PENDING).order_by('-created_at')
+        self.assertUsesIndex(queryset, 'task_user_status_created_idx')
+
+    def test_dashboard_listing_uses_created_index(self):
+        queryset = Task.objects.filter(user=self.user).order_by('-created_at')
+        self.assertUsesIndex(queryset, 'task_user_created_idx')
+
+    def test_month_histogram_uses_created_index(self):
+        queryset = Task.objects.filter(user=self.user).values_list('created_at', flat=True).order_by('-created_at')
+        self.assertUsesIndex(queryset, 'task_user_created_idx')
+
+
+class StatsAssertionsMixin:
+    """Compara os contadores mantidos incrementalmente com os de rebuild_user_stats"""
+
+    def assertStatsConsistent(self, user):
+        fields = (*stats.COUNTER_FIELDS, 'archived')
+        maintained = TaskStats.objects.filter(user=user).values(*fields).get()
+        stats.rebuild_user_stats(user.pk)
+        self.assertEqual(maintained, TaskStats.objects.filter(user=user).values(*fields).get())
+
+
+class TaskBulkViewTests(StatsAssertionsMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='lote@teste.com', email='lote@teste.com', password='Senha@123')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        self.tasks = [
+            Task.objects.create(user=self.user, title=f'Tarefa {i}', status=Status.PENDING) for i in range(4)
+        ]
+        stats.rebuild_user_stats(self.user.pk)
+
+    def bulk(self, *operations):
+        response = self.client.post(
+            reverse('tasks:bulk_tasks'), json.dumps({'operations': list(operations)}), content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.json()['results']
+
+    def test_mixed_batch_keeps_counters(self):
+        first, second, third, _ = self.tasks
+        results = self.bulk(
+            {'op': 'create', 'data': {'title': 'Nova', 'description': '', 'status': Status.IN_PROGRESS}},
+            {'op': 'update', 'id': first.id, 'data': {'title': 'Editada', 'description': '', 'status': Status.IN_PROGRESS}},
+            {'op': 'complete', 'id': second.id},
+            {'op': 'delete', 'id': third.id},
+        )
+        self.assertTrue(all(result['success'] for result in results))
+        self.assertFalse(Task.objects.filter(id=third.id).exists())
+        self.assertTrue(Task.all_objects.filter(id=third.id, deleted_at__isnull=False).exists())
+        self.assertStatsConsistent(self.user)
+
+    def test_boolean_id_is_not_task_one(self):
+        results = self.bulk({'op': 'delete', 'id': True})
+        self.assertEqual(results[0]['error'], 'Tarefa não encontrada')
+        self.assertEqual(Task.objects.filter(user=self.user).count(), 4)
+
+    def test_stale_version_is_reported_and_not_counted(self):
+        task = self.tasks[0]
+        results = self.bulk({'op': 'complete', 'id': task.id, 'version': task.version + 1})
+        self.assertFalse(results[0]['success'])
+        self.assertEqual(results[0]['current_version'], task.version)
+        self.assertEqual(Task.objects.get(id=task.id).status, Status.PENDING)
+        self.assertStatsConsistent(self.user)
+
+    def test_invalid_version_fails_only_its_item(self):
+        first, second = self.tasks[:2]
+        results = self.bulk(
+            {'op': 'complete', 'id': first.id, 'version': 'abc'},
+            {'op': 'delete', 'id': first.id, 'version': True},
+            {'op': 'complete', 'id': second.id, 'version': second.version},
+        )
+        self.assertEqual([result['success'] for result in results], [False, False, True])
+        self.assertEqual(results[0]['error'], 'Versão inválida')
+        self.assertEqual(Task.objects.get(id=first.id).status, Status.PENDING)
+        self.assertStatsConsistent(self.user)
+
+    def test_non_object_data_fails_only_its_item(self):
+        task = self.tasks[0]
+        results = self.bulk(
+            {'op': 'create', 'data': ['Nova']},
+            {'op': 'update', 'id': task.id, 'data': 'Editada'},
+            {'op': 'create', 'data': {'title': 'Nova', 'description': '', 'status': Status.PENDING}},
+        )
+        self.assertEqual([result['success'] for result in results], [False, False, True])
+        self.assertEqual(results[1]['error'], 'Dados inválidos')
+        self.assertEqual(Task.objects.get(id=task.id).title, 'Tarefa 0')
+        self.assertStatsConsistent(self.user)
+
+    def test_task_already_deleted_is_not_counted_again(self):
+        task = self.tasks[0]
+        self.bulk({'op': 'delete', 'id': task.id})
+        results = self.bulk({'op': 'delete', 'id': task.id})
+        self.assertEqual(results[0]['error'], 'Tarefa não encontrada')
+        self.assertStatsConsistent(self.user)
+
+    def test_same_task_twice_in_one_batch(self):
+        task = self.tasks[0]
+        results = self.bulk({'op': 'complete', 'id': task.id}, {'op': 'delete', 'id': task.id})
+        self.assertTrue(results[0]['success'])
+        self.assertFalse(results[1]['success'])
+        self.assertStatsConsistent(self.user)
+
+    def test_update_with_stale_version_does_not_overwrite(self):
+        task = self.tasks[0]
+        # Outra aba salvou antes
+        self.client.post(
+            reverse('tasks:update_task', args=[task.id]),
+            json.dumps({'title': 'De outra aba', 'version': task.version}), content_type='application/json',
+        )
+        results = self.bulk({
+            'op': 'update', 'id': task.id, 'version': task.version,
+            'data': {'title': 'Do lote', 'description': '', 'status': Status.COMPLETED},
+        })
+        self.assertFalse(results[0]['success'])
+        self.assertEqual(results[0]['current_version'], task.version + 1)
+        current = Task.objects.get(id=task.id)
+        self.assertEqual((current.title, current.status), ('De outra aba', Status.PENDING))
+        self.assertStatsConsistent(self.user)
+
+    def test_update_and_complete_bump_version(self):
+        first, second = self.tasks[:2]
+        results = self.bulk(
+            {'op': 'update', 'id': first.id, 'version': first.version,
+             'data': {'title': 'Editada', 'description': 'x', 'status': Status.COMPLETED}},
+            {'op': 'complete', 'id': second.id, 'version': second.version},
+        )
+        self.assertEqual([result['task']['version'] for result in results], [first.version + 1, second.version + 1])
+        self.assertEqual(Task.objects.get(id=first.id).title, 'Editada')
+        self.assertStatsConsistent(self.user)
+
+
+class SoftDeleteTests(StatsAssertionsMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='exclusao@teste.com', email='exclusao@teste.com', password='Senha@123')
+
+    def setUp(self):
+        self.tasks = Task.objects.bulk_create(
+            [Task(user=self.user, title=f'Tarefa {i}', status=Status.PENDING) for i in range(7)]
+        )
+        stats.rebuild_user_stats(self.user.pk)
+
+    def test_deleted_task_only_visible_through_all_objects(self):
+        task = self.tasks[0]
+        services.delete_task(task)
+        self.assertFalse(Task.objects.filter(id=task.id).exists())
+        self.assertIsNotNone(Task.all_objects.get(id=task.id).deleted_at)
+        self.assertStatsConsistent(self.user)
+
+    def test_double_delete_is_counted_once(self):
+        task = self.tasks[0]
+        services.delete_task(task)
+        services.delete_task(task)
+        self.assertStatsConsistent(self.user)
+
+    def test_delete_after_status_changed_elsewhere(self):
+        # Instância carregada como pendente; a tarefa foi concluída antes da exclusão
+        task = Task.objects.get(id=self.tasks[0].id)
+        services.complete_task(self.user, task.id)
+        services.delete_task(task)
+        self.assertFalse(Task.objects.filter(id=task.id).exists())
+        self.assertStatsConsistent(self.user)
+
+    def test_soft_deleted_account_is_hidden_and_releases_username(self):
+        self.user.soft_delete()
+        self.assertFalse(User.objects.filter(pk=self.user.pk).exists())
+        account = User.all_objects.get(pk=self.user.pk)
+        self.assertFalse(account.is_active)
+        self.assertNotEqual(account.username, 'exclusao@teste.com')
+        User.objects.create_user(username='exclusao@teste.com', email='exclusao@teste.com', password='Senha@123')
+
+    def test_purge_deleted_removes_tasks_in_chunks(self):
+        for task in self.tasks[:5]:
+            services.delete_task(task)
+        output = StringIO()
+        call_command('purge_deleted', chunk_size=2, stdout=output)
+        self.assertEqual(Task.all_objects.filter(user=self.user).count(), 2)
+        self.assertIn('Tarefas excluídas: 5/5', output.getvalue())
+        self.assertStatsConsistent(self.user)
+
+    def test_purge_deleted_respects_older_than(self):
+        services.delete_task(self.tasks[0])
+        call_command('purge_deleted', older_than=60, stdout=StringIO())
+        self.assertTrue(Task.all_objects.filter(id=self.tasks[0].id).exists())
+
+    def test_purge_account_removes_account_and_tasks(self):
+        ArchivedTask.objects.create(id=10_000, user=self.user, title='Arquivada', status=Status.COMPLETED,
+                                    created_at=self.tasks[0].created_at, updated_at=self.tasks[0].updated_at)
+        self.user.soft_delete()
+        purged = services.purge_account(self.user.pk, chunk_size=3)
+        self.assertEqual(purged, 8)
+        self.assertFalse(User.all_objects.filter(pk=self.user.pk).exists())
+        self.assertFalse(Task.all_objects.filter(user_id=self.user.pk).exists())
+        self.assertFalse(ArchivedTask.objects.filter(user_id=self.user.pk).exists())
+
+    def test_purge_account_ignores_active_accounts(self):
+        self.assertEqual(services.purge_account(self.user.pk), 0)
+        self.assertTrue(User.objects.filter(pk=self.user.pk).exists())
+
+
+class TaskStatsMaintenanceTests(StatsAssertionsMixin, TestCase):
+    """Os contadores de TaskStats acompanham cada caminho de escrita nas tarefas"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='contadores@teste.com', email='contadores@teste.com', password='Senha@123')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        stats.rebuild_user_stats(self.user.pk)
+
+    def post_json(self, name, data, *args):
+        return self.client.post(reverse(name, args=args), json.dumps(data), content_type='application/json')
+
+    def create(self, status=Status.PENDING):
+        response = self.post_json('tasks:create_task', {'title': 'Tarefa', 'description': '', 'status': status})
+        self.assertEqual(response.status_code, 200)
+        return Task.objects.filter(user=self.user).latest('id')
+
+    def test_create(self):
+        self.create()
+        self.create(Status.IN_PROGRESS)
+        self.assertStatsConsistent(self.user)
+        self.assertEqual(stats.get_user_stats(self.user.pk)['total'], 2)
+
+    def test_update_changing_status(self):
+        task = self.create()
+        response = self.post_json('tasks:update_task', {'status': Status.IN_PROGRESS}, task.id)
+        self.assertEqual(response.status_code, 200)
+        self.assertStatsConsistent(self.user)
+
+    def test_update_without_status(self):
+        task = self.create(Status.IN_PROGRESS)
+        self.post_json('tasks:update_task', {'title': 'Outro título'}, task.id)
+        self.assertStatsConsistent(self.user)
+
+    def test_complete_twice(self):
+        task = self.create()
+        self.post_json('tasks:complete_task', {}, task.id)
+        self.post_json('tasks:complete_task', {}, task.id)
+        self.assertStatsConsistent(self.user)
+        self.assertEqual(stats.get_user_stats(self.user.pk)['completed'], 1)
+
+    def test_delete(self):
+        task = self.create(Status.IN_PROGRESS)
+        self.assertEqual(self.client.delete(reverse('tasks:delete_task', args=[task.id])).status_code, 200)
+        self.assertStatsConsistent(self.user)
+
+    def test_bulk(self):
+        tasks = [self.create() for _ in range(3)]
+        self.post_json('tasks:bulk_tasks', {'operations': [
+            {'op': 'create', 'data': {'title': 'Nova', 'description': '', 'status': Status.COMPLETED}},
+            {'op': 'complete', 'id': tasks[0].id},
+            {'op': 'delete', 'id': tasks[1].id},
+            {'op': 'update', 'id': tasks[2].id, 'data': {'title': 'Editada', 'description': '', 'status': Status.IN_PROGRESS}},
+        ]})
+        self.assertStatsConsistent(self.user)
+
+    def test_archive(self):
+        tasks = [self.create(Status.COMPLETED) for _ in range(3)]
+        self.create()
+        Task.objects.filter(id__in=[task.id for task in tasks[:2]]).update(
+            updated_at=timezone.now() - timedelta(days=400)
+        )
+        self.assertEqual(services.archive_completed(timezone.now() - timedelta(days=180)), 2)
+        self.assertStatsConsistent(self.user)
+        self.assertEqual(stats.get_user_snapshot(self.user.pk)['archived'], 2)
+
+    def test_purge(self):
+        tasks = [self.create() for _ in range(4)]
+        for task in tasks[:3]:
+            services.delete_task(task)
+        call_command('purge_deleted', chunk_size=2, stdout=StringIO())
+        self.assertStatsConsistent(self.user)
+        self.assertEqual(stats.get_user_stats(self.user.pk)['total'], 1)
+
+
+class CursorPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='cursor@teste.com', email='cursor@teste.com', password='Senha@123')
+        Task.objects.bulk_create([Task(user=cls.user, title=f'Tarefa {i}') for i in range(10)])
+        # Metade das tarefas com o mesmo created_at: o id desempata
+        tied = timezone.now() - timedelta(hours=1)
+        ids = list(Task.objects.filter(user=cls.user).order_by('id').values_list('id', flat=True))
+        Task.objects.filter(id__in=ids[2:7]).update(created_at=tied)
+        cls.expected = list(
+            Task.objects.filter(user=cls.user).order_by('-created_at', '-id').values_list('id', flat=True)
+        )
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def list_page(self, **params):
+        response = self.client.get(reverse('tasks:list_tasks'), {'page_size': 3, 'fields': 'id', **params})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_pages_follow_created_at_then_id(self):
+        seen, cursor = [], None
+        while True:
+            page = self.list_page(**({'cursor': cursor} if cursor else {}))
+            seen.extend(task['id'] for task in page['tasks'])
+            cursor = page['next_cursor']
+            if cursor is None:
+                break
+        self.assertEqual(seen, self.expected)
+
+    def test_last_page_has_no_next_cursor(self):
+        paginator = CursorPaginator(Task.objects.filter(user=self.user), 5)
+        first = paginator.page()
+        last = paginator.page(first.next_cursor)
+        self.assertEqual([task.id for task in last], self.expected[5:])
+        self.assertIsNone(last.next_cursor)
+        self.assertFalse(last.has_next())
+        self.assertIsNotNone(last.previous_cursor)
+
+    def test_previous_cursor_returns_previous_page(self):
+        first = self.list_page()
+        second = self.list_page(cursor=first['next_cursor'])
+        back = self.list_page(cursor=second['previous_cursor'])
+        self.assertEqual(back['tasks'], first['tasks'])
+
+    def test_malformed_cursor(self):
+        response = self.client.get(reverse('tasks:list_tasks'), {'cursor': 'nao-e-um-cursor'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(reverse('tasks:dashboard'), {'pagination': 'cursor', 'cursor': 'nao-e-um-cursor'})
+        self.assertEqual(response.status_code, 404)
+
+
+class JobQueueTests(TestCase):
+    """Reserva, novas tentativas com backoff e o worker run_jobs"""
+
+    def setUp(self):
+        self.handler = mock.Mock()
+        registry = mock.patch.dict(jobs._registry, {'teste': self.handler})
+        registry.start()
+        self.addCleanup(registry.stop)
+
+    def test_claim_reserves_each_job_once(self):
+        first, second = jobs.enqueue('teste'), jobs.enqueue('teste')
+        claimed = jobs.claim('worker-1')
+        self.assertEqual(claimed.pk, first.pk)
+        self.assertEqual((claimed.status, claimed.locked_by, claimed.attempts), (JobStatus.RUNNING, 'worker-1', 1))
+        self.assertEqual(jobs.claim('worker-2').pk, second.pk)
+        self.assertIsNone(jobs.claim('worker-3'))
+
+    def test_claim_skips_future_jobs(self):
+        jobs.enqueue('teste', run_at=timezone.now() + timedelta(minutes=5))
+        self.assertIsNone(jobs.claim('worker-1'))
+
+    @skipIf(connection.features.has_select_for_update_skip_locked, 'compare-and-set só é usado sem SKIP LOCKED')
+    def test_claim_moves_on_when_another_worker_wins_the_race(self):
+        first, second = jobs.enqueue('teste'), jobs.enqueue('teste')
+        original = Job.objects.filter
+
+        def racing_filter(*args, **kwargs):
+            # Outro worker reserva o primeiro job entre a leitura dos candidatos e o UPDATE
+            if kwargs.get('pk') == first.pk and kwargs.get('status') == JobStatus.PENDING:
+                original(pk=first.pk).update(status=JobStatus.RUNNING, locked_by='worker-2')
+            return original(*args, **kwargs)
+
+        with mock.patch.object(Job.objects, 'filter', side_effect=racing_filter):
+            claimed = jobs.claim('worker-1')
+        self.assertEqual(claimed.pk, second.pk)
+        first.refresh_from_db()
+        self.assertEqual((first.locked_by, first.attempts), ('worker-2', 0))
+
+    def test_failure_is_retried_with_backoff(self):
+        self.handler.side_effect = RuntimeError('falha temporária')
+        job = jobs.enqueue('teste', {'valor': 1}, max_attempts=3)
+        before = timezone.now()
+        with self.assertLogs('ToDo_app.jobs', 'WARNING'):
+            self.assertFalse(jobs.run_job(jobs.claim('worker-1')))
+        job.refresh_from_db()
+        self.handler.assert_called_once_with(valor=1)
+        self.assertEqual((job.status, job.attempts, job.locked_by), (JobStatus.PENDING, 1, ''))
+        self.assertIn('falha temporária', job.last_error)
+        delay = job.run_at - before
+        self.assertGreaterEqual(delay, timedelta(seconds=jobs.RETRY_BASE_SECONDS))
+        self.assertLessEqual(delay, timedelta(seconds=jobs.RETRY_BASE_SECONDS * 1.25 + 1))
+        # Antes do prazo o job não volta a ser reservado
+        self.assertIsNone(jobs.claim('worker-1'))
+
+    def test_retry_delay_doubles_up_to_the_limit(self):
+        with mock.patch('ToDo_app.jobs.random.uniform', return_value=1.0):
+            delays = [jobs.retry_delay(attempts).total_seconds() for attempts in (1, 2, 3, 20)]
+        self.assertEqual(delays, [10, 20, 40, jobs.RETRY_MAX_SECONDS])
+
+    def test_gives_up_after_max_attempts(self):
+        self.handler.side_effect = RuntimeError('falha permanente')
+        job = jobs.enqueue('teste', max_attempts=2)
+        for _ in range(2):
+            Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+            with self.assertLogs('ToDo_app.jobs', 'WARNING'):
+                self.assertFalse(jobs.run_job(jobs.claim('worker-1')))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (JobStatus.FAILED, 2))
+        self.assertIsNotNone(job.finished_at)
+        self.assertIsNone(jobs.claim('worker-1'))
+
+    def test_unknown_job_fails_without_retry(self):
+        job = Job.objects.create(name='removido', max_attempts=5)
+        with self.assertLogs('ToDo_app.jobs', 'ERROR'):
+            self.assertFalse(jobs.run_job(jobs.claim('worker-1')))
+        job.refresh_from_db()
+        self.assertEqual(job.status, JobStatus.FAILED)
+
+    def test_run_jobs_once_drains_the_queue(self):
+        jobs.enqueue_many('teste', [{'valor': 1}, {'valor': 2}])
+        jobs.enqueue('teste', {'valor': 3}, run_at=timezone.now() + timedelta(hours=1))
+        out = StringIO()
+        # O comando instala handlers de SIGINT/SIGTERM; não mexe nos do processo de testes
+        with mock.patch('signal.signal'):
+            call_command('run_jobs', once=True, worker_id='teste', stdout=out)
+        self.assertEqual([c.kwargs for c in self.handler.call_args_list], [{'valor': 1}, {'valor': 2}])
+        self.assertEqual(Job.objects.filter(status=JobStatus.DONE).count(), 2)
+        self.assertEqual(Job.objects.filter(status=JobStatus.PENDING).count(), 1)
+        self.assertIn('2 jobs executados, 0 com falha', out.getvalue())
+
+
+class ConditionalResponseTests(TestCase):
+    """ETag como único validador das APIs de leitura"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='etag@teste.com', email='etag@teste.com', password='Senha@123')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        response = self.client.post(
+            reverse('tasks:create_task'), json.dumps({'title': 'Tarefa', 'status': Status.PENDING}),
+            content_type='application/json',
+        )
+        self.task_id = response.json()['task']['id']
+        self.urls = [
+            reverse('tasks:get_task', args=[self.task_id]),
+            reverse('tasks:task_stats'),
+            reverse('tasks:tasks_by_month'),
+            reverse('tasks:async_task_stats'),
+        ]
+
+    def write(self):
+        self.client.post(
+            reverse('tasks:update_task', args=[self.task_id]),
+            json.dumps({'title': f'Tarefa {time.perf_counter_ns()}', 'status': Status.IN_PROGRESS}),
+            content_type='application/json',
+        )
+
+    def test_matching_etag_returns_304(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                first = self.client.get(url)
+                self.assertEqual(first.status_code, 200)
+                self.assertNotIn('Last-Modified', first.headers)
+                etag = first.headers['ETag']
+                second = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(second.status_code, 304)
+                self.assertEqual(second.headers['ETag'], etag)
+
+    def test_stale_etag_returns_200_after_write(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                etag = self.client.get(url).headers['ETag']
+                self.write()
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotEqual(response.headers['ETag'], etag)
+
+    def test_if_modified_since_alone_does_not_hide_a_write(self):
+        # Escrita no mesmo segundo da leitura: um validador de data responderia 304
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.client.get(url)
+                self.write()
+                response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=http_date(time.time() + 1))
+                self.assertEqual(response.status_code, 200)
+
+
+class TaskApiErrorTests(TestCase):
+    """Corpos inválidos viram 400 e erros inesperados um 500 genérico (o detalhe vai para o log)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='criar@teste.com', email='criar@teste.com', password='Senha@123')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def post(self, name, body):
+        return self.client.post(reverse(name), body, content_type='application/json')
+
+    def test_body_must_be_a_json_object(self):
+        for name in ('tasks:create_task', 'tasks:async_create_task'):
+            for body in ('[]', '"tarefa"', '1', 'null', '{'):
+                with self.subTest(view=name, body=body):
+                    response = self.post(name, body)
+                    self.assertEqual(response.status_code, 400)
+                    self.assertFalse(response.json()['success'])
+        self.assertFalse(Task.objects.filter(user=self.user).exists())
+
+    def test_internal_error_does_not_leak_details(self):
+        task = Task.objects.create(user=self.user, title='Tarefa')
+        body = json.dumps({'title': 'Tarefa', 'status': Status.PENDING})
+        requests = [
+            ('ToDo_app.services.create_task', 'post', reverse('tasks:create_task'), body),
+            ('ToDo_app.services.create_task', 'post', reverse('tasks:async_create_task'), body),
+            ('ToDo_app.services.update_task', 'post', reverse('tasks:update_task', args=[task.id]), body),
+            ('ToDo_app.services.update_task', 'post', reverse('tasks:async_update_task', args=[task.id]), body),
+            ('ToDo_app.services.complete_task', 'post', reverse('tasks:complete_task', args=[task.id]), '{}'),
+            ('ToDo_app.services.complete_task', 'post', reverse('tasks:async_complete_task', args=[task.id]), '{}'),
+            ('ToDo_app.services.delete_task', 'delete', reverse('tasks:delete_task', args=[task.id]), None),
+            ('ToDo_app.services.delete_task', 'delete', reverse('tasks:async_delete_task', args=[task.id]), None),
+            ('ToDo_app.services.record_changes', 'post', reverse('tasks:bulk_tasks'),
+             json.dumps({'operations': [{'op': 'complete', 'id': task.id}]})),
+            ('ToDo_app.views.get_search_backend', 'get', reverse('tasks:search_tasks') + '?q=tarefa', None),
+            ('ToDo_app.views.AllTasksDateView.get_months_payload', 'get', reverse('tasks:tasks_by_month'), None),
+        ]
+        for target, method, url, data in requests:
+            with self.subTest(url=url), \
+                    mock.patch(target, side_effect=RuntimeError('segredo do banco')), \
+                    self.assertLogs('ToDo_app', 'ERROR'):
+                if method == 'get':
+                    response = self.client.get(url)
+                else:
+                    response = getattr(self.client, method)(url, data, content_type='application/json')
+            self.assertEqual(response.status_code, 500)
+            self.assertEqual(response.json()['error'], 'Erro interno do servidor')
+
+    def test_delete_of_missing_task_returns_404(self):
+        other = User.objects.create_user(username='outro-criar@teste.com', email='outro-criar@teste.com', password='x')
+        task = Task.objects.create(user=other, title='Alheia')
+        for name in ('tasks:delete_task', 'tasks:async_delete_task'):
+            with self.subTest(view=name):
+                self.assertEqual(self.client.delete(reverse(name, args=[task.id])).status_code, 404)
+        self.assertTrue(Task.objects.filter(id=task.id).exists())
+
+    def test_creates_task(self):
+        response = self.post('tasks:create_task', json.dumps({'title': 'Tarefa', 'status': Status.PENDING}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['task']['title'], 'Tarefa')
+
+
+class BenchEndpointsTests(TestCase):
+    def test_refuses_users_not_created_by_seed_data(self):
+        user = User.objects.create_user(username='real@teste.com', email='real@teste.com', password='Senha@123')
+        Task.objects.create(user=user, title='Minha tarefa')
+        for options in ({}, {'user': user.pk}):
+            with self.subTest(options=options), self.assertRaises(CommandError):
+                call_command('bench_endpoints', requests=1, warmup=0, stdout=StringIO(), stderr=StringIO(), **options)
+        self.assertEqual(list(Task.objects.filter(user=user).values_list('title', flat=True)), ['Minha tarefa'])
+        self.assertEqual(User.all_objects.count(), 1)
+
+    @override_settings(ALLOWED_HOSTS=['localhost'])
+    def test_removes_the_throwaway_users_it_creates(self):
+        user = User.objects.create_user(username='seed-teste@example.com', email='seed-teste@example.com', password='x')
+        Task.objects.create(user=user, title='Tarefa')
+        call_command(
+            'bench_endpoints', requests=2, warmup=1, only=['admin_delete', 'admin_activate'],
+            stdout=StringIO(), stderr=StringIO(),
+        )
+        # Inclusive as contas excluídas pelo endpoint, renomeadas e escondidas do manager padrão
+        self.assertEqual(list(User.all_objects.values_list('pk', flat=True)), [user.pk])
+        self.assertFalse(Job.objects.filter(name='purge_account').exists())
+
+
+class OptimisticConcurrencyTests(StatsAssertionsMixin, TestCase):
+    """update e complete: UPDATE condicional pela versão, 409 quando a tarefa mudou"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='versao@teste.com', email='versao@teste.com', password='Senha@123')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        response = self.client.post(
+            reverse('tasks:create_task'), json.dumps({'title': 'Tarefa', 'status': Status.PENDING}),
+            content_type='application/json',
+        )
+        self.task = response.json()['task']
+
+    def post(self, name, data):
+        return self.client.post(reverse(name, args=[self.task['id']]), json.dumps(data), content_type='application/json')
+
+    def test_update_with_current_version(self):
+        response = self.post('tasks:update_task', {'title': 'Editada', 'version': self.task['version']})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['task']['version'], self.task['version'] + 1)
+
+    def test_update_with_stale_version_returns_409(self):
+        self.post('tasks:update_task', {'title': 'Primeira', 'version': self.task['version']})
+        response = self.post('tasks:update_task', {'title': 'Segunda', 'status': Status.IN_PROGRESS, 'version': self.task['version']})
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['current_version'], self.task['version'] + 1)
+        task = Task.objects.get(id=self.task['id'])
+        self.assertEqual((task.title, task.status), ('Primeira', Status.PENDING))
+        self.assertStatsConsistent(self.user)
+
+    def test_complete_with_stale_version_returns_409(self):
+        self.post('tasks:update_task', {'title': 'Editada'})
+        response = self.post('tasks:complete_task', {'version': self.task['version']})
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['current_version'], self.task['version'] + 1)
+        self.assertEqual(Task.objects.get(id=self.task['id']).status, Status.PENDING)
+        self.assertStatsConsistent(self.user)
+
+    def test_invalid_version_returns_400(self):
+        self.assertEqual(self.post('tasks:update_task', {'title': 'Editada', 'version': 'abc'}).status_code, 400)
+        self.assertEqual(self.post('tasks:complete_task', {'version': 0}).status_code, 400)
+
+    def test_edit_keeping_status_runs_a_single_update(self):
+        with CaptureQueriesContext(connection) as queries:
+            services.update_task(self.user, self.task['id'], {'title': 'Editada', 'status': Status.PENDING})
+        table = connection.ops.quote_name(Task._meta.db_table)
+        updates = [q['sql'] for q in queries if q['sql'].startswith(f'UPDATE {table} ')]
+        self.assertEqual(len(updates), 1)
+
+
+class TaskSearchTests(TestCase):
+    """Busca textual: índice em dia com as escritas, só as tarefas do usuário e entrada arbitrária"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='busca@teste.com', email='busca@teste.com', password='Senha@123')
+        cls.other = User.objects.create_user(username='outra-busca@teste.com', email='outra-busca@teste.com', password='Senha@123')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def create(self, title, description='', user=None):
+        if user is not None:
+            self.client.force_login(user)
+        response = self.client.post(
+            reverse('tasks:create_task'),
+            json.dumps({'title': title, 'description': description, 'status': Status.PENDING}),
+            content_type='application/json',
+        )
+        self.client.force_login(self.user)
+        return response.json()['task']['id']
+
+    def search(self, query, **params):
+        response = self.client.get(reverse('tasks:search_tasks'), {'q': query, 'fields': 'id', **params})
+        self.assertEqual(response.status_code, 200)
+        return [task['id'] for task in response.json()['tasks']]
+
+    @skipUnless(connection.vendor == 'sqlite', 'remove_diacritics é do tokenizer do FTS5')
+    def test_matching_ignores_accents_and_case(self):
+        task_id = self.create('Relatório de vendas')
+        self.assertEqual(self.search('relatorio'), [task_id])
+        self.assertEqual(self.search('RELATÓRIO'), [task_id])
+        self.assertEqual(self.search('relat'), [task_id])
+
+    def test_title_ranks_above_description(self):
+        in_description = self.create('Outra coisa', 'orçamento do projeto')
+        in_title = self.create('Orçamento anual')
+        self.assertEqual(self.search('orçamento'), [in_title, in_description])
+
+    def test_index_follows_updates(self):
+        task_id = self.create('Comprar pão')
+        self.client.post(reverse('tasks:update_task', args=[task_id]), json.dumps({'title': 'Comprar leite'}), content_type='application/json')
+        self.assertEqual(self.search('pão'), [])
+        self.assertEqual(self.search('leite'), [task_id])
+
+    def test_deleted_tasks_leave_the_index(self):
+        deleted = self.create('Viagem de férias')
+        bulk_deleted = self.create('Viagem a trabalho')
+        self.client.delete(reverse('tasks:delete_task', args=[deleted]))
+        self.client.post(
+            reverse('tasks:bulk_tasks'), json.dumps({'operations': [{'op': 'delete', 'id': bulk_deleted}]}),
+            content_type='application/json',
+        )
+        self.assertEqual(self.search('viagem'), [])
+        call_command('purge_deleted', stdout=StringIO())
+        self.assertEqual(self.search('viagem'), [])
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute(f'SELECT COUNT(*) FROM {FTS_TABLE}')
+                self.assertEqual(cursor.fetchone()[0], 0)
+
+    def test_only_own_tasks(self):
+        own = self.create('Reunião com cliente')
+        self.create('Reunião com cliente', user=self.other)
+        self.assertEqual(self.search('reunião'), [own])
+
+    def test_fts_syntax_is_treated_as_text(self):
+        task_id = self.create('Revisar NEAR contrato')
+        for query in ('"', 'NEAR(', 'NEAR(revisar contrato)', 'title:revisar', '*', 'revisar OR', '(contrato', "'; DROP TABLE"):
+            with self.subTest(query=query):
+                response = self.client.get(reverse('tasks:search_tasks'), {'q': query})
+                self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.search('revisar "contrato"'), [task_id])
+
+    def test_pagination_and_empty_query(self):
+        ids = [self.create(f'Treino {i}') for i in range(3)]
+        first = self.client.get(reverse('tasks:search_tasks'), {'q': 'treino', 'page_size': 2, 'fields': 'id'}).json()
+        second = self.client.get(reverse('tasks:search_tasks'), {'q': 'treino', 'page_size': 2, 'page': 2, 'fields': 'id'}).json()
+        self.assertTrue(first['has_next'])
+        self.assertFalse(second['has_next'])
+        self.assertEqual(sorted(task['id'] for task in first['tasks'] + second['tasks']), ids)
+        self.assertEqual(self.client.get(reverse('tasks:search_tasks'), {'q': '  '}).status_code, 400)
+
+
+class EventBrokerTests(TestCase):
+    """Histórico, replay por Last-Event-ID e descarte de usuários do LocalEventBroker"""
+
+    def setUp(self):
+        self.broker = LocalEventBroker()
+
+    async def drain(self, subscription):
+        events = []
+        while not subscription.queue.empty():
+            events.append(subscription.queue.get_nowait())
+        return [(event.id, event.type) for event in events]
+
+    async def test_replays_events_after_last_event_id(self):
+        first, second, third = self.broker.publish(1, [('task.created', {}), ('task.updated', {}), ('task.deleted', {})])
+        self.broker.publish(2, [('task.created', {})])
+        subscription = self.broker.subscribe(1, last_event_id=first.id)
+        self.assertEqual(await self.drain(subscription), [(second.id, 'task.updated'), (third.id, 'task.deleted')])
+        subscription.close()
+        self.assertEqual(self.broker.subscriber_count(), 0)
+
+    async def test_live_events_reach_only_the_owner(self):
+        own = self.broker.subscribe(1)
+        other = self.broker.subscribe(2)
+        [event] = self.broker.publish(1, [('task.created', {'id': 5})])
+        self.assertEqual(await own.get(timeout=1), event)
+        self.assertIsNone(await other.get(timeout=0.01))
+        own.close()
+        other.close()
+
+    async def test_lost_events_send_reset(self):
+        self.broker.history_size = 2
+        events = self.broker.publish(1, [('task.created', {}), ('task.updated', {})])
+        events += self.broker.publish(1, [('task.completed', {}), ('task.deleted', {})])
+        current = events[-1].id
+        cases = [
+            (events[0].id, [(current, 'reset')]),
+            (events[1].id, [(events[2].id, 'task.completed'), (current, 'task.deleted')]),
+            (events[2].id, [(current, 'task.deleted')]),
+            (current, []),
+            (current + 10, [(current, 'reset')]),
+        ]
+        for last_event_id, expected in cases:
+            with self.subTest(last_event_id=last_event_id):
+                subscription = self.broker.subscribe(1, last_event_id=last_event_id)
+                self.assertEqual(await self.drain(subscription), expected)
+                subscription.close()
+
+    async def test_least_recent_users_without_subscribers_are_evicted(self):
+        self.broker.max_users = 2
+        connected = self.broker.subscribe(1)
+        [event] = self.broker.publish(1, [('task.created', {})])
+        last = {user_id: self.broker.publish(user_id, [('task.created', {})])[0].id for user_id in (2, 3)}
+        self.assertEqual(set(self.broker._history), {1, 3})
+
+        # O usuário descartado perdeu o histórico e recebe reset
+        subscription = self.broker.subscribe(2, last_event_id=last[2])
+        self.assertEqual(await self.drain(subscription), [(last[3], 'reset')])
+        subscription.close()
+
+        # Ao desconectar, o excesso é descartado
+        connected.close()
+        self.broker.publish(4, [('task.created', {})])
+        self.assertEqual(set(self.broker._history), {3, 4})
+        subscription = self.broker.subscribe(1, last_event_id=event.id)
+        self.assertEqual((await self.drain(subscription))[0][1], 'reset')
+        subscription.close()
+
+
+class TaskEventsViewTests(TestCase):
+    """Feed SSE /tasks/async/events/"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='feed@teste.com', email='feed@teste.com', password='Senha@123')
+
+    def setUp(self):
+        patcher = mock.patch.object(events, '_brokers', {})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client.force_login(self.user)
+
+    async def read(self, response, count):
+        """Lê count blocos do stream e simula a desconexão do cliente"""
+        iterator = aiter(response.streaming_content)
+        chunks = [await anext(iterator) for _ in range(count)]
+        pending = asyncio.ensure_future(anext(iterator))
+        await asyncio.sleep(0)
+        pending.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await pending
+        return chunks
+
+    def test_requires_asgi(self):
+        response = self.client.get(reverse('tasks:task_events'))
+        self.assertEqual(response.status_code, 501)
+
+    def test_writes_publish_events(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse('tasks:create_task'), json.dumps({'title': 'Nova', 'status': Status.PENDING}),
+                content_type='application/json',
+            )
+        task_id = response.json()['task']['id']
+        history = events.get_event_broker()._history[self.user.pk][1]
+        self.assertEqual([event.type for event in history], ['task.created', 'stats'])
+        self.assertEqual(history[0].data['id'], task_id)
+
+    async def test_stream_replays_from_last_event_id(self):
+        await self.async_client.aforce_login(self.user)
+        broker = events.get_event_broker()
+        first, second = broker.publish(self.user.pk, [('task.created', {'id': 1}), ('task.deleted', {'id': 1})])
+
+        response = await self.async_client.get(reverse('tasks:task_events'), headers={'Last-Event-ID': str(first.id)})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+        retry, replayed = await self.read(response, 2)
+        self.assertEqual(retry, b'retry: 3000\n\n')
+        self.assertEqual(replayed, second.encode())
+        self.assertEqual(broker.subscriber_count(), 0)
+
+    async def test_stream_delivers_live_events(self):
+        await self.async_client.aforce_login(self.user)
+        broker = events.get_event_broker()
+        response = await self.async_client.get(reverse('tasks:task_events'))
+        iterator = aiter(response.streaming_content)
+        self.assertEqual(await anext(iterator), b'retry: 3000\n\n')
+        pending = asyncio.ensure_future(anext(iterator))
+        while not broker.subscriber_count(self.user.pk):
+            await asyncio.sleep(0)
+        [event] = broker.publish(self.user.pk, [('task.created', {'id': 7})])
+        self.assertEqual(await pending, event.encode())
+        self.assertEqual(await self.read(response, 0), [])
+        self.assertEqual(broker.subscriber_count(), 0)
+
+
+class AsyncTaskViewTests(StatsAssertionsMixin, TestCase):
+    """APIs async: mesmas regras de dono e de versão das versões síncronas"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='async@teste.com', email='async@teste.com', password='Senha@123')
+        cls.other = User.objects.create_user(username='alheio@teste.com', email='alheio@teste.com', password='Senha@123')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        self.task = self.create('Tarefa')
+
+    def create(self, title, status=Status.PENDING):
+        response = self.client.post(
+            reverse('tasks:async_create_task'), json.dumps({'title': title, 'status': status}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.json()['task']
+
+    def post(self, name, data, pk=None):
+        return self.client.post(reverse(name, args=[pk or self.task['id']]), json.dumps(data), content_type='application/json')
+
+    def test_get(self):
+        response = self.client.get(reverse('tasks:async_get_task', args=[self.task['id']]), {'fields': 'id,title'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['task'], {'id': self.task['id'], 'title': 'Tarefa'})
+        response = self.client.get(reverse('tasks:async_get_task', args=[self.task['id']]), {'fields': 'senha'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_list_pages_and_filters(self):
+        done = self.create('Feita', Status.COMPLETED)
+        ids = [self.create(f'Tarefa {i}')['id'] for i in range(3)]
+        seen, cursor = [], None
+        while True:
+            params = {'fields': 'id', 'page_size': 2, **({'cursor': cursor} if cursor else {})}
+            page = self.client.get(reverse('tasks:async_list_tasks'), params).json()
+            seen += [task['id'] for task in page['tasks']]
+            cursor = page['next_cursor']
+            if not cursor:
+                break
+        self.assertEqual(sorted(seen), sorted([self.task['id'], done['id'], *ids]))
+
+        page = self.client.get(reverse('tasks:async_list_tasks'), {'status': Status.COMPLETED, 'fields': 'id'}).json()
+        self.assertEqual(page['tasks'], [{'id': done['id']}])
+        for params in ({'page_size': 'x'}, {'cursor': 'invalido'}, {'fields': 'senha'}):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get(reverse('tasks:async_list_tasks'), params).status_code, 400)
+
+    def test_update_and_complete(self):
+        response = self.post('tasks:async_update_task', {'title': 'Editada', 'version': self.task['version']})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['task']['version'], self.task['version'] + 1)
+        response = self.post('tasks:async_complete_task', {'version': self.task['version'] + 1})
+        self.assertEqual(response.status_code, 200)
+        task = Task.objects.get(id=self.task['id'])
+        self.assertEqual((task.title, task.status), ('Editada', Status.COMPLETED))
+        self.assertStatsConsistent(self.user)
+
+    def test_stale_version_returns_409(self):
+        self.post('tasks:async_update_task', {'title': 'Primeira'})
+        for name, data in (
+            ('tasks:async_update_task', {'title': 'Segunda', 'version': self.task['version']}),
+            ('tasks:async_complete_task', {'version': self.task['version']}),
+        ):
+            with self.subTest(name=name):
+                response = self.post(name, data)
+                self.assertEqual(response.status_code, 409)
+                self.assertEqual(response.json()['current_version'], self.task['version'] + 1)
+        task = Task.objects.get(id=self.task['id'])
+        self.assertEqual((task.title, task.status), ('Primeira', Status.PENDING))
+        self.assertStatsConsistent(self.user)
+
+    def test_invalid_payload_returns_400(self):
+        self.assertEqual(self.post('tasks:async_update_task', {'title': 'Editada', 'version': 'abc'}).status_code, 400)
+        self.assertEqual(self.post('tasks:async_update_task', {}).status_code, 400)
+        self.assertEqual(self.post('tasks:async_complete_task', {'version': 0}).status_code, 400)
+
+    def test_delete(self):
+        response = self.client.delete(reverse('tasks:async_delete_task', args=[self.task['id']]))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Task.objects.filter(id=self.task['id']).exists())
+        self.assertEqual(self.client.get(reverse('tasks:async_get_task', args=[self.task['id']])).status_code, 404)
+        self.assertStatsConsistent(self.user)
+
+    def test_other_users_tasks_return_404(self):
+        self.client.force_login(self.other)
+        pk = self.task['id']
+        self.assertEqual(self.client.get(reverse('tasks:async_get_task', args=[pk])).status_code, 404)
+        self.assertEqual(self.post('tasks:async_update_task', {'title': 'Invasão'}).status_code, 404)
+        self.assertEqual(self.post('tasks:async_complete_task', {}).status_code, 404)
+        self.assertEqual(self.client.delete(reverse('tasks:async_delete_task', args=[pk])).status_code, 404)
+        self.assertEqual(self.client.get(reverse('tasks:async_list_tasks')).json()['tasks'], [])
+        task = Task.objects.get(id=pk)
+        self.assertEqual((task.title, task.status, task.version), ('Tarefa', Status.PENDING, self.task['version']))
+
+
+TEST_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'todo-testes'},
+    'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'todo-testes-versoes'},
+}
+
+
+@override_settings(CACHES=TEST_CACHES)
+class UserCacheTests(TestCase):
+    """Cache versionado por usuário: invalidação nas escritas e isolamento entre usuários"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='cache@teste.com', email='cache@teste.com', password='Senha@123')
+        cls.other = User.objects.create_user(username='vizinho@teste.com', email='vizinho@teste.com', password='Senha@123')
+
+    def setUp(self):
+        for alias in TEST_CACHES:
+            caches[alias].clear()
+        # As escritas com on_commit executado publicam no feed de eventos
+        patcher = mock.patch.object(events, '_brokers', {})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client.force_login(self.user)
+
+    def create(self, title):
+        response = self.client.post(
+            reverse('tasks:create_task'), json.dumps({'title': title, 'status': Status.PENDING}),
+            content_type='application/json',
+        )
+        return response.json()['task']
+
+    def titles(self):
+        return [task['title'] for task in self.client.get(reverse('tasks:list_tasks'), {'fields': 'title'}).json()['tasks']]
+
+    def test_get_or_set_reads_from_cache(self):
+        default = mock.Mock(return_value={'total': 1})
+        self.assertEqual(UserCache(self.user.pk).get_or_set('nome', default), {'total': 1})
+        self.assertEqual(UserCache(self.user.pk).get_or_set('nome', default), {'total': 1})
+        self.assertEqual(default.call_count, 1)
+
+    def test_write_invalidates_user_cache(self):
+        task = self.create('Antes')
+        self.assertEqual(self.titles(), ['Antes'])
+        with self.assertNumQueries(0):
+            self.assertEqual(UserCache(self.user.pk).get_or_set('list::title:20', dict)['tasks'], [{'title': 'Antes'}])
+
+        token = get_user_token(self.user.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('tasks:update_task', args=[task['id']]), json.dumps({'title': 'Depois'}), content_type='application/json')
+        self.assertNotEqual(get_user_token(self.user.pk), token)
+        self.assertEqual(self.titles(), ['Depois'])
+        self.client.delete(reverse('tasks:delete_task', args=[task['id']]))
+        self.assertEqual(self.titles(), [])
+
+    def test_bump_changes_token_again_after_commit(self):
+        token = get_user_token(self.user.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            bump_user_version(self.user.pk)
+            during = get_user_token(self.user.pk)
+        self.assertNotIn(get_user_token(self.user.pk), (token, during))
+        self.assertNotEqual(during, token)
+
+    def test_lost_version_key_never_reuses_old_entries(self):
+        UserCache(self.user.pk).get_or_set('nome', lambda: 'antigo')
+        caches['shared'].clear()
+        self.assertEqual(UserCache(self.user.pk).get_or_set('nome', lambda: 'novo'), 'novo')
+
+    def test_users_do_not_share_entries(self):
+        self.create('Minha')
+        self.assertEqual(self.titles(), ['Minha'])
+        # Mesmo com o mesmo token, a chave inclui o id do usuário
+        caches['shared'].set(f'tasks:{self.other.pk}:version', get_user_token(self.user.pk), None)
+        self.assertNotEqual(UserCache(self.user.pk).key('list::title:20'), UserCache(self.other.pk).key('list::title:20'))
+        self.client.force_login(self.other)
+        self.assertEqual(self.titles(), [])
+        self.assertEqual(self.client.get(reverse('tasks:task_stats')).json()['stats']['total'], 0)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class DashboardFragmentCacheTests(TestCase):
+    """Fragmentos em cache do dashboard: refeitos após escritas e separados por usuário"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='painel@teste.com', email='painel@teste.com', password='Senha@123')
+        cls.other = User.objects.create_user(username='painel2@teste.com', email='painel2@teste.com', password='Senha@123')
+
+    def setUp(self):
+        for alias in TEST_CACHES:
+            caches[alias].clear()
+        self.client.force_login(self.user)
+        self.ids = [self.create(f'Tarefa {i}') for i in range(3)]
+
+    def create(self, title):
+        response = self.client.post(
+            reverse('tasks:create_task'), json.dumps({'title': title, 'status': Status.PENDING}),
+            content_type='application/json',
+        )
+        return response.json()['task']['id']
+
+    def rendered_cards(self, response):
+        return sum(1 for template in response.templates if template.name == 'includes/task_card.html')
+
+    def test_cards_render_again_only_when_changed(self):
+        self.assertEqual(self.rendered_cards(self.client.get(reverse('tasks:dashboard'))), 3)
+        self.assertEqual(self.rendered_cards(self.client.get(reverse('tasks:dashboard'))), 0)
+
+        self.client.post(reverse('tasks:update_task', args=[self.ids[0]]), json.dumps({'title': 'Renomeada'}), content_type='application/json')
+        response = self.client.get(reverse('tasks:dashboard'))
+        self.assertEqual(self.rendered_cards(response), 1)
+        self.assertContains(response, 'Renomeada')
+        self.assertNotContains(response, 'Tarefa 0')
+
+    def test_stats_fragment_follows_writes(self):
+        self.assertContains(self.client.get(reverse('tasks:dashboard')), 'data-stat="total">3<')
+        self.client.post(reverse('tasks:complete_task', args=[self.ids[1]]))
+        response = self.client.get(reverse('tasks:dashboard'))
+        self.assertContains(response, 'data-stat="completed">1<')
+        self.assertContains(response, 'data-stat="pending">2<')
+        self.client.delete(reverse('tasks:delete_task', args=[self.ids[2]]))
+        self.assertContains(self.client.get(reverse('tasks:dashboard')), 'data-stat="total">2<')
+
+    def test_fragments_differ_between_users(self):
+        self.assertContains(self.client.get(reverse('tasks:dashboard')), 'data-stat="total">3<')
+        self.client.force_login(self.other)
+        response = self.client.get(reverse('tasks:dashboard'))
+        self.assertContains(response, 'data-stat="total">0<')
+        self.assertNotContains(response, 'Tarefa 0')
+        self.create('Do vizinho')
+        self.assertContains(self.client.get(reverse('tasks:dashboard')), 'data-stat="total">1<')
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('tasks:dashboard'))
+        self.assertContains(response, 'data-stat="total">3<')
+        self.assertNotContains(response, 'Do vizinho')
+
+
+class TaskExportTests(TestCase):
+    """Exportação em NDJSON e CSV: formatos, campos, período e dono"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='export@teste.com', email='export@teste.com', password='Senha@123')
+        other = User.objects.create_user(username='export2@teste.com', email='export2@teste.com', password='Senha@123')
+        cls.old = Task.objects.create(user=cls.user, title='Antiga', description='Com, vírgula', status=Status.COMPLETED)
+        cls.new = Task.objects.create(user=cls.user, title='Nova', description='Ação "citada"', status=Status.PENDING)
+        Task.objects.create(user=other, title='Alheia', status=Status.PENDING)
+        # 29/02 22:00 em São Paulo, já 01/03 em UTC
+        Task.objects.filter(pk=cls.old.pk).update(created_at=datetime(2024, 3, 1, 1, 0, tzinfo=dt_timezone.utc))
+        Task.objects.filter(pk=cls.new.pk).update(created_at=datetime(2024, 3, 2, 12, 0, tzinfo=dt_timezone.utc))
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def export(self, **params):
+        response = self.client.get(reverse('tasks:export_tasks'), params)
+        self.assertEqual(response.status_code, 200)
+        return response, b''.join(response.streaming_content).decode()
+
+    def ndjson(self, **params):
+        return [json.loads(line) for line in self.export(format='ndjson', **params)[1].splitlines()]
+
+    def test_ndjson(self):
+        response, _ = self.export()
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertIn('attachment; filename="tarefas-', response['Content-Disposition'])
+        rows = self.ndjson()
+        self.assertEqual([row['title'] for row in rows], ['Nova', 'Antiga'])
+        self.assertEqual(rows[1]['created_at'], '2024-03-01T01:00:00+00:00')
+        self.assertEqual(set(rows[0]), {'id', 'title', 'description', 'status', 'created_at', 'updated_at', 'version'})
+
+    def test_csv(self):
+        response, body = self.export(format='csv', fields='id,title,description')
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertTrue(body.startswith('\ufeff'))
+        self.assertEqual(list(csv.reader(StringIO(body.lstrip('\ufeff')))), [
+            ['id', 'title', 'description'],
+            [str(self.new.pk), 'Nova', 'Ação "citada"'],
+            [str(self.old.pk), 'Antiga', 'Com, vírgula'],
+        ])
+
+    def test_fields_and_status(self):
+        self.assertEqual(self.ndjson(fields='title,status', status=Status.COMPLETED), [{'title': 'Antiga', 'status': Status.COMPLETED}])
+        self.assertEqual(self.ndjson(fields='title, title'), [{'title': 'Nova'}, {'title': 'Antiga'}])
+
+    def test_date_range_uses_local_days(self):
+        cases = [
+            ({'start': '2024-02-29', 'end': '2024-02-29'}, ['Antiga']),
+            ({'start': '2024-03-01'}, ['Nova']),
+            ({'end': '2024-03-01'}, ['Antiga']),
+            ({'start': '2024-03-03'}, []),
+        ]
+        for params, titles in cases:
+            with self.subTest(params=params):
+                self.assertEqual([row['title'] for row in self.ndjson(fields='title', **params)], titles)
+
+    def test_invalid_parameters_return_400(self):
+        for params in (
+            {'format': 'xml'},
+            {'fields': 'senha'},
+            {'start': '2024-13-01'},
+            {'end': 'ontem'},
+            {'start': '2024-03-02', 'end': '2024-03-01'},
+        ):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get(reverse('tasks:export_tasks'), params).status_code, 400)
+
+    def test_only_own_tasks(self):
+        titles = [row['title'] for row in self.ndjson(fields='title')]
+        self.assertNotIn('Alheia', titles)
+        self.client.logout()
+        self.assertEqual(self.client.get(reverse('tasks:export_tasks')).status_code, 302)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class TasksByMonthTests(TestCase):
+    """Histograma mensal: período, limite de meses, fuso e quebra por status"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='meses@teste.com', email='meses@teste.com', password='Senha@123')
+        other = User.objects.create_user(username='meses2@teste.com', email='meses2@teste.com', password='Senha@123')
+        created = [
+            # 29/02 22:00 em São Paulo, já março em UTC
+            (cls.user, Status.COMPLETED, datetime(2024, 3, 1, 1, 0, tzinfo=dt_timezone.utc)),
+            (cls.user, Status.PENDING, datetime(2024, 2, 10, 12, 0, tzinfo=dt_timezone.utc)),
+            (cls.user, Status.IN_PROGRESS, datetime(2024, 3, 15, 12, 0, tzinfo=dt_timezone.utc)),
+            (cls.user, Status.PENDING, datetime(2023, 12, 20, 12, 0, tzinfo=dt_timezone.utc)),
+            (other, Status.PENDING, datetime(2024, 2, 10, 12, 0, tzinfo=dt_timezone.utc)),
+        ]
+        for user, status, created_at in created:
+            task = Task.objects.create(user=user, title='Tarefa', status=status)
+            Task.objects.filter(pk=task.pk).update(created_at=created_at)
+        stats.rebuild_user_stats(cls.user.pk)
+
+    def setUp(self):
+        for alias in TEST_CACHES:
+            caches[alias].clear()
+        self.client.force_login(self.user)
+
+    def get(self, **params):
+        return self.client.get(reverse('tasks:tasks_by_month'), params)
+
+    def test_year(self):
+        data = self.get(year=2024).json()
+        self.assertEqual(len(data['months']), 12)
+        self.assertEqual(list(data['counts'])[:3], ['Janeiro', 'Fevereiro', 'Março'])
+        self.assertEqual((data['counts']['Fevereiro'], data['counts']['Março']), (2, 1))
+        self.assertEqual(sum(data['counts'].values()), 3)
+        self.assertEqual(self.get(year=2023).json()['counts']['Dezembro'], 1)
+
+    def test_range_across_years(self):
+        data = self.get(start='2023-12-01', end='2024-03-31').json()
+        self.assertEqual(data['counts'], {'Dezembro/2023': 1, 'Janeiro/2024': 0, 'Fevereiro/2024': 2, 'Março/2024': 1})
+        # Os limites são dias locais inteiros
+        data = self.get(start='2024-02-29', end='2024-02-29').json()
+        self.assertEqual(data['counts'], {'Fevereiro': 1})
+
+    def test_months_use_local_timezone(self):
+        [february] = [month for month in self.get(year=2024).json()['months'] if month['month'] == '2024-02']
+        self.assertEqual(february['completed'], 1)
+        caches['default'].clear()
+        with timezone.override('UTC'):
+            [february] = [month for month in self.get(year=2024).json()['months'] if month['month'] == '2024-02']
+        self.assertEqual(february['completed'], 0)
+
+    def test_status_breakdown(self):
+        months = {month['month']: month for month in self.get(start='2024-02-01', end='2024-03-31').json()['months']}
+        self.assertEqual(months['2024-02'], {
+            'month': '2024-02', 'label': 'Fevereiro', 'total': 2, 'pending': 1, 'in_progress': 0, 'completed': 1,
+        })
+        self.assertEqual(months['2024-03'], {
+            'month': '2024-03', 'label': 'Março', 'total': 1, 'pending': 0, 'in_progress': 1, 'completed': 0,
+        })
+
+    def test_month_limit(self):
+        self.assertEqual(self.get(start='2015-01-01', end='2024-12-31').status_code, 200)
+        response = self.get(start='2014-12-31', end='2024-12-31')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['error'], 'Intervalo máximo de 120 meses')
+
+    def test_invalid_period_returns_400(self):
+        for params in (
+            {'start': '2024-01-01'},
+            {'end': '2024-01-01'},
+            {'start': '2024-03-01', 'end': '2024-02-01'},
+            {'start': '2024-02-30', 'end': '2024-03-01'},
+            {'year': 'dois mil'},
+        ):
+            with self.subTest(params=params):
+                self.assertEqual(self.get(**params).status_code, 400)
+
+
+
+class MetricsTests(TestCase):
+    """MetricsMiddleware registra consultas e tempos por view; /metrics/ os expõe"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='metricas@teste.com', email='metricas@teste.com', password='Senha@123')
+        cls.staff = User.objects.create_user(
+            username='staff@teste.com', email='staff@teste.com', password='Senha@123', is_staff=True,
+        )
+
+    def setUp(self):
+        patcher = mock.patch.object(metrics, '_registries', {})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client.force_login(self.user)
+
+    def histogram(self, name, view, method='GET'):
+        return metrics.get_metrics().collect()['histograms'][(name, (('view', view), ('method', method)))]
+
+    def test_records_queries_and_time_per_request(self):
+        executed = []
+        for params in ({}, {'status': Status.PENDING, 'fields': 'id'}):
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(self.client.get(reverse('tasks:list_tasks'), params).status_code, 200)
+            executed.append(len(queries))
+
+        labels = (('view', 'tasks:list_tasks'), ('method', 'GET'))
+        counters = metrics.get_metrics().collect()['counters']
+        self.assertEqual(counters[('todo_http_requests_total', labels + (('status', '200'),))], 2)
+        queries = self.histogram('todo_db_queries_per_request', 'tasks:list_tasks')
+        self.assertEqual((queries[-2], queries[-1]), (sum(executed), 2))
+        duration = self.histogram('todo_http_request_duration_seconds', 'tasks:list_tasks')
+        db_duration = self.histogram('todo_db_duration_seconds', 'tasks:list_tasks')
+        self.assertGreater(db_duration[-2], 0)
+        self.assertLessEqual(db_duration[-2], duration[-2])
+
+    async def test_records_queries_of_async_views(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse('tasks:async_task_stats'))
+        self.assertEqual(response.status_code, 200)
+        queries = self.histogram('todo_db_queries_per_request', 'tasks:async_task_stats')
+        self.assertEqual(queries[-1], 1)
+        self.assertGreater(queries[-2], 0)
+
+    def test_unresolved_paths_share_one_series(self):
+        self.client.get('/nao-existe/1/')
+        self.client.get('/nao-existe/2/')
+        self.assertEqual(self.histogram('todo_http_request_duration_seconds', 'unresolved')[-1], 2)
+
+    def test_endpoint(self):
+        self.client.get(reverse('tasks:list_tasks'))
+        self.assertEqual(self.client.get(reverse('tasks:metrics')).status_code, 403)
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse('tasks:metrics'))
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        self.assertIn('# TYPE todo_db_queries_per_request histogram', body)
+        self.assertIn('todo_http_requests_total{view="tasks:list_tasks",method="GET",status="200"} 1', body)
+        self.assertIn('todo_db_queries_per_request_count{view="tasks:list_tasks",method="GET"} 1', body)
+        self.assertIn('todo_db_queries_per_request_bucket{view="tasks:list_tasks",method="GET",le="+Inf"} 1', body)
+
+    @override_settings(TASK_METRICS_TOKEN='segredo')
+    def test_endpoint_token(self):
+        self.client.logout()
+        url = reverse('tasks:metrics')
+        self.assertEqual(self.client.get(url, headers={'Authorization': 'Bearer segredo'}).status_code, 200)
+        self.assertEqual(self.client.get(url, headers={'Authorization': 'Bearer errado'}).status_code, 403)
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ArchiveTests(StatsAssertionsMixin, TestCase):
+    """Arquivamento: contadores e índice de busca em dia, totais com e sem include_archived"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='arquivo@teste.com', email='arquivo@teste.com', password='Senha@123')
+
+    def setUp(self):
+        for alias in TEST_CACHES:
+            caches[alias].clear()
+        self.client.force_login(self.user)
+        self.old = [self.create(f'Relatório {i}', Status.COMPLETED) for i in range(2)]
+        self.recent = self.create('Relatório recente', Status.COMPLETED)
+        self.pending = self.create('Relatório pendente', Status.PENDING)
+        Task.objects.filter(pk__in=[*self.old, self.pending]).update(updated_at=timezone.now() - timedelta(days=40))
+
+    def create(self, title, status):
+        response = self.client.post(
+            reverse('tasks:create_task'), json.dumps({'title': title, 'status': status}),
+            content_type='application/json',
+        )
+        return response.json()['task']['id']
+
+    def archive(self, *args):
+        out = StringIO()
+        call_command('archive_tasks', '--older-than', '30', *args, stdout=out)
+        return out.getvalue()
+
+    def search(self, query):
+        return sorted(task['id'] for task in self.client.get(reverse('tasks:search_tasks'), {'q': query, 'fields': 'id'}).json()['tasks'])
+
+    def totals(self, **params):
+        dashboard = self.client.get(reverse('tasks:dashboard'), params).context
+        months = self.client.get(reverse('tasks:tasks_by_month'), params).json()['months']
+        api = self.client.get(reverse('tasks:task_stats'), params).json()['stats']
+        return {
+            'dashboard': (dashboard['stats']['total'], dashboard['stats']['completed'], dashboard['paginator'].count),
+            'months': (sum(month['total'] for month in months), sum(month['completed'] for month in months)),
+            'api': (api['total'], api['completed']),
+        }
+
+    def test_command_moves_old_completed_tasks(self):
+        output = self.archive('--batch-size', '1')
+        self.assertIn('1/2 tarefas arquivadas', output)
+        self.assertIn('Arquivamento concluído: 2', output)
+        self.assertEqual(sorted(ArchivedTask.objects.values_list('id', flat=True)), self.old)
+        self.assertEqual(sorted(Task.objects.values_list('id', flat=True)), [self.recent, self.pending])
+        self.assertStatsConsistent(self.user)
+        self.assertEqual(TaskStats.objects.filter(user=self.user).values_list('total', 'completed', 'archived').get(), (2, 1, 2))
+        self.assertIn('Arquivamento concluído: 0', self.archive())
+
+    def test_archived_tasks_leave_the_search_index(self):
+        self.assertEqual(len(self.search('relatório')), 4)
+        self.archive()
+        self.assertEqual(self.search('relatório'), [self.recent, self.pending])
+
+    def test_include_archived_changes_totals(self):
+        before = self.totals()
+        self.archive()
+        self.assertEqual(self.totals(), {'dashboard': (2, 1, 2), 'months': (2, 1), 'api': (2, 1)})
+        self.assertEqual(self.totals(include_archived=1), before)
+        self.assertEqual(before, {'dashboard': (4, 3, 4), 'months': (4, 3), 'api': (4, 3)})
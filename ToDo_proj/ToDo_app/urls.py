@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import views, async_views
 
 
 app_name = 'tasks'
@@ -15,7 +15,23 @@ urlpatterns = [
     path('delete/<int:pk>/', views.TaskDeleteView.as_view(), name='delete_task'),
     path('get/<int:pk>/', views.TaskDetailView.as_view(), name='get_task'),
     path('complete/<int:pk>/', views.TaskCompleteView.as_view(), name='complete_task'), 
+    path('bulk/', views.TaskBulkView.as_view(), name='bulk_tasks'),
+    path('list/', views.TaskListView.as_view(), name='list_tasks'),
+    path('search/', views.TaskSearchView.as_view(), name='search_tasks'),
+    path('stats/', views.TaskStatsView.as_view(), name='task_stats'),
     path('all_dates/', views.AllTasksDateView.as_view(), name='tasks_by_month'),
+    path('export/', views.TaskExportView.as_view(), name='export_tasks'),
+    path('metrics/', views.MetricsView.as_view(), name='metrics'),
+
+    # Versões async das APIs (deploy ASGI)
+    path('async/create/', async_views.AsyncCreateTaskView.as_view(), name='async_create_task'),
+    path('async/update/<int:pk>/', async_views.AsyncUpdateTaskView.as_view(), name='async_update_task'),
+    path('async/delete/<int:pk>/', async_views.AsyncTaskDeleteView.as_view(), name='async_delete_task'),
+    path('async/get/<int:pk>/', async_views.AsyncTaskDetailView.as_view(), name='async_get_task'),
+    path('async/complete/<int:pk>/', async_views.AsyncTaskCompleteView.as_view(), name='async_complete_task'),
+    path('async/list/', async_views.AsyncTaskListView.as_view(), name='async_list_tasks'),
+    path('async/stats/', async_views.AsyncTaskStatsView.as_view(), name='async_task_stats'),
+    path('async/events/', async_views.TaskEventsView.as_view(), name='task_events'),
 
 
 
@@ -1,35 +1,48 @@
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import render, get_object_or_404, redirect
-from django.http import JsonResponse
-from .models import Task
-import json
+from django.http import JsonResponse, HttpResponse, Http404, StreamingHttpResponse
+from .models import ArchivedTask, Task
+import csv
+import logging
+from collections import Counter
 from .choices import Status, Months
 from django.conf import settings
-from django.core.paginator import Paginator
-from django.contrib.auth import get_user_model
-from django.db.models import Count, Q
-
-from datetime import datetime, date
-from django.contrib.admin.views.decorators import staff_member_required
+from django.core.paginator import Page
+from django.db.models import Value
+from django.db.models.functions import TruncMonth
+from django.db import transaction
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare
+
+from datetime import datetime, date, timedelta
 from django.views.generic import DeleteView, ListView, CreateView, UpdateView,DetailView
 from django.views import View
 
 from django.contrib.auth.mixins import LoginRequiredMixin
-from .forms import TaskForm
-from .mixins import JsonResponseMixin
+from .forms import TaskForm, parse_expected_version, parse_include_archived, partial_task_form
+from .mixins import JsonResponseMixin, ConditionalResponseMixin, UserCacheMixin
+from .metrics import get_metrics, render_prometheus
+from .pagination import CursorPaginator, InvalidCursor
+from . import services, stats
+from .search import get_search_backend
+from .serializers import FastJsonResponse, InvalidFields, dumps, select_fields, serialize_rows, serialize_task
 
 
+logger = logging.getLogger(__name__)
 
-def format_task_data(task):
-    """Função auxiliar para formatar dados de tarefa para JSON"""
-    return {
-        'id': task.id,
-        'title': task.title,
-        'description': task.description,
-        'status': task.status,
-        'created_at': task.created_at.strftime('%d/%m/%Y %H:%M'),
-        'updated_at': task.updated_at.strftime('%d/%m/%Y %H:%M')
-    }
+
+def day_bounds(start_date=None, end_date=None):
+    """
+    Converte datas locais (America/Sao_Paulo) no intervalo [início, fim) sobre
+    created_at, que pode ser resolvido pelo índice (user, -created_at).
+    """
+    tz = timezone.get_current_timezone()
+    lower = upper = None
+    if start_date:
+        lower = timezone.make_aware(datetime.combine(start_date, datetime.min.time()), tz)
+    if end_date:
+        upper = timezone.make_aware(datetime.combine(end_date + timedelta(days=1), datetime.min.time()), tz)
+    return lower, upper
 
 
 # Create your views here.
@@ -37,37 +50,82 @@ def index(request):
     return render(request, 'index.html')
 
 #de 39 pra 28 linhas
-class DashboardView(LoginRequiredMixin, ListView):
+class DashboardView(LoginRequiredMixin, UserCacheMixin, ListView):
     model = Task
     template_name = 'tasks/dashboard.html'
     context_object_name = 'tasks'
     paginate_by = 5
     ordering = '-created_at'
 
+    card_columns = ('id', 'title', 'description', 'status', 'created_at', 'updated_at', 'version')
+
+    def setup(self, request, *args, **kwargs):
+        super().setup(request, *args, **kwargs)
+        self.include_archived = parse_include_archived(request.GET)
+
     def get_queryset(self):
         queryset = Task.objects.filter(user=self.request.user)
         status_filter = self.request.GET.get('status', '')
         if status_filter:
             queryset = queryset.filter(status=status_filter)
-        return queryset
+        if self.include_archived and status_filter in ('', Status.COMPLETED):
+            # As arquivadas entram por UNION ALL com a tabela de arquivo; as
+            # linhas voltam como dicts e viram instâncias em as_cards()
+            hot = queryset.values(*self.card_columns, archived=Value(False))
+            cold = ArchivedTask.objects.filter(user=self.request.user).values(*self.card_columns, archived=Value(True))
+            return hot.union(cold, all=True).order_by('-created_at', '-id')
+        return queryset.order_by('-created_at', '-id')
+
+    def as_cards(self, rows):
+        if not self.include_archived:
+            return rows
+        cards = []
+        for row in rows:
+            if isinstance(row, dict):
+                row = dict(row)
+                model = ArchivedTask if row.pop('archived') else Task
+                row = model(user_id=self.request.user.pk, **row)
+            cards.append(row)
+        return cards
+
+    def paginate_queryset(self, queryset, page_size):
+        # ?pagination=cursor troca o Paginator por offset pela paginação por
+        # cursor, que não se aplica à união com as arquivadas
+        if self.request.GET.get('pagination') != 'cursor' or self.include_archived:
+            if str(self.request.GET.get(self.page_kwarg) or 1) == '1' and self.request.GET.get('status', '') in ('', *Status.values):
+                return self.paginate_first_page(queryset, page_size)
+            paginator, page, object_list, is_paginated = super().paginate_queryset(queryset, page_size)
+            page.object_list = self.as_cards(page.object_list)
+            return (paginator, page, page.object_list, is_paginated)
+        paginator = CursorPaginator(queryset, page_size)
+        try:
+            page = paginator.page(self.request.GET.get('cursor'))
+        except InvalidCursor as e:
+            raise Http404(str(e))
+        return (paginator, page, page.object_list, page.has_other_pages())
+
+    def paginate_first_page(self, queryset, page_size):
+        # Primeira página (a mais acessada) e o total vêm do cache do usuário
+        status_filter = self.request.GET.get('status', '')
+        cached = self.user_cache.get_or_set(
+            f'dashboard:{status_filter}:{page_size}:{int(self.include_archived)}',
+            lambda: {'tasks': self.as_cards(list(queryset[:page_size])), 'count': queryset.count()},
+        )
+        paginator = self.get_paginator(queryset, page_size)
+        paginator.count = cached['count']
+        page = Page(cached['tasks'], 1, paginator)
+        return (paginator, page, page.object_list, page.has_other_pages())
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         status_filter = self.request.GET.get('status', '') #pegar filtro de status
-        stats_query = (
-            Task.objects
-            .filter(user=self.request.user)
-            .aggregate(
-                total=Count('id'),
-                pending=Count('id', filter=Q(status=Status.PENDING)),
-                in_progress=Count('id', filter=Q(status=Status.IN_PROGRESS)),
-                completed=Count('id', filter=Q(status=Status.COMPLETED)),
-            )
-        )
-        
         context['status_choices'] = Status.choices
         context['current_status_filter'] = status_filter
-        context['stats'] = stats_query
+        context['include_archived'] = self.include_archived
+        snapshot = self.get_cached_snapshot()
+        context['stats'] = stats.public_counts(snapshot, self.include_archived)
+        # Chave do fragmento em cache dos contadores (mesma base do ETag de /stats/)
+        context['stats_version'] = f'{snapshot["version"]}-{snapshot["changed_at"].timestamp()}-{int(self.include_archived)}'
         
         return context
     
@@ -76,55 +134,58 @@ class DashboardView(LoginRequiredMixin, ListView):
 class CreateTaskView(LoginRequiredMixin, CreateView,JsonResponseMixin):
     model = Task
     form_class = TaskForm
+    json_response_class = FastJsonResponse
 
     def post(self, request, *args, **kwargs):
         try:
             data = self.validate_json_request(request)
+            if isinstance(data, HttpResponse):
+                return data
             form = self.form_class(data)
             
             if form.is_valid():
-                task = form.save(commit=False)
-                task.user = request.user
-                task.save()
-                return self.json_success('Tarefa criada com sucesso!',{'task': format_task_data(task)})
+                task = services.create_task(request.user, form)
+                return self.json_success('Tarefa criada com sucesso!',{'task': serialize_task(task)})
             else:
                 return self.json_error(form.errors.as_json())
 
-
-                
-        except json.JSONDecodeError:
-            return self.json_error('Formato JSON inválido', 400)
-        except Exception as e:
-            return self.json_error(f'Erro interno do servidor: {str(e)}', 500)
+        except Exception:
+            # O detalhe fica no log; a resposta não expõe a exceção
+            logger.exception('Erro ao criar tarefa do usuário %s', request.user.pk)
+            return self.json_error('Erro interno do servidor', 500)
         
 
 #de 32 pra 25 linhas
 class UpdateTaskView(LoginRequiredMixin, UpdateView,JsonResponseMixin):
     model = Task
     form_class = TaskForm
+    json_response_class = FastJsonResponse
 
     def post(self, request, *args, **kwargs):
         try:
-            task = self.get_object()
             data = self.validate_json_request(request)
-            form = self.form_class(data, instance=task)
-
-            if form.is_valid():
-                form.save()
-                return self.json_success(
-                    'Tarefa atualizada com sucesso!',
-                    {'task': format_task_data(task)}
-                )
-            else:
+            if isinstance(data, HttpResponse):
+                return data
+            # Valida só os campos enviados; a tarefa não é carregada antes do UPDATE
+            form = partial_task_form(data)
+            if not form.fields:
+                return self.json_error('Nenhum campo para atualizar')
+            if not form.is_valid():
                 return self.json_error(form.errors.as_json())
+            expected_version = parse_expected_version(data)
 
-        except json.JSONDecodeError:
-            return self.json_error('Formato JSON inválido', 400)
-        except Exception as e:
-            return self.json_error(f'Erro interno do servidor: {str(e)}', 500)
+            row = services.update_task(request.user, self.kwargs['pk'], form.cleaned_data, expected_version)
+            return self.json_success('Tarefa atualizada com sucesso!', {'task': serialize_rows([row])[0]})
 
-    def get_object(self, queryset=None):
-        return get_object_or_404(Task, id=self.kwargs['pk'], user=self.request.user)
+        except ValueError as e:
+            return self.json_error(str(e), 400)
+        except services.TaskNotFound:
+            return self.json_error('Tarefa não encontrada', 404)
+        except services.VersionConflict as e:
+            return self.json_error(str(e), 409, {'current_version': e.current_version})
+        except Exception:
+            logger.exception('Erro ao atualizar tarefa do usuário %s', request.user.pk)
+            return self.json_error('Erro interno do servidor', 500)
 
 
 #de 18 pra 15 linhas
@@ -136,27 +197,46 @@ class TaskDeleteView(LoginRequiredMixin, DeleteView,JsonResponseMixin):
         try:
             task = self.get_object()
             task_title = task.title
-            task.delete()
+            services.delete_task(task)
             return self.json_success(f'Tarefa "{task_title}" removida com sucesso!')
 
-        except Task.DoesNotExist:
+        except (Task.DoesNotExist, Http404):
             return self.json_error('Tarefa não encontrada', 404)
-        except Exception as e:
-            return self.json_error(f'Erro interno do servidor: {str(e)}', 500)
+        except Exception:
+            logger.exception('Erro ao excluir tarefa do usuário %s', request.user.pk)
+            return self.json_error('Erro interno do servidor', 500)
 
     def get_object(self, queryset=None):
         return get_object_or_404(Task, id=self.kwargs['pk'], user=self.request.user)
 
 
 
-class TaskDetailView(LoginRequiredMixin, DetailView,JsonResponseMixin):
+class TaskDetailView(LoginRequiredMixin, DetailView,JsonResponseMixin, ConditionalResponseMixin):
     model = Task
+    json_response_class = FastJsonResponse
+
     def get(self, request, *args, **kwargs):
-        task = self.get_object()
-        return self.json_success('', {'task': format_task_data(task)})
-    
-    def get_object(self, queryset=None):
-        return get_object_or_404(Task, id=self.kwargs['pk'], user=self.request.user)
+        try:
+            fields = select_fields(request.GET.get('fields'))
+        except InvalidFields as e:
+            return self.json_error(str(e), 400)
+
+        row = self.get_row(fields)
+        updated_at = row['updated_at']
+        etag = f'task-{row["id"]}-{updated_at.timestamp()}'
+        not_modified = self.not_modified(request, etag)
+        if not_modified is not None:
+            return not_modified
+        response = self.json_success('', {'task': serialize_rows([row], fields)[0]})
+        return self.with_validators(response, etag)
+
+    def get_row(self, fields):
+        # Lê apenas as colunas pedidas, mais as usadas nos validadores
+        columns = dict.fromkeys((*fields, 'id', 'updated_at'))
+        row = Task.objects.filter(id=self.kwargs['pk'], user=self.request.user).values(*columns).first()
+        if row is None:
+            raise Http404('Tarefa não encontrada')
+        return row
 
 
 #apartir daqui eu cansei de contar a contagem de linhas so irei continuar refatorando
@@ -165,41 +245,528 @@ class TaskCompleteView(LoginRequiredMixin,View,JsonResponseMixin):
 
     model = Task
     fields = ['status']
+    json_response_class = FastJsonResponse
 
     def post(self, request, *args, **kwargs):
         try:
-            task = self.get_object()
-            task.status = Status.COMPLETED
-            task.save()
-            return self.json_success(f'Tarefa "{task.title}" marcada como concluída!')
+            # Corpo JSON opcional: {"version": n} ativa a checagem de concorrência
+            data = self.validate_json_request(request) if request.content_type == 'application/json' else {}
+            if isinstance(data, HttpResponse):
+                return data
+            expected_version = parse_expected_version(data)
+
+            row = services.complete_task(request.user, self.kwargs['pk'], expected_version)
+            return self.json_success(
+                f'Tarefa "{row["title"]}" marcada como concluída!',
+                {'task': serialize_rows([row])[0]}
+            )
 
-        except Task.DoesNotExist:
+        except ValueError as e:
+            return self.json_error(str(e), 400)
+        except services.TaskNotFound:
             return self.json_error('Tarefa não encontrada', 404)
-        except Exception as e:
-            return self.json_error(f'Erro interno do servidor: {e}', 500)
+        except services.VersionConflict as e:
+            return self.json_error(str(e), 409, {'current_version': e.current_version})
+        except Exception:
+            logger.exception('Erro ao concluir tarefa do usuário %s', request.user.pk)
+            return self.json_error('Erro interno do servidor', 500)
 
-        
-    def get_object(self, queryset=None):
-        return get_object_or_404(Task, id=self.kwargs['pk'], user=self.request.user)
 
 
+class TaskListView(LoginRequiredMixin, UserCacheMixin, View, JsonResponseMixin):
+    """Listagem JSON das tarefas com paginação por cursor (created_at, id)"""
 
-class AllTasksDateView(LoginRequiredMixin, View,JsonResponseMixin):
+    default_page_size = 20
+    max_page_size = 100
+    json_response_class = FastJsonResponse
 
     def get(self, request, *args, **kwargs):
         try:
-            tasks = Task.objects.filter(user=request.user)
-            dates = tasks.values_list('created_at', flat=True)
-            
-            counts = {month[1]: 0 for month in Months.choices}
-            
-            for dt in dates:
-                if dt:
-                    month = dt.strftime('%m')
-                    month_name = dict(Months.choices)[month]
-                    counts[month_name] += 1
-            
-            return self.json_success('', {'counts': counts})
+            fields = select_fields(request.GET.get('fields'))
+        except InvalidFields as e:
+            return self.json_error(str(e), 400)
+
+        queryset = Task.objects.filter(user=request.user)
+        status_filter = request.GET.get('status', '')
+        if status_filter:
+            queryset = queryset.filter(status=status_filter)
+        # id e created_at são sempre lidos porque formam o cursor
+        queryset = queryset.values(*dict.fromkeys((*fields, 'id', 'created_at')))
+
+        try:
+            page_size = int(request.GET.get('page_size', self.default_page_size))
+        except ValueError:
+            return self.json_error('Tamanho de página inválido', 400)
+        page_size = max(1, min(page_size, self.max_page_size))
+
+        cursor = request.GET.get('cursor')
+        if not cursor and status_filter in ('', *Status.values):
+            # Primeira página sai do cache do usuário, já serializada
+            payload = self.user_cache.get_or_set(
+                f'list:{status_filter}:{",".join(fields)}:{page_size}',
+                lambda: self.get_page_payload(queryset, page_size, None, fields),
+            )
+            return self.json_success('', payload)
+
+        try:
+            return self.json_success('', self.get_page_payload(queryset, page_size, cursor, fields))
+        except InvalidCursor as e:
+            return self.json_error(str(e), 400)
+
+    def get_page_payload(self, queryset, page_size, cursor, fields):
+        page = CursorPaginator(queryset, page_size).page(cursor)
+        return {
+            'tasks': serialize_rows(page, fields),
+            'next_cursor': page.next_cursor,
+            'previous_cursor': page.previous_cursor,
+        }
+
+
+class TaskBulkView(LoginRequiredMixin, View, JsonResponseMixin):
+    """
+    API para aplicar várias operações de tarefa em uma única requisição.
+
+    Corpo esperado:
+        {"operations": [
+            {"op": "create", "data": {"title": "...", "description": "...", "status": "..."}},
+            {"op": "update", "id": 1, "version": 4, "data": {...}},
+            {"op": "complete", "id": 2},
+            {"op": "delete", "id": 3}
+        ]}
+
+    Cada operação é validada individualmente e as válidas são aplicadas
+    dentro de uma transação: as criações com um bulk_create e as demais
+    com UPDATEs condicionais por tarefa (versão e status no WHERE, como em
+    services.update_task), de modo que uma escrita concorrente vira
+    conflito no item em vez de ser sobrescrita. O resultado de cada item é
+    devolvido na mesma ordem do pedido. O campo "version" é opcional; sem
+    ele vale a versão lida no início da transação.
+    """
+
+    max_operations = 500
+    operations = ('create', 'update', 'complete', 'delete')
+    json_response_class = FastJsonResponse
+
+    def post(self, request, *args, **kwargs):
+        data = self.validate_json_request(request)
+        if isinstance(data, HttpResponse):
+            return data
+
+        operations = data.get('operations') if isinstance(data, dict) else None
+        if not isinstance(operations, list) or not operations:
+            return self.json_error('Nenhuma operação informada', 400)
+        if len(operations) > self.max_operations:
+            return self.json_error(f'Máximo de {self.max_operations} operações por requisição', 400)
+
+        try:
+            ids = {op.get('id') for op in operations if isinstance(op, dict) and self.is_task_id(op.get('id'))}
+            results = [None] * len(operations)
+            to_create, to_write, to_delete = [], [], []
+            referenced = set()
+            delta = Counter()
+            now = timezone.now()
+
+            with transaction.atomic():
+                # Uma única consulta para todas as tarefas referenciadas no lote,
+                # dentro da transação e travada onde o banco suporta: as escritas
+                # abaixo partem desse estado, e os UPDATEs ainda o conferem no WHERE
+                owned = Task.objects.filter(user=request.user).select_for_update().in_bulk(ids) if ids else {}
+
+                for index, op in enumerate(operations):
+                    kind = op.get('op') if isinstance(op, dict) else None
+                    if kind not in self.operations:
+                        results[index] = {'index': index, 'success': False, 'error': 'Operação inválida'}
+                        continue
+
+                    payload = op.get('data', {})
+                    if kind in ('create', 'update') and not isinstance(payload, dict):
+                        results[index] = {'index': index, 'op': kind, 'id': op.get('id'), 'success': False, 'error': 'Dados inválidos'}
+                        continue
+
+                    if kind == 'create':
+                        form = TaskForm(payload)
+                        if not form.is_valid():
+                            results[index] = {'index': index, 'op': kind, 'success': False, 'error': form.errors.get_json_data()}
+                            continue
+                        task = form.save(commit=False)
+                        task.user = request.user
+                        to_create.append((index, task))
+                        delta.update(stats.created_delta(task.status))
+                        continue
+
+                    # True == 1 em Python: ids booleanos não podem achar a tarefa 1
+                    task = owned.get(op.get('id')) if self.is_task_id(op.get('id')) else None
+                    if task is None:
+                        results[index] = {'index': index, 'op': kind, 'id': op.get('id'), 'success': False, 'error': 'Tarefa não encontrada'}
+                        continue
+                    if task.id in referenced:
+                        results[index] = {'index': index, 'op': kind, 'id': task.id, 'success': False, 'error': 'Tarefa já referenciada em outra operação do lote'}
+                        continue
+                    try:
+                        expected_version = parse_expected_version(op)
+                    except ValueError as e:
+                        results[index] = {'index': index, 'op': kind, 'id': task.id, 'success': False, 'error': str(e)}
+                        continue
+                    referenced.add(task.id)
+                    # A versão esperada vai para o WHERE do UPDATE; se não
+                    # confere, o item vira conflito
+                    if expected_version is None:
+                        expected_version = task.version
+
+                    if kind == 'update':
+                        form = TaskForm(payload, instance=Task(id=task.id, user=request.user))
+                        if not form.is_valid():
+                            results[index] = {'index': index, 'op': kind, 'id': task.id, 'success': False, 'error': form.errors.get_json_data()}
+                            continue
+                        changes = {field: form.cleaned_data[field] for field in TaskForm.Meta.fields}
+                        to_write.append((index, kind, task, expected_version, changes))
+                    elif kind == 'complete':
+                        to_write.append((index, kind, task, expected_version, {'status': Status.COMPLETED}))
+                    else:
+                        to_delete.append((index, task, expected_version))
+
+                if to_create:
+                    Task.objects.bulk_create([task for _, task in to_create])
+
+                # Mesmas guardas de services.update_task e delete_task: só conta
+                # nos contadores o que o UPDATE de fato alterou
+                indexed, events = [task for _, task in to_create], []
+                for index, kind, task, expected_version, changes in to_write:
+                    row = services.conditional_update(request.user.pk, task.id, changes, expected_version, task.status)
+                    if row is None:
+                        results[index] = self.conflict(index, kind, task.id)
+                        continue
+                    delta.update(stats.status_change_delta(task.status, row['status']))
+                    if kind == 'update':
+                        indexed.append(Task(id=task.id, user_id=request.user.pk, title=row['title'], description=row['description']))
+                    completed = kind == 'complete' and task.status != Status.COMPLETED
+                    serialized = serialize_rows([row])[0]
+                    events.append(('task.completed' if completed else 'task.updated', serialized))
+                    results[index] = {'index': index, 'op': kind, 'id': task.id, 'success': True, 'task': serialized}
+
+                deleted_ids = []
+                for index, task, expected_version in to_delete:
+                    deleted = Task.objects.filter(
+                        id=task.id, status=task.status, version=expected_version, deleted_at__isnull=True
+                    ).update(deleted_at=now)
+                    if not deleted:
+                        results[index] = self.conflict(index, 'delete', task.id)
+                        continue
+                    delta.update(stats.deleted_delta(task.status))
+                    deleted_ids.append(task.id)
+                    results[index] = {'index': index, 'op': 'delete', 'id': task.id, 'success': True}
+
+                services.record_changes(
+                    request.user.pk,
+                    delta,
+                    indexed=indexed,
+                    removed=deleted_ids,
+                    events=[
+                        *(('task.created', serialize_task(task)) for _, task in to_create),
+                        *events,
+                        *(('task.deleted', {'id': task_id}) for task_id in deleted_ids),
+                    ],
+                )
+
+            for index, task in to_create:
+                results[index] = {
+                    'index': index,
+                    'op': operations[index]['op'],
+                    'id': task.id,
+                    'success': True,
+                    'task': serialize_task(task),
+                }
+
+            applied = sum(1 for result in results if result['success'])
+            return self.json_success(
+                f'{applied} de {len(operations)} operações aplicadas',
+                {'results': results}
+            )
+
+        except Exception:
+            logger.exception('Erro nas operações em lote do usuário %s', request.user.pk)
+            return self.json_error('Erro interno do servidor', 500)
+
+    @staticmethod
+    def is_task_id(value):
+        return isinstance(value, int) and not isinstance(value, bool)
+
+    @staticmethod
+    def conflict(index, kind, task_id):
+        """Resultado do item cujo UPDATE condicional não afetou nenhuma linha"""
+        current_version = Task.objects.filter(id=task_id).values_list('version', flat=True).first()
+        return {
+            'index': index, 'op': kind, 'id': task_id, 'success': False,
+            'error': 'Versão desatualizada', 'current_version': current_version,
+        }
+
+
+class TaskSearchView(LoginRequiredMixin, View, JsonResponseMixin):
+    """Busca textual nas tarefas do usuário, ordenada por relevância e paginada"""
+
+    default_page_size = 20
+    max_page_size = 100
+    json_response_class = FastJsonResponse
+
+    def get(self, request, *args, **kwargs):
+        query = request.GET.get('q', '').strip()
+        if not query:
+            return self.json_error('Informe o termo de busca', 400)
+
+        try:
+            page = max(1, int(request.GET.get('page', 1)))
+            page_size = int(request.GET.get('page_size', self.default_page_size))
+        except ValueError:
+            return self.json_error('Paginação inválida', 400)
+        page_size = max(1, min(page_size, self.max_page_size))
+
+        try:
+            fields = select_fields(request.GET.get('fields'))
+        except InvalidFields as e:
+            return self.json_error(str(e), 400)
+
+        try:
+            # Busca um item a mais para saber se existe próxima página sem COUNT(*)
+            ids = get_search_backend().search(
+                request.user.pk, query, limit=page_size + 1, offset=(page - 1) * page_size
+            )
+            has_next = len(ids) > page_size
+            ids = ids[:page_size]
+            rows = Task.objects.filter(user=request.user, id__in=ids).values(*dict.fromkeys((*fields, 'id')))
+            by_id = {row['id']: row for row in rows}
+
+            return self.json_success('', {
+                'tasks': serialize_rows((by_id[task_id] for task_id in ids if task_id in by_id), fields),
+                'page': page,
+                'has_next': has_next,
+            })
+        except Exception:
+            logger.exception('Erro na busca de tarefas do usuário %s', request.user.pk)
+            return self.json_error('Erro interno do servidor', 500)
+
+
+class TaskStatsView(LoginRequiredMixin, UserCacheMixin, View, JsonResponseMixin, ConditionalResponseMixin):
+    """
+    Contadores de tarefas por status do usuário, com ETag pela versão de
+    alterações. Com include_archived=1 as tarefas arquivadas somam em total
+    e completed.
+    """
+
+    def get(self, request, *args, **kwargs):
+        include_archived = parse_include_archived(request.GET)
+        snapshot = self.get_cached_snapshot()
+        changed_at = snapshot['changed_at']
+        etag = f'stats-{request.user.pk}-{snapshot["version"]}-{changed_at.timestamp()}-{int(include_archived)}'
+        not_modified = self.not_modified(request, etag)
+        if not_modified is not None:
+            return not_modified
+        response = self.json_success('', {'stats': stats.public_counts(snapshot, include_archived)})
+        return self.with_validators(response, etag)
+
+
+class AllTasksDateView(LoginRequiredMixin, UserCacheMixin, View,JsonResponseMixin, ConditionalResponseMixin):
+    """
+    Histograma mensal das tarefas do usuário, agrupado no banco.
+
+    Parâmetros opcionais:
+        year: ano a consultar (padrão: ano atual)
+        start / end: intervalo de datas (AAAA-MM-DD), tem prioridade sobre year
+        include_archived: 1 para somar as tarefas arquivadas
+
+    Os meses são calculados no fuso do projeto (America/Sao_Paulo) e cada
+    mês traz a quebra por status.
+    """
+
+    month_labels = dict(Months.choices)
+    max_months = 120
+
+    def get_period(self, request):
+        start = request.GET.get('start')
+        end = request.GET.get('end')
+        if start or end:
+            if not (start and end):
+                raise ValueError('Informe start e end')
+            start_date = date.fromisoformat(start)
+            end_date = date.fromisoformat(end)
+        else:
+            year = int(request.GET.get('year') or timezone.localdate().year)
+            start_date = date(year, 1, 1)
+            end_date = date(year, 12, 31)
+        if start_date > end_date:
+            raise ValueError('A data inicial deve ser anterior à final')
+        return start_date, end_date
+
+    def get(self, request, *args, **kwargs):
+        try:
+            start_date, end_date = self.get_period(request)
+        except ValueError:
+            return self.json_error('Período inválido', 400)
+
+        months = []
+        current = date(start_date.year, start_date.month, 1)
+        while current <= end_date:
+            months.append(current)
+            current = date(current.year + current.month // 12, current.month % 12 + 1, 1)
+        if len(months) > self.max_months:
+            return self.json_error(f'Intervalo máximo de {self.max_months} meses', 400)
+
+        include_archived = parse_include_archived(request.GET)
+        try:
+            snapshot = self.get_cached_snapshot()
+            changed_at = snapshot['changed_at']
+            etag = (
+                f'months-{request.user.pk}-{snapshot["version"]}-{changed_at.timestamp()}'
+                f'-{start_date}-{end_date}-{int(include_archived)}'
+            )
+            not_modified = self.not_modified(request, etag)
+            if not_modified is not None:
+                return not_modified
+
+            payload = self.user_cache.get_or_set(
+                f'months:{start_date}:{end_date}:{int(include_archived)}',
+                lambda: self.get_months_payload(start_date, end_date, months, include_archived),
+            )
+            response = self.json_success('', payload)
+            return self.with_validators(response, etag)
+
+        except Exception:
+            logger.exception('Erro no histograma mensal do usuário %s', request.user.pk)
+            return self.json_error('Erro interno do servidor', 500)
+
+    def get_months_payload(self, start_date, end_date, months, include_archived=False):
+        tz = timezone.get_current_timezone()
+        lower, upper = day_bounds(start_date, end_date)
+
+        sources = [Task, ArchivedTask] if include_archived else [Task]
+        by_month = {}
+        for model in sources:
+            rows = (
+                model.objects
+                .filter(user=self.request.user, created_at__gte=lower, created_at__lt=upper)
+                .annotate(month=TruncMonth('created_at', tzinfo=tz))
+                .values('month')
+                .annotate(**stats.stats_aggregate())
+                .order_by('month')
+            )
+            for row in rows:
+                current = by_month.setdefault((row['month'].year, row['month'].month), Counter())
+                current.update({field: row[field] for field in stats.COUNTER_FIELDS})
+
+        single_year = start_date.year == end_date.year
+        counts = {}
+        breakdown = []
+        for month in months:
+            row = by_month.get((month.year, month.month), {})
+            label = self.month_labels[f'{month.month:02d}']
+            if not single_year:
+                label = f'{label}/{month.year}'
+            counts[label] = row.get('total', 0)
+            breakdown.append({
+                'month': f'{month.year}-{month.month:02d}',
+                'label': label,
+                **{field: row.get(field, 0) for field in stats.COUNTER_FIELDS},
+            })
+
+        return {'counts': counts, 'months': breakdown}
+
+
+class EchoBuffer:
+    """Pseudo-arquivo para o csv.writer devolver cada linha em vez de acumular"""
+
+    def write(self, value):
+        return value
+
+
+class TaskExportView(LoginRequiredMixin, View, JsonResponseMixin):
+    """
+    Exportação das tarefas do usuário em NDJSON ou CSV via streaming.
+
+    Parâmetros opcionais: format (ndjson | csv), status, start / end
+    (AAAA-MM-DD) e fields. As linhas são lidas em blocos com iterator(), então
+    o uso de memória não depende da quantidade de tarefas e os primeiros
+    bytes saem assim que o primeiro bloco é lido.
+    """
+
+    chunk_size = 2000
+    formats = {
+        'ndjson': 'application/x-ndjson',
+        'csv': 'text/csv; charset=utf-8',
+    }
+
+    def get(self, request, *args, **kwargs):
+        export_format = request.GET.get('format', 'ndjson')
+        if export_format not in self.formats:
+            return self.json_error('Formato de exportação inválido', 400)
 
-        except Exception as e:
-            return self.json_error(f'Erro interno do servidor: {e}', 500)
+        try:
+            fields = select_fields(request.GET.get('fields'))
+            start = request.GET.get('start')
+            end = request.GET.get('end')
+            start_date = date.fromisoformat(start) if start else None
+            end_date = date.fromisoformat(end) if end else None
+            if start_date and end_date and start_date > end_date:
+                raise ValueError('A data inicial deve ser anterior à final')
+            lower, upper = day_bounds(start_date, end_date)
+        except InvalidFields as e:
+            return self.json_error(str(e), 400)
+        except ValueError:
+            return self.json_error('Período inválido', 400)
+
+        queryset = Task.objects.filter(user=request.user)
+        status_filter = request.GET.get('status', '')
+        if status_filter:
+            queryset = queryset.filter(status=status_filter)
+        if lower:
+            queryset = queryset.filter(created_at__gte=lower)
+        if upper:
+            queryset = queryset.filter(created_at__lt=upper)
+        rows = queryset.order_by('-created_at', '-id').values_list(*fields).iterator(chunk_size=self.chunk_size)
+
+        if export_format == 'csv':
+            content = self.stream_csv(rows, fields)
+        else:
+            content = self.stream_ndjson(rows, fields)
+
+        response = StreamingHttpResponse(content, content_type=self.formats[export_format])
+        filename = f'tarefas-{timezone.localdate():%Y%m%d}.{export_format}'
+        response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+    @staticmethod
+    def export_value(value):
+        # Datas em ISO 8601 para facilitar a importação em outras ferramentas
+        return value.isoformat() if isinstance(value, datetime) else value
+
+    def stream_ndjson(self, rows, fields):
+        for row in rows:
+            yield dumps(dict(zip(fields, map(self.export_value, row)))) + b'\n'
+
+    def stream_csv(self, rows, fields):
+        writer = csv.writer(EchoBuffer())
+        yield '\ufeff' + writer.writerow(fields)  # BOM para o Excel reconhecer UTF-8
+        for row in rows:
+            yield writer.writerow([self.export_value(value) for value in row])
+
+
+
+class MetricsView(View):
+    """
+    Métricas por view no formato texto do Prometheus (ver metrics.py).
+
+    Só para staff logado ou, para o coletor do Prometheus, com o cabeçalho
+    "Authorization: Bearer <TASK_METRICS_TOKEN>" quando essa setting existe.
+    """
+
+    def get(self, request, *args, **kwargs):
+        if not self.is_authorized(request):
+            return HttpResponse('Acesso negado', status=403, content_type='text/plain; charset=utf-8')
+        body = render_prometheus(get_metrics().collect())
+        return HttpResponse(body, content_type='text/plain; version=0.0.4; charset=utf-8')
+
+    @staticmethod
+    def is_authorized(request):
+        if request.user.is_authenticated and request.user.is_staff:
+            return True
+        token = getattr(settings, 'TASK_METRICS_TOKEN', None)
+        header = request.headers.get('Authorization', '')
+        return bool(token) and header.startswith('Bearer ') and constant_time_compare(header[7:], token)
@@ -7,6 +7,8 @@ from .forms import CustomUserCreationForm, CustomAuthenticationForm, SecondStepR
 from django.views.generic import DeleteView, FormView, ListView, CreateView, UpdateView,DetailView
 from django.views import View
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.db import transaction
+from ToDo_app import jobs
 
 class AuthRegisterView(FormView):
     form_class = CustomUserCreationForm
@@ -89,6 +91,11 @@ class LogoutView(LoginRequiredMixin, View):
 class DeleteAccountView(LoginRequiredMixin, View):
     def get(self, request, *args, **kwargs):
         user = request.user
-        user.delete()
+        # Exclusão lógica; as tarefas e o endereço são apagados em segundo
+        # plano pelo job purge_account (ou pelo comando purge_deleted)
+        with transaction.atomic():
+            user.soft_delete()
+            jobs.enqueue('purge_account', {'user_id': user.pk})
+        auth_logout(request)
         messages.success(request, 'Sua conta foi deletada com sucesso.')
         return redirect('tasks:index')
\ No newline at end of file
@@ -10,8 +10,12 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
+import tempfile
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -43,6 +47,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Primeiro da lista: o tempo medido inclui os demais middlewares
+    'ToDo_app.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -62,13 +68,19 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            # Templates compilados uma vez por processo (APP_DIRS vira o app_directories.Loader)
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
         },
     },
 ]
@@ -78,14 +90,99 @@ WSGI_APPLICATION = 'ToDo_proj.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
+#
+# Perfil escolhido pela variável de ambiente DJANGO_DB_PROFILE:
+#   sqlite (padrão)  SQLite ajustado para escritores concorrentes: WAL e
+#                    pragmas aplicados a cada conexão (ToDo_app/db.py),
+#                    transações IMMEDIATE e conexões persistentes
+#   sqlite-basic     SQLite sem ajustes (referência do bench_db_concurrency)
+#   postgres         PostgreSQL (DJANGO_DB_NAME, DJANGO_DB_USER, ...) com
+#                    conexões persistentes, ou com o pool do psycopg quando
+#                    DJANGO_DB_POOL_MAX_SIZE estiver definido
+
+DB_PROFILE = os.environ.get('DJANGO_DB_PROFILE', 'sqlite')
+
+if DB_PROFILE == 'postgres':
+    _pool_max_size = int(os.environ.get('DJANGO_DB_POOL_MAX_SIZE') or 0)
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DJANGO_DB_NAME', 'todo'),
+            'USER': os.environ.get('DJANGO_DB_USER', 'todo'),
+            'PASSWORD': os.environ.get('DJANGO_DB_PASSWORD', ''),
+            'HOST': os.environ.get('DJANGO_DB_HOST', 'localhost'),
+            'PORT': os.environ.get('DJANGO_DB_PORT', '5432'),
+            # Pool e conexões persistentes são exclusivos no Django
+            'CONN_MAX_AGE': 0 if _pool_max_size else 600,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {'pool': {'min_size': 2, 'max_size': _pool_max_size}} if _pool_max_size else {},
+        }
+    }
+elif DB_PROFILE == 'sqlite-basic':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('DJANGO_DB_NAME') or BASE_DIR / 'db.sqlite3',
+        }
+    }
+elif DB_PROFILE == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('DJANGO_DB_NAME') or BASE_DIR / 'db.sqlite3',
+            'CONN_MAX_AGE': 600,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                # Espera pela trava de escrita em vez de falhar na hora
+                'timeout': 20,
+                # BEGIN IMMEDIATE: a trava de escrita é pega no início da
+                # transação, e não ao subir de leitura para escrita no meio
+                # dela, o que o SQLite recusa com "database is locked" sem
+                # esperar o timeout
+                'transaction_mode': 'IMMEDIATE',
+            },
+        }
+    }
+else:
+    raise ImproperlyConfigured(f'DJANGO_DB_PROFILE desconhecido: {DB_PROFILE}')
 
-DATABASES = {
+# Pragmas aplicados a cada nova conexão SQLite (ToDo_app/db.py), por alias
+SQLITE_PRAGMAS = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': 20000,
+        'mmap_size': 256 * 1024 * 1024,
+        'cache_size': -32000,  # em KiB (32 MB)
+        'temp_store': 'MEMORY',
+    },
+} if DB_PROFILE == 'sqlite' else {}
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
+    # LRU em memória de cada processo, limitado a MAX_ENTRIES chaves
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'todo-local',
+        'TIMEOUT': 300,
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    },
+    # Compartilhado entre os workers da máquina (versões de cache dos usuários)
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': Path(tempfile.gettempdir()) / 'todo_django_cache',
+        'TIMEOUT': 300,
+        'OPTIONS': {'MAX_ENTRIES': 20000},
+    },
 }
 
+# Aliases usados pelo cache do dashboard (ToDo_app/cache.py)
+TASK_CACHE_DATA = 'default'
+TASK_CACHE_VERSIONS = 'shared'
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -1,6 +1,15 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
 
 
 class TodoUserAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'ToDo_user_app'
+
+    def ready(self):
+        from .snapshot import user_deleted, user_saved
+
+        # Escritas nos usuários invalidam o resumo do painel administrativo
+        post_save.connect(user_saved, sender=settings.AUTH_USER_MODEL, dispatch_uid='admin_snapshot_user_saved')
+        post_delete.connect(user_deleted, sender=settings.AUTH_USER_MODEL, dispatch_uid='admin_snapshot_user_deleted')
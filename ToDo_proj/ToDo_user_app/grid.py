@@ -0,0 +1,333 @@
+"""
+Row model do AG-Grid do painel administrativo (modelo "infinite").
+
+O grid pede um bloco de linhas por vez (startRow/endRow) junto com o
+sortModel e o filterModel atuais; aqui eles viram um queryset ordenado e
+filtrado no banco, e só o bloco pedido é serializado. As colunas do grid
+são campos calculados (nome completo, idade, rótulos), por isso cada uma
+é mapeada para a coluna real do banco que a ordena e filtra.
+"""
+
+import json
+from datetime import date, datetime, time, timedelta
+
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .stats import years_before
+
+
+GENDER_LABELS = {'M': 'Masculino', 'F': 'Feminino', 'O': 'Outro'}
+USER_TYPE_LABELS = {'A': 'Admin', 'U': 'Usuário', 'O': 'Observer'}
+ACTIVE_LABELS = {True: 'Ativo', False: 'Inativo'}
+
+# Linhas por requisição: o grid pede blocos de cacheBlockSize (100)
+MAX_BLOCK_SIZE = 500
+
+ROW_FIELDS = (
+    'id', 'first_name', 'last_name', 'email', 'birthdate', 'gender',
+    'user_type', 'is_active', 'date_joined',
+)
+
+# Coluna do grid -> colunas do banco na ordenação crescente
+SORT_FIELDS = {
+    'id': ('id',),
+    'full_name': ('first_name', 'last_name'),
+    'email': ('email',),
+    # Idade crescente = nascimento mais recente primeiro
+    'age': ('-birthdate',),
+    'gender_display': ('gender',),
+    'user_type_display': ('user_type',),
+    'is_active': ('is_active',),
+    'date_joined_formatted': ('date_joined',),
+}
+
+
+def parse_block_request(params):
+    """
+    Lê startRow, endRow, sortModel e filterModel (os dois últimos em JSON)
+    da query string. Levanta ValueError se algum for inválido.
+    """
+    try:
+        start = int(params.get('startRow', 0))
+        end = int(params.get('endRow', start + 100))
+        sort_model = json.loads(params.get('sortModel') or '[]')
+        filter_model = json.loads(params.get('filterModel') or '{}')
+    except (TypeError, ValueError):
+        raise ValueError('Parâmetros do grid inválidos')
+    if start < 0 or end <= start:
+        raise ValueError('Intervalo de linhas inválido')
+    if not isinstance(sort_model, list) or not isinstance(filter_model, dict):
+        raise ValueError('Parâmetros do grid inválidos')
+    return start, min(end, start + MAX_BLOCK_SIZE), sort_model, filter_model
+
+
+def apply_sort(queryset, sort_model):
+    """
+    Ordena pelo sortModel do grid, com o id como desempate para a paginação
+    ser estável. Colunas que aceitam NULL (nascimento, gênero) deixam os
+    vazios no fim nos dois sentidos.
+    """
+    ordering = []
+    descending = False
+    for item in sort_model:
+        if not isinstance(item, dict) or item.get('sort', 'asc') not in ('asc', 'desc'):
+            raise ValueError('Ordenação inválida')
+        column = item.get('colId')
+        if not isinstance(column, str) or column not in SORT_FIELDS:
+            raise ValueError(f'Coluna não ordenável: {column}')
+        for field in SORT_FIELDS[column]:
+            descending = field.startswith('-') != (item.get('sort') == 'desc')
+            name = field.lstrip('-')
+            if queryset.model._meta.get_field(name).null:
+                ordering.append(F(name).desc(nulls_last=True) if descending else F(name).asc(nulls_last=True))
+            else:
+                ordering.append(f'-{name}' if descending else name)
+    if 'id' not in ordering and '-id' not in ordering:
+        ordering.append('-id' if descending else 'id')
+    return queryset.order_by(*ordering)
+
+
+def apply_filters(queryset, filter_model, today=None):
+    """Aplica o filterModel do grid (um filtro por coluna, com até duas condições)"""
+    today = today or timezone.localdate()
+    for column, model in filter_model.items():
+        builder = FILTERS.get(column)
+        if builder is None:
+            raise ValueError(f'Coluna não filtrável: {column}')
+        if not isinstance(model, dict):
+            raise ValueError(f'Filtro inválido: {column}')
+        if 'conditions' in model:
+            conditions = model['conditions']
+            if not isinstance(conditions, list) or not conditions:
+                raise ValueError(f'Filtro inválido: {column}')
+            conditions = [builder(validate_condition(column, condition), today) for condition in conditions]
+            combined = conditions[0]
+            for condition in conditions[1:]:
+                combined = combined | condition if model.get('operator') == 'OR' else combined & condition
+        else:
+            combined = builder(validate_condition(column, model), today)
+        queryset = queryset.filter(combined)
+    return queryset
+
+
+def validate_condition(column, model):
+    """Uma condição do filterModel: dict com type e filter de tipos simples"""
+    if not isinstance(model, dict) or not isinstance(model.get('type', ''), str):
+        raise ValueError(f'Filtro inválido: {column}')
+    if isinstance(model.get('filter'), (dict, list)):
+        raise ValueError(f'Filtro inválido: {column}')
+    return model
+
+
+def filter_text(model):
+    return str(model.get('filter') or '')
+
+
+TEXT_LOOKUPS = {
+    'contains': 'icontains',
+    'equals': 'iexact',
+    'startsWith': 'istartswith',
+    'endsWith': 'iendswith',
+}
+
+
+def text_condition(field, model):
+    kind = model.get('type', 'contains')
+    value = filter_text(model)
+    if kind == 'blank':
+        return Q(**{f'{field}__isnull': True}) | Q(**{field: ''})
+    if kind == 'notBlank':
+        return ~Q(**{f'{field}__isnull': True}) & ~Q(**{field: ''})
+    if kind in ('notContains', 'notEqual'):
+        lookup = 'icontains' if kind == 'notContains' else 'iexact'
+        return ~Q(**{f'{field}__{lookup}': value})
+    if kind not in TEXT_LOOKUPS:
+        raise ValueError(f'Tipo de filtro não suportado: {kind}')
+    return Q(**{f'{field}__{TEXT_LOOKUPS[kind]}': value})
+
+
+def label_matches(label, model):
+    kind = model.get('type', 'contains')
+    value = filter_text(model).lower()
+    label = label.lower()
+    return {
+        'contains': value in label,
+        'notContains': value not in label,
+        'equals': label == value,
+        'notEqual': label != value,
+        'startsWith': label.startswith(value),
+        'endsWith': label.endswith(value),
+    }.get(kind, False)
+
+
+def choice_filter(field, labels):
+    """
+    Colunas que mostram rótulos (Masculino, Admin...): o texto do filtro é
+    comparado com os rótulos e vira um field__in com os códigos que casaram
+    """
+    def build(model, today):
+        if model.get('type') == 'blank':
+            return Q(**{f'{field}__isnull': True})
+        if model.get('type') == 'notBlank':
+            return Q(**{f'{field}__isnull': False})
+        codes = [code for code, label in labels.items() if label_matches(label, model)]
+        return Q(**{f'{field}__in': codes})
+    return build
+
+
+def full_name_filter(model, today):
+    # O texto pode estar no nome ou no sobrenome; nas negações, em nenhum dos dois
+    first, last = text_condition('first_name', model), text_condition('last_name', model)
+    if model.get('type') in ('notContains', 'notEqual', 'blank'):
+        return first & last
+    return first | last
+
+
+def birthdate_range(age, today):
+    """Nascimentos de quem tem exatamente essa idade hoje: (início, fim] """
+    return years_before(today, age + 1), years_before(today, age)
+
+
+def age_filter(model, today):
+    """Filtro numérico de idade traduzido para intervalos de birthdate"""
+    kind = model.get('type', 'equals')
+    if kind == 'blank':
+        return Q(birthdate__isnull=True)
+    if kind == 'notBlank':
+        return Q(birthdate__isnull=False)
+    try:
+        age = int(model['filter'])
+    except (KeyError, TypeError, ValueError):
+        raise ValueError('Idade inválida no filtro')
+    oldest, youngest = birthdate_range(age, today)
+    if kind == 'equals':
+        return Q(birthdate__gt=oldest, birthdate__lte=youngest)
+    if kind == 'notEqual':
+        return Q(birthdate__lte=oldest) | Q(birthdate__gt=youngest)
+    if kind == 'lessThan':
+        return Q(birthdate__gt=youngest)
+    if kind == 'lessThanOrEqual':
+        return Q(birthdate__gt=oldest)
+    if kind == 'greaterThan':
+        return Q(birthdate__lte=oldest)
+    if kind == 'greaterThanOrEqual':
+        return Q(birthdate__lte=youngest)
+    if kind == 'inRange':
+        try:
+            upper = int(model['filterTo'])
+        except (KeyError, TypeError, ValueError):
+            raise ValueError('Idade inválida no filtro')
+        return Q(birthdate__gt=birthdate_range(upper, today)[0], birthdate__lte=youngest)
+    raise ValueError(f'Tipo de filtro não suportado: {kind}')
+
+
+def parse_grid_date(value):
+    # O filtro de data do AG-Grid manda "AAAA-MM-DD hh:mm:ss"
+    try:
+        return date.fromisoformat(str(value)[:10])
+    except ValueError:
+        raise ValueError('Data inválida no filtro')
+
+
+def local_midnight(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def date_joined_filter(model, today):
+    """
+    Filtro de data do cadastro como intervalos de date_joined (um dia local
+    vira [00:00, 00:00 do dia seguinte)), sem __date, que impediria o índice
+    """
+    kind = model.get('type', 'equals')
+    if kind == 'blank':
+        return Q(date_joined__isnull=True)
+    if kind == 'notBlank':
+        return Q(date_joined__isnull=False)
+    day = parse_grid_date(model.get('dateFrom'))
+    start, end = local_midnight(day), local_midnight(day + timedelta(days=1))
+    if kind == 'equals':
+        return Q(date_joined__gte=start, date_joined__lt=end)
+    if kind == 'notEqual':
+        return Q(date_joined__lt=start) | Q(date_joined__gte=end)
+    if kind == 'lessThan':
+        return Q(date_joined__lt=start)
+    if kind == 'greaterThan':
+        return Q(date_joined__gte=end)
+    if kind == 'inRange':
+        last_day = parse_grid_date(model.get('dateTo'))
+        return Q(date_joined__gte=start, date_joined__lt=local_midnight(last_day + timedelta(days=1)))
+    raise ValueError(f'Tipo de filtro não suportado: {kind}')
+
+
+def id_filter(model, today):
+    kind = model.get('type', 'equals')
+    try:
+        value = int(model['filter'])
+        upper = int(model.get('filterTo', value))
+    except (KeyError, TypeError, ValueError):
+        raise ValueError('ID inválido no filtro')
+    lookups = {
+        'equals': 'exact', 'lessThan': 'lt', 'lessThanOrEqual': 'lte',
+        'greaterThan': 'gt', 'greaterThanOrEqual': 'gte',
+    }
+    if kind == 'notEqual':
+        return ~Q(id=value)
+    if kind == 'inRange':
+        return Q(id__gte=value, id__lte=upper)
+    if kind not in lookups:
+        raise ValueError(f'Tipo de filtro não suportado: {kind}')
+    return Q(**{f'id__{lookups[kind]}': value})
+
+
+FILTERS = {
+    'id': id_filter,
+    'full_name': full_name_filter,
+    'email': lambda model, today: text_condition('email', model),
+    'age': age_filter,
+    'gender_display': choice_filter('gender', {**GENDER_LABELS, None: 'Não informado'}),
+    'user_type_display': choice_filter('user_type', USER_TYPE_LABELS),
+    'is_active': choice_filter('is_active', ACTIVE_LABELS),
+    'date_joined_formatted': date_joined_filter,
+}
+
+
+def age_on(birthdate, today):
+    if not birthdate:
+        return None
+    return today.year - birthdate.year - ((today.month, today.day) < (birthdate.month, birthdate.day))
+
+
+def serialize_row(user, today):
+    """Linha do grid a partir de um dict de values(ROW_FIELDS)"""
+    return {
+        'id': user['id'],
+        'full_name': f"{user['first_name']} {user['last_name']}",
+        'email': user['email'],
+        'age': age_on(user['birthdate'], today),
+        'gender_display': GENDER_LABELS.get(user['gender'], 'Não informado'),
+        'user_type_display': USER_TYPE_LABELS.get(user['user_type'], 'Usuário'),
+        'user_type_code': user['user_type'],
+        'is_active': user['is_active'],
+        'date_joined_formatted': timezone.localtime(user['date_joined']).strftime('%d/%m/%Y') if user['date_joined'] else '',
+    }
+
+
+def load_block(queryset, params):
+    """
+    Executa o pedido do grid sobre o queryset de usuários. Retorna as linhas
+    do bloco e o total de linhas filtradas; o total só é contado no primeiro
+    bloco (o grid guarda o valor até mudar a ordenação ou o filtro) ou
+    quando o bloco vem incompleto e o fim fica evidente. Nos demais, None.
+    """
+    start, end, sort_model, filter_model = parse_block_request(params)
+    today = timezone.localdate()
+    queryset = apply_sort(apply_filters(queryset, filter_model, today), sort_model)
+    rows = [serialize_row(user, today) for user in queryset.values(*ROW_FIELDS)[start:end]]
+    if len(rows) < end - start:
+        row_count = start + len(rows)
+    elif start == 0:
+        row_count = queryset.count()
+    else:
+        row_count = None
+    return rows, row_count
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from ToDo_user_app.snapshot import refresh_snapshot
+
+
+class Command(BaseCommand):
+    help = (
+        'Recalcula o resumo do painel administrativo (cards e gráficos) guardado no cache. '
+        'Agende com intervalo menor que ADMIN_SNAPSHOT_TIMEOUT para que o painel nunca calcule na abertura.'
+    )
+
+    def handle(self, *args, **options):
+        snapshot = refresh_snapshot()
+        self.stdout.write(self.style.SUCCESS(
+            f'Resumo do painel atualizado: {snapshot["total"]} usuários, {snapshot["active"]} ativos'
+        ))
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:31
+
+import ToDo_user_app.models
+import django.contrib.auth.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ToDo_user_app', '0003_address_formatted_address'),
+    ]
+
+    operations = [
+        migrations.AlterModelManagers(
+            name='usuario',
+            managers=[
+                ('objects', ToDo_user_app.models.UsuarioManager()),
+                ('all_objects', django.contrib.auth.models.UserManager()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='usuario',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, help_text='Preenchido na exclusão da conta; o usuário e as tarefas são apagados depois pelo comando purge_deleted', null=True, verbose_name='Excluído em'),
+        ),
+    ]
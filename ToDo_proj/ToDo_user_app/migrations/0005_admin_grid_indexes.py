@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ToDo_user_app', '0004_soft_delete'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='usuario',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['date_joined', 'id'], name='usuario_joined_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usuario',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['first_name', 'last_name', 'id'], name='usuario_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usuario',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['email', 'id'], name='usuario_email_idx'),
+        ),
+    ]
@@ -1,6 +1,33 @@
+import uuid
+
 from django.db import models
+from django.db.models import Value
+from django.db.models.functions import Cast, Concat
+from django.utils import timezone
 from . import choices as ch
-from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import AbstractUser, UserManager
+
+
+DELETED_USERNAME_PREFIX = 'excluido-'
+
+
+class UsuarioManager(UserManager):
+    """Gerenciador padrão: esconde as contas excluídas que aguardam o expurgo"""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+    def soft_delete(self, ids):
+        """
+        Usuario.soft_delete em lote, com um único UPDATE. O username novo
+        leva o id da conta, o que já o torna único.
+        """
+        return self.filter(pk__in=ids).update(
+            deleted_at=timezone.now(),
+            is_active=False,
+            username=Concat(Value(DELETED_USERNAME_PREFIX), Cast('pk', models.CharField()), Value(f'-{uuid.uuid4().hex[:8]}')),
+            cpf=None,
+        )
 
 
 
@@ -13,15 +40,45 @@ class Usuario(AbstractUser):
     user_type = models.CharField(max_length=1, choices=ch.User_type.choices, null=False, blank=False, default=ch.User_type.USER, verbose_name="Tipo de Usuário")
     next_step = models.BooleanField(null=False, blank=False, default=False, verbose_name="Próximo Passo")
     profile_completed = models.BooleanField(null=False, blank=False, default=False, verbose_name="Perfil Completo")
+    deleted_at = models.DateTimeField(null=True, blank=True, verbose_name="Excluído em", help_text="Preenchido na exclusão da conta; o usuário e as tarefas são apagados depois pelo comando purge_deleted")
 
+    objects = UsuarioManager()
+    # Inclui as contas excluídas (expurgo e manutenção)
+    all_objects = UserManager()
 
     class Meta:
         verbose_name = "Usuário"
         verbose_name_plural = "Usuários"
+        indexes = [
+            # Ordenações do grid do painel administrativo (ver grid.py), só
+            # com as contas ativas; o id no fim é o desempate da paginação
+            models.Index(fields=['date_joined', 'id'], name='usuario_joined_idx',
+                         condition=models.Q(deleted_at__isnull=True)),
+            models.Index(fields=['first_name', 'last_name', 'id'], name='usuario_name_idx',
+                         condition=models.Q(deleted_at__isnull=True)),
+            models.Index(fields=['email', 'id'], name='usuario_email_idx',
+                         condition=models.Q(deleted_at__isnull=True)),
+            # Faixas etárias do gráfico de idade e filtro/ordenação por idade
+            models.Index(fields=['birthdate'], name='usuario_birthdate_idx',
+                         condition=models.Q(deleted_at__isnull=True)),
+        ]
     
     def __str__(self):
         return f"{self.username} - {self.get_user_type_display()}"
 
+    def soft_delete(self):
+        """
+        Exclui a conta com um único UPDATE: a conta some das consultas e do
+        login na hora, e as tarefas e o endereço são apagados em blocos pelo
+        comando purge_deleted. Username e CPF são liberados para que a pessoa
+        possa se cadastrar de novo antes do expurgo.
+        """
+        self.deleted_at = timezone.now()
+        self.is_active = False
+        self.username = f"{DELETED_USERNAME_PREFIX}{self.pk}-{uuid.uuid4().hex[:8]}"
+        self.cpf = None
+        self.save(update_fields=["deleted_at", "is_active", "username", "cpf"])
+
 
 class Address(models.Model):
     user = models.OneToOneField(Usuario, on_delete=models.CASCADE, verbose_name="Usuário")
@@ -38,8 +95,7 @@ class Address(models.Model):
         verbose_name = "Endereço"
         verbose_name_plural = "Endereços"
 
-    def save(self, *args, **kwargs):
-        # Gera o endereço formatado automaticamente
+    def build_formatted_address(self):
         address_parts = [
             f"{self.street}, {self.number}",
             self.complement if self.complement else None,
@@ -48,7 +104,11 @@ class Address(models.Model):
             self.zipcode
         ]
         # Remove partes vazias e junta com " - "
-        self.formatted_address = " - ".join(filter(None, address_parts))
+        return " - ".join(filter(None, address_parts))
+
+    def save(self, *args, **kwargs):
+        # Gera o endereço formatado automaticamente
+        self.formatted_address = self.build_formatted_address()
         super().save(*args, **kwargs)
 
     def __str__(self):
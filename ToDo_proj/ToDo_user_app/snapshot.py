@@ -0,0 +1,124 @@
+"""
+Resumo do painel administrativo (cards, gênero, faixas etárias, tipos de
+usuário e perfis completos) guardado pronto no cache.
+
+O resumo inteiro sai de uma única consulta agregada e fica no cache
+compartilhado entre os workers (ADMIN_SNAPSHOT_CACHE, padrão "shared"), de
+modo que abrir o painel custa uma leitura de cache. Ele é invalidado pelas
+escritas nos usuários que mudam algum número (receivers de post_save e
+post_delete, ligados em apps.py) e recalculado na leitura seguinte; o
+comando refresh_admin_stats recalcula de tempos em tempos. Como a idade e os
+"novos hoje" dependem da data, um resumo de outro dia é recalculado.
+"""
+
+from datetime import datetime, time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .grid import GENDER_LABELS, USER_TYPE_LABELS
+from .stats import AGE_BOUNDS, age_bucket_counts
+
+
+SNAPSHOT_KEY = 'admin:users:snapshot'
+
+# Campos que entram no resumo; salvar apenas outros (ex.: last_login a cada
+# login) não invalida
+SOURCE_FIELDS = frozenset((
+    'gender', 'birthdate', 'user_type', 'is_active', 'profile_completed', 'date_joined', 'deleted_at',
+))
+
+
+def _cache():
+    return caches[getattr(settings, 'ADMIN_SNAPSHOT_CACHE', 'shared')]
+
+
+def percentage(value, total):
+    return round(value / total * 100, 1) if total else 0
+
+
+def compute_snapshot():
+    """Calcula o resumo com uma consulta agregada (COUNTs condicionais)"""
+    now = timezone.now()
+    today = timezone.localdate(now)
+    today_start = timezone.make_aware(datetime.combine(today, time.min))
+
+    counts = {
+        'total': Count('id'),
+        'active': Count('id', filter=Q(is_active=True)),
+        'profile_completed': Count('id', filter=Q(profile_completed=True)),
+        'new_today': Count('id', filter=Q(date_joined__gte=today_start)),
+        'gender_none': Count('id', filter=Q(gender__isnull=True)),
+    }
+    counts.update({f'gender_{code}': Count('id', filter=Q(gender=code)) for code in GENDER_LABELS})
+    counts.update({f'type_{code}': Count('id', filter=Q(user_type=code)) for code in USER_TYPE_LABELS})
+    ages = age_bucket_counts(AGE_BOUNDS, today)
+    counts.update({f'age_{position}': count for position, count in enumerate(ages.values())})
+    row = get_user_model().objects.aggregate(**counts)
+
+    total = row['total']
+    genders = [(label, row[f'gender_{code}']) for code, label in GENDER_LABELS.items()]
+    genders.append(('Não informado', row['gender_none']))
+    return {
+        'date': today.isoformat(),
+        'computed_at': now.isoformat(),
+        'total': total,
+        'active': row['active'],
+        'inactive': total - row['active'],
+        'new_today': row['new_today'],
+        'profile_completed': {
+            'value': row['profile_completed'],
+            'percentage': percentage(row['profile_completed'], total),
+        },
+        'user_types': [
+            {'code': code, 'label': label, 'value': row[f'type_{code}']}
+            for code, label in USER_TYPE_LABELS.items()
+        ],
+        # Mesmo formato de admin_gender_stats e admin_age_stats
+        'gender': [
+            {'label': label, 'value': value, 'percentage': percentage(value, total)}
+            for label, value in genders if value
+        ],
+        'age': [
+            {'label': label, 'value': row[f'age_{position}']}
+            for position, label in enumerate(ages)
+        ],
+    }
+
+
+def refresh_snapshot():
+    """Recalcula e guarda o resumo"""
+    snapshot = compute_snapshot()
+    _cache().set(SNAPSHOT_KEY, snapshot, getattr(settings, 'ADMIN_SNAPSHOT_TIMEOUT', 900))
+    return snapshot
+
+
+def get_snapshot():
+    """Resumo em cache, recalculado se não houver ou se for de outro dia"""
+    snapshot = _cache().get(SNAPSHOT_KEY)
+    if snapshot is None or snapshot['date'] != timezone.localdate().isoformat():
+        snapshot = refresh_snapshot()
+    return snapshot
+
+
+def invalidate_snapshot():
+    """
+    Descarta o resumo na hora e de novo após o commit: um leitor concorrente
+    que leu o banco antes do commit pode ter guardado números antigos.
+    """
+    cache = _cache()
+    cache.delete(SNAPSHOT_KEY)
+    transaction.on_commit(lambda: cache.delete(SNAPSHOT_KEY))
+
+
+def user_saved(sender, instance, created, update_fields=None, **kwargs):
+    if created or update_fields is None or SOURCE_FIELDS.intersection(update_fields):
+        invalidate_snapshot()
+
+
+def user_deleted(sender, instance, **kwargs):
+    invalidate_snapshot()
@@ -0,0 +1,61 @@
+from django.db.models import Count, Q
+from django.utils import timezone
+
+
+# Início de cada faixa etária do gráfico de idade; a última faixa é aberta (56+)
+AGE_BOUNDS = (18, 26, 36, 46, 56)
+MAX_AGE_BUCKETS = 20
+
+
+def years_before(today, years):
+    """A data de hoje há tantos anos (29/02 vira 28/02 em anos não bissextos)"""
+    try:
+        return today.replace(year=today.year - years)
+    except ValueError:
+        return today.replace(year=today.year - years, day=28)
+
+
+def parse_age_bounds(params):
+    """
+    Parâmetro ?bounds=18,26,36,46,56 do gráfico de idade: idades iniciais
+    das faixas, em ordem crescente. Levanta ValueError se for inválido.
+    """
+    raw = params.get('bounds')
+    if not raw:
+        return AGE_BOUNDS
+    try:
+        bounds = tuple(int(value) for value in raw.split(','))
+    except ValueError:
+        raise ValueError('Faixas de idade inválidas')
+    if len(bounds) > MAX_AGE_BUCKETS or any(not 0 <= value <= 150 for value in bounds):
+        raise ValueError('Faixas de idade inválidas')
+    if any(lower >= upper for lower, upper in zip(bounds, bounds[1:])):
+        raise ValueError('As faixas de idade devem estar em ordem crescente')
+    return bounds
+
+
+def age_bucket_counts(bounds, today):
+    """
+    COUNT condicional de cada faixa etária, por rótulo: cada faixa de idade
+    vira um intervalo de birthdate calculado a partir de hoje. Quem tem
+    menos que a primeira idade fica de fora.
+    """
+    counts = {}
+    for position, lower in enumerate(bounds):
+        # Idade >= lower  <=>  nasceu até hoje há lower anos
+        condition = Q(birthdate__lte=years_before(today, lower))
+        if position + 1 < len(bounds):
+            upper = bounds[position + 1]
+            condition &= Q(birthdate__gt=years_before(today, upper))
+            label = f'{lower}-{upper - 1}'
+        else:
+            label = f'{lower}+'
+        counts[label] = Count('id', filter=condition)
+    return counts
+
+
+def age_buckets(queryset, bounds=AGE_BOUNDS, today=None):
+    """Quantidade de usuários por faixa etária, em uma única consulta"""
+    counts = age_bucket_counts(bounds, today or timezone.localdate())
+    result = queryset.filter(birthdate__isnull=False).aggregate(**counts)
+    return [{'label': label, 'value': result[label]} for label in counts]
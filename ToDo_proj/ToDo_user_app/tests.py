@@ -1,3 +1,431 @@
-from django.test import TestCase
+import json
+from datetime import date, timedelta
+from io import StringIO
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from ToDo_app.models import Job, Task, TaskStats
+from ToDo_app.stats import rebuild_user_stats
+
+from . import snapshot
+from .grid import MAX_BLOCK_SIZE
+from .stats import AGE_BOUNDS, age_bucket_counts, age_buckets, years_before
+from .views import MAX_BULK_IDS, details_queryset, serialize_user_details
+
+
+User = get_user_model()
+
+
+class AdminUsersGridTests(TestCase):
+    """Row model do AG-Grid: blocos, total de linhas, ordenação e filtros no banco"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            username='admin@teste.com', email='admin@teste.com', password='Senha@123',
+            first_name='Zulmira', last_name='Admin', user_type='A', is_staff=True,
+        )
+        today = timezone.localdate()
+        # 250 usuários: gênero alternado, 1 em 5 sem nascimento, 1 em 4 inativo
+        User.objects.bulk_create([
+            User(
+                username=f'usuario{i}@teste.com', email=f'usuario{i}@teste.com',
+                first_name=f'Nome{i:03d}', last_name='Silva', gender='MFO'[i % 3],
+                birthdate=today.replace(year=today.year - 20 - i % 40) if i % 5 else None,
+                is_active=bool(i % 4),
+            )
+            for i in range(250)
+        ])
+        cls.total = 251
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def get_block(self, start=0, end=100, sort=None, filters=None):
+        params = {'startRow': start, 'endRow': end}
+        if sort is not None:
+            params['sortModel'] = json.dumps(sort)
+        if filters is not None:
+            params['filterModel'] = json.dumps(filters)
+        return self.client.get(reverse('user_app:admin_users_data'), params)
+
+    def rows(self, **kwargs):
+        response = self.get_block(**kwargs)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_blocks_slice_the_ordered_queryset(self):
+        ids = list(User.objects.order_by('id').values_list('id', flat=True))
+        first = self.rows(start=0, end=100)
+        second = self.rows(start=100, end=200)
+        self.assertEqual([row['id'] for row in first['users']], ids[:100])
+        self.assertEqual([row['id'] for row in second['users']], ids[100:200])
+
+    def test_row_count_only_on_first_and_last_blocks(self):
+        self.assertEqual(self.rows(start=0, end=100)['row_count'], self.total)
+        self.assertIsNone(self.rows(start=100, end=200)['row_count'])
+        last = self.rows(start=200, end=300)
+        self.assertEqual(len(last['users']), self.total - 200)
+        self.assertEqual(last['row_count'], self.total)
+
+    def test_block_size_is_capped(self):
+        data = self.rows(start=0, end=10000)
+        self.assertEqual(len(data['users']), min(MAX_BLOCK_SIZE, self.total))
+
+    def test_sort_by_name_descending(self):
+        data = self.rows(end=5, sort=[{'colId': 'full_name', 'sort': 'desc'}])
+        self.assertEqual(data['users'][0]['full_name'], 'Zulmira Admin')
+
+    def test_sort_by_age_keeps_missing_birthdates_last(self):
+        for direction in ('asc', 'desc'):
+            with self.subTest(direction=direction):
+                ages = [row['age'] for row in self.rows(end=MAX_BLOCK_SIZE, sort=[{'colId': 'age', 'sort': direction}])['users']]
+                known = [age for age in ages if age is not None]
+                self.assertEqual(known, sorted(known, reverse=direction == 'desc'))
+                self.assertEqual(ages[len(known):], [None] * (len(ages) - len(known)))
+
+    def test_text_filter(self):
+        data = self.rows(filters={'email': {'filterType': 'text', 'type': 'startsWith', 'filter': 'USUARIO1'}})
+        self.assertTrue(data['users'])
+        self.assertTrue(all(row['email'].startswith('usuario1') for row in data['users']))
+
+    def test_age_filters(self):
+        exact = self.rows(end=MAX_BLOCK_SIZE, filters={'age': {'filterType': 'number', 'type': 'equals', 'filter': 26}})
+        self.assertTrue(exact['users'])
+        self.assertEqual({row['age'] for row in exact['users']}, {26})
+        in_range = self.rows(end=MAX_BLOCK_SIZE, filters={
+            'age': {'filterType': 'number', 'type': 'inRange', 'filter': 25, 'filterTo': 27},
+        })
+        self.assertEqual({row['age'] for row in in_range['users']}, {26, 27})
+        blank = self.rows(end=MAX_BLOCK_SIZE, filters={'age': {'filterType': 'number', 'type': 'blank'}})
+        self.assertEqual(blank['row_count'], 51)
+
+    def test_choice_filters_match_labels(self):
+        female = self.rows(end=MAX_BLOCK_SIZE, filters={'gender_display': {'filterType': 'text', 'type': 'contains', 'filter': 'fem'}})
+        self.assertTrue(female['users'])
+        self.assertEqual({row['gender_display'] for row in female['users']}, {'Feminino'})
+        inactive = self.rows(end=MAX_BLOCK_SIZE, filters={'is_active': {'filterType': 'text', 'type': 'equals', 'filter': 'inativo'}})
+        self.assertEqual(inactive['row_count'], User.objects.filter(is_active=False).count())
+
+    def test_date_filter(self):
+        today = f'{timezone.localdate().isoformat()} 00:00:00'
+        data = self.rows(filters={'date_joined_formatted': {'filterType': 'date', 'type': 'equals', 'dateFrom': today}})
+        self.assertEqual(data['row_count'], self.total)
+        data = self.rows(filters={'date_joined_formatted': {'filterType': 'date', 'type': 'lessThan', 'dateFrom': today}})
+        self.assertEqual(data['row_count'], 0)
+
+    def test_id_filter(self):
+        target = User.objects.order_by('id').values_list('id', flat=True)[10]
+        data = self.rows(filters={'id': {'filterType': 'number', 'type': 'equals', 'filter': target}})
+        self.assertEqual([row['id'] for row in data['users']], [target])
+
+    def test_combined_conditions(self):
+        data = self.rows(filters={'full_name': {
+            'filterType': 'text', 'operator': 'OR',
+            'conditions': [{'type': 'contains', 'filter': 'nome001'}, {'type': 'contains', 'filter': 'zulmira'}],
+        }})
+        self.assertEqual(data['row_count'], 2)
+
+    def test_invalid_models_return_400(self):
+        invalid = [
+            {'start': 'a'},
+            {'start': 10, 'end': 5},
+            {'sort': {'colId': 'age'}},
+            {'sort': ['age']},
+            {'sort': [{'colId': 'senha'}]},
+            {'sort': [{'colId': ['age']}]},
+            {'sort': [{'colId': 'age', 'sort': 'sideways'}]},
+            {'filters': []},
+            {'filters': {'senha': {'type': 'equals', 'filter': 'x'}}},
+            {'filters': {'email': 'x'}},
+            {'filters': {'email': {'type': ['contains'], 'filter': 'x'}}},
+            {'filters': {'email': {'type': 'contains', 'filter': ['x']}}},
+            {'filters': {'email': {'conditions': 'x'}}},
+            {'filters': {'email': {'conditions': ['x', 1]}}},
+            {'filters': {'age': {'type': 'equals', 'filter': 'vinte'}}},
+            {'filters': {'id': {'type': 'inRange', 'filter': 1, 'filterTo': [2]}}},
+            {'filters': {'date_joined_formatted': {'type': 'equals', 'dateFrom': 'ontem'}}},
+        ]
+        for params in invalid:
+            with self.subTest(params=params):
+                self.assertEqual(self.get_block(**params).status_code, 400)
+
+
+@override_settings(ADMIN_SNAPSHOT_CACHE='default')
+class AdminUsersBulkTests(TestCase):
+    """Ações em lote do painel: resultado por ID, própria conta e limite de IDs"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            username='admin@teste.com', email='admin@teste.com', password='Senha@123', user_type='A', is_staff=True,
+        )
+        User.objects.bulk_create([
+            User(username=f'usuario{i}@teste.com', email=f'usuario{i}@teste.com', user_type='U') for i in range(4)
+        ])
+        cls.ids = list(User.objects.exclude(pk=cls.admin.pk).order_by('pk').values_list('pk', flat=True))
+        cls.missing = max(cls.ids) + 100
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def post(self, name, data):
+        return self.client.post(reverse(f'user_app:{name}'), json.dumps(data), content_type='application/json')
+
+    def test_results_per_id(self):
+        data = self.post('admin_users_bulk_deactivate', {'ids': [self.ids[0], self.missing, self.ids[1]]}).json()
+        self.assertEqual(data['updated'], 2)
+        self.assertEqual(list(data['results']), [str(self.ids[0]), str(self.missing), str(self.ids[1])])
+        self.assertEqual(data['results'][str(self.missing)], {'success': False, 'error': 'Usuário não encontrado'})
+        self.assertTrue(data['results'][str(self.ids[0])]['success'])
+        self.assertEqual(User.objects.filter(is_active=False).count(), 2)
+
+    def test_actions_skip_own_account(self):
+        actions = [
+            ('admin_users_bulk_deactivate', {}),
+            ('admin_users_bulk_activate', {}),
+            ('admin_users_bulk_update_type', {'user_type': 'U'}),
+            ('admin_users_bulk_delete', {}),
+        ]
+        for name, extra in actions:
+            with self.subTest(action=name):
+                data = self.post(name, {'ids': [self.admin.pk, self.ids[0]], **extra}).json()
+                own = data['results'][str(self.admin.pk)]
+                self.assertFalse(own['success'])
+                self.assertIn('próprio usuário', own['error'])
+        admin = User.objects.get(pk=self.admin.pk)
+        self.assertEqual((admin.is_active, admin.user_type, admin.is_staff), (True, 'A', True))
+
+    def test_update_type_keeps_is_staff_in_step(self):
+        User.objects.filter(pk=self.ids[2]).update(is_staff=True)
+        self.post('admin_users_bulk_update_type', {'ids': self.ids[:2], 'user_type': 'A'})
+        self.assertTrue(all(User.objects.filter(pk__in=self.ids[:2]).values_list('is_staff', flat=True)))
+        self.post('admin_users_bulk_update_type', {'ids': [self.ids[0]], 'user_type': 'O'})
+        self.assertFalse(User.objects.get(pk=self.ids[0]).is_staff)
+        # Usuário comum não mexe em is_staff
+        self.post('admin_users_bulk_update_type', {'ids': [self.ids[1], self.ids[2]], 'user_type': 'U'})
+        self.assertEqual(
+            list(User.objects.filter(pk__in=self.ids[1:3]).order_by('pk').values_list('user_type', 'is_staff')),
+            [('U', True), ('U', True)],
+        )
+
+    def test_delete_enqueues_purge(self):
+        data = self.post('admin_users_bulk_delete', {'ids': self.ids[:2]}).json()
+        self.assertEqual(data['updated'], 2)
+        self.assertFalse(User.objects.filter(pk__in=self.ids[:2]).exists())
+        self.assertEqual(
+            sorted(Job.objects.filter(name='purge_account').values_list('payload__user_id', flat=True)), self.ids[:2],
+        )
+
+    def test_limit_and_invalid_bodies(self):
+        too_many = list(range(1, MAX_BULK_IDS + 2))
+        self.assertEqual(self.post('admin_users_bulk_deactivate', {'ids': too_many}).status_code, 400)
+        self.assertEqual(User.objects.filter(is_active=False).count(), 0)
+        for body in ({'ids': []}, {'ids': ['x']}, {'ids': 1}, [1, 2], {'ids': [True]}, {'ids': [1.9]}, {'ids': ['1']}):
+            with self.subTest(body=body):
+                self.assertEqual(self.post('admin_users_bulk_delete', body).status_code, 400)
+        self.assertEqual(self.post('admin_users_bulk_deactivate', {'ids': [True, 1.9]}).status_code, 400)
+        self.assertFalse(User.objects.filter(is_active=False).exists())
+        self.assertEqual(self.post('admin_users_bulk_update_type', {'ids': self.ids, 'user_type': 'Z'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('user_app:admin_users_bulk_delete')).status_code, 405)
+
+
+class AdminUserDetailsTests(TestCase):
+    """Modal de detalhes: usuário, endereço e contadores lidos numa consulta, sem escrita"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            username='admin@teste.com', email='admin@teste.com', password='Senha@123', user_type='A', is_staff=True,
+        )
+        cls.user = User.objects.create_user(username='detalhes@teste.com', email='detalhes@teste.com', password='Senha@123')
+
+    def test_user_creation_creates_task_stats(self):
+        self.assertTrue(TaskStats.objects.filter(user=self.user).exists())
+
+    def test_details_read_in_one_query(self):
+        Task.objects.bulk_create([Task(user=self.user, title=f'Tarefa {i}') for i in range(3)])
+        rebuild_user_stats(self.user.pk)
+        with self.assertNumQueries(1):
+            details = serialize_user_details(details_queryset().get(pk=self.user.pk), timezone.localdate())
+        self.assertEqual(details['task_stats'], {'total': 3, 'pending': 3, 'in_progress': 0, 'completed': 0})
+
+    def test_missing_task_stats_reads_as_zero_without_writing(self):
+        TaskStats.objects.filter(user=self.user).delete()
+        with self.assertNumQueries(1):
+            details = serialize_user_details(details_queryset().get(pk=self.user.pk), timezone.localdate())
+        self.assertEqual(details['task_stats'], {'total': 0, 'pending': 0, 'in_progress': 0, 'completed': 0})
+        self.assertFalse(TaskStats.objects.filter(user=self.user).exists())
+
+    def test_details_api(self):
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('user_app:admin_user_details', args=[self.user.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['user']['email'], 'detalhes@teste.com')
+        response = self.client.get(reverse('user_app:admin_user_details', args=[self.user.pk + 100]))
+        self.assertEqual(response.status_code, 404)
+
+
+class AdminAgeStatsTests(TestCase):
+    """Faixas etárias: limites de cada faixa, 29/02 e validação de ?bounds"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            username='idade-admin@teste.com', email='idade-admin@teste.com', password='Senha@123', is_staff=True,
+        )
+        today = timezone.localdate()
+        birthdates = {
+            'faz-18-hoje': years_before(today, 18),
+            'faz-18-amanha': years_before(today, 18) + timedelta(days=1),
+            'tem-25': years_before(today, 26) + timedelta(days=1),
+            'faz-26-hoje': years_before(today, 26),
+            'tem-90': years_before(today, 90),
+        }
+        for name, birthdate in birthdates.items():
+            User.objects.create_user(username=f'{name}@teste.com', email=f'{name}@teste.com', password='Senha@123', birthdate=birthdate)
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def get(self, **params):
+        return self.client.get(reverse('user_app:admin_age_stats'), params)
+
+    def test_years_before(self):
+        cases = [
+            (date(2024, 3, 15), 10, date(2014, 3, 15)),
+            (date(2024, 2, 29), 1, date(2023, 2, 28)),
+            (date(2024, 2, 29), 4, date(2020, 2, 29)),
+        ]
+        for today, years, expected in cases:
+            with self.subTest(today=today, years=years):
+                self.assertEqual(years_before(today, years), expected)
+
+    def test_default_buckets(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['data'], [
+            {'label': '18-25', 'value': 2},
+            {'label': '26-35', 'value': 1},
+            {'label': '36-45', 'value': 0},
+            {'label': '46-55', 'value': 0},
+            {'label': '56+', 'value': 1},
+        ])
+        self.assertEqual(list(age_bucket_counts(AGE_BOUNDS, timezone.localdate())), ['18-25', '26-35', '36-45', '46-55', '56+'])
+
+    def test_custom_bounds(self):
+        self.assertEqual(self.get(bounds='0,26, 60').json()['data'], [
+            {'label': '0-25', 'value': 3},
+            {'label': '26-59', 'value': 1},
+            {'label': '60+', 'value': 1},
+        ])
+
+    def test_leap_day_birthdate(self):
+        User.objects.create_user(username='bissexto@teste.com', email='bissexto@teste.com', password='Senha@123', birthdate=date(2004, 2, 29))
+        queryset = User.objects.filter(username='bissexto@teste.com')
+        # Em ano não bissexto, quem nasceu em 29/02 completa a idade em 01/03
+        self.assertEqual(age_buckets(queryset, (18,), date(2022, 2, 28)), [{'label': '18+', 'value': 0}])
+        self.assertEqual(age_buckets(queryset, (18,), date(2022, 3, 1)), [{'label': '18+', 'value': 1}])
+        self.assertEqual(age_buckets(queryset, (20,), date(2024, 2, 29)), [{'label': '20+', 'value': 1}])
+
+    def test_invalid_bounds_return_400(self):
+        cases = {
+            'a,b': 'Faixas de idade inválidas',
+            '18,,26': 'Faixas de idade inválidas',
+            '-1,18': 'Faixas de idade inválidas',
+            '18,151': 'Faixas de idade inválidas',
+            ','.join(str(age) for age in range(0, 105, 5)): 'Faixas de idade inválidas',
+            '30,20': 'As faixas de idade devem estar em ordem crescente',
+            '18,18': 'As faixas de idade devem estar em ordem crescente',
+        }
+        for bounds, message in cases.items():
+            with self.subTest(bounds=bounds):
+                response = self.get(bounds=bounds)
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json()['error'], message)
+
+    def test_staff_only(self):
+        self.client.force_login(User.objects.get(username='tem-90@teste.com'))
+        self.assertEqual(self.get().status_code, 302)
+
+
+@override_settings(ADMIN_SNAPSHOT_CACHE='default')
+class AdminSnapshotTests(TestCase):
+    """Resumo do painel em cache: leitura sem consultas e invalidação pelas escritas que mudam números"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            username='resumo-admin@teste.com', email='resumo-admin@teste.com', password='Senha@123',
+            user_type='A', is_staff=True,
+        )
+        cls.user = User.objects.create_user(username='resumo@teste.com', email='resumo@teste.com', password='Senha@123')
+
+    def setUp(self):
+        caches['default'].delete(snapshot.SNAPSHOT_KEY)
+
+    def cached(self):
+        return caches['default'].get(snapshot.SNAPSHOT_KEY)
+
+    def test_read_from_cache(self):
+        first = snapshot.get_snapshot()
+        self.assertEqual((first['total'], first['active']), (2, 2))
+        with self.assertNumQueries(0):
+            self.assertEqual(snapshot.get_snapshot(), first)
+
+    def test_snapshot_from_another_day_is_recomputed(self):
+        stale = {**snapshot.refresh_snapshot(), 'date': '2000-01-01', 'total': 99}
+        caches['default'].set(snapshot.SNAPSHOT_KEY, stale)
+        self.assertEqual(snapshot.get_snapshot()['total'], 2)
+
+    def test_only_source_fields_invalidate(self):
+        snapshot.get_snapshot()
+        self.user.last_login = timezone.now()
+        self.user.save(update_fields=['last_login'])
+        self.assertIsNotNone(self.cached())
+
+        for field in ('gender', 'is_active'):
+            with self.subTest(field=field):
+                snapshot.get_snapshot()
+                self.user.save(update_fields=[field])
+                self.assertIsNone(self.cached())
+
+        snapshot.get_snapshot()
+        self.user.save()
+        self.assertIsNone(self.cached())
+        self.assertEqual(snapshot.SOURCE_FIELDS & {'last_login', 'password'}, set())
+
+    def test_create_and_delete_invalidate(self):
+        self.assertEqual(snapshot.get_snapshot()['total'], 2)
+        other = User.objects.create_user(username='novo@teste.com', email='novo@teste.com', password='Senha@123')
+        self.assertEqual(snapshot.get_snapshot()['total'], 3)
+        User.all_objects.filter(pk=other.pk).get().delete()
+        self.assertEqual(snapshot.get_snapshot()['total'], 2)
+
+    def test_invalidated_again_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            snapshot.invalidate_snapshot()
+            # Leitor concorrente guardando números de antes do commit
+            snapshot.refresh_snapshot()
+        self.assertIsNone(self.cached())
+
+    def test_bulk_actions_invalidate(self):
+        self.client.force_login(self.admin)
+        self.assertEqual(self.client.get(reverse('user_app:admin_summary')).json()['active'], 2)
+        self.client.post(
+            reverse('user_app:admin_users_bulk_deactivate'), json.dumps({'ids': [self.user.pk]}),
+            content_type='application/json',
+        )
+        summary = self.client.get(reverse('user_app:admin_summary')).json()
+        self.assertEqual((summary['active'], summary['inactive']), (1, 1))
+
+    def test_refresh_command(self):
+        out = StringIO()
+        call_command('refresh_admin_stats', stdout=out)
+        self.assertIn('2 usuários, 2 ativos', out.getvalue())
+        self.assertEqual(self.cached()['total'], 2)
@@ -1,11 +1,15 @@
 from django.contrib.admin.views.decorators import staff_member_required
 from django.shortcuts import render, get_object_or_404
-from django.http import JsonResponse
+from django.http import Http404, JsonResponse
 from django.contrib.auth import get_user_model
 from django.db.models import Count
-from datetime import date
+from django.utils import timezone
 import json
-from ToDo_app.models import Task
+from django.db import transaction
+from ToDo_app import jobs
+from ToDo_app.models import TaskStats
+from ToDo_app.stats import COUNTER_FIELDS
+from . import grid, snapshot, stats
 from .models import Address
 from django.views.generic import DeleteView, ListView, CreateView, UpdateView,DetailView
 from django.views import View
@@ -14,7 +18,19 @@ from ToDo_app.mixins import JsonResponseMixin
 
 # Create your views here.
 User = get_user_model()
-    
+
+
+def handle_json_error(error_message, status_code=400):
+    """Resposta de erro no mesmo formato do JsonResponseMixin"""
+    return JsonResponse({'success': False, 'error': error_message}, status=status_code)
+
+
+def handle_json_success(message, data=None):
+    """Resposta de sucesso no mesmo formato do JsonResponseMixin"""
+    response_data = {'success': True, 'message': message}
+    if data:
+        response_data.update(data)
+    return JsonResponse(response_data)
 
 
 
@@ -53,76 +69,98 @@ def admin_user_update_type(request, user_id):
         return handle_json_error(f'Erro interno: {str(e)}', 500)
 
 
+# Limite de usuários por chamada de admin_users_details (uma página do grid tem 20)
+MAX_DETAILS_BATCH = 100
+
+
+def details_queryset():
+    """Usuários com endereço e contadores de tarefas na mesma consulta (JOINs)"""
+    return User.objects.select_related('address', 'task_stats')
+
+
+def serialize_user_details(user, today):
+    """Dados do modal de detalhes a partir de um usuário de details_queryset()"""
+    user_data = {
+        'id': user.id,
+        'full_name': f"{user.first_name if user.first_name else '?'} {user.last_name if user.last_name else '?'}".strip(),
+        'email': user.email,
+        'cpf': user.cpf or 'Não informado',
+        'phone': user.phone or 'Não informado',
+        'birthdate': user.birthdate.strftime('%d/%m/%Y') if user.birthdate else 'Não informado',
+        'age': f"{grid.age_on(user.birthdate, today)} anos" if user.birthdate else 'Não informado',
+        'gender_display': grid.GENDER_LABELS.get(user.gender, 'Não informado'),
+        'user_type_display': grid.USER_TYPE_LABELS.get(user.user_type, 'Usuário'),
+        'is_active': 'Ativo' if user.is_active else 'Inativo',
+        'date_joined': timezone.localtime(user.date_joined).strftime('%d/%m/%Y às %H:%M') if user.date_joined else 'Não informado',
+        'profile_completed': 'Sim' if user.profile_completed else 'Não'
+    }
+
+    # Dados do endereço
+    address_data = {
+        'formatted_address': 'Não informado',
+        'zipcode': 'Não informado',
+        'city_state': 'Não informado'
+    }
+    try:
+        address = user.address
+        address_data = {
+            'formatted_address': address.formatted_address or 'Não informado',
+            'zipcode': address.zipcode or 'Não informado',
+            'city_state': f"{address.city}/{address.state}" if address.city and address.state else 'Não informado'
+        }
+    except Address.DoesNotExist:
+        pass
+
+    # Estatísticas de tasks (contadores mantidos incrementalmente). A linha
+    # nasce com o usuário (receiver create_user_stats); sem ela o usuário
+    # ainda não escreveu tarefas, e a leitura não grava nada
+    try:
+        task_stats = {field: getattr(user.task_stats, field) for field in COUNTER_FIELDS}
+    except TaskStats.DoesNotExist:
+        task_stats = dict.fromkeys(COUNTER_FIELDS, 0)
+
+    return {
+        'user': user_data,
+        'address': address_data,
+        'task_stats': task_stats
+    }
+
+
 @staff_member_required
 def admin_user_details(request, user_id):
     """
     API para obter detalhes completos do usuário incluindo endereço e estatísticas de tasks
     """
     try:
-        
-        user = get_object_or_404(User, id=user_id)
-        
-        user_data = {
-            'id': user.id,
-            'full_name': f"{user.first_name if user.first_name else '?'} {user.last_name if user.last_name else '?'}".strip(),
-            'email': user.email,
-            'cpf': user.cpf or 'Não informado',
-            'phone': user.phone or 'Não informado',
-            'birthdate': user.birthdate.strftime('%d/%m/%Y') if user.birthdate else 'Não informado',
-            'age': None,
-            'gender_display': dict([('M', 'Masculino'), ('F', 'Feminino'), ('O', 'Outro')]).get(user.gender, 'Não informado'),
-            'user_type_display': dict([('A', 'Admin'), ('U', 'Usuário'), ('O', 'Observer')]).get(user.user_type, 'Usuário'),
-            'is_active': 'Ativo' if user.is_active else 'Inativo',
-            'date_joined': user.date_joined.strftime('%d/%m/%Y às %H:%M') if user.date_joined else 'Não informado',
-            'profile_completed': 'Sim' if user.profile_completed else 'Não'
-        }
-        
-        # Calcular idade se birthdate existir
-        if user.birthdate:
-            today = date.today()
-            age = today.year - user.birthdate.year - ((today.month, today.day) < (user.birthdate.month, user.birthdate.day))
-            user_data['age'] = f"{age} anos"
-        else:
-            user_data['age'] = 'Não informado'
-        
-        # Dados do endereço
-        address_data = {
-            'formatted_address': 'Não informado',
-            'zipcode': 'Não informado',
-            'city_state': 'Não informado'
-        }
-        
-        try:
-            address = Address.objects.get(user=user)
-            address_data = {
-                'formatted_address': address.formatted_address or 'Não informado',
-                'zipcode': address.zipcode or 'Não informado',
-                'city_state': f"{address.city}/{address.state}" if address.city and address.state else 'Não informado'
-            }
-        except Address.DoesNotExist:
-            pass
-        
-        # Estatísticas de tasks
-        tasks = Task.objects.filter(user=user)
-        task_stats = {
-            'total': tasks.count(),
-            'pending': tasks.filter(status='PENDENTE').count(),
-            'in_progress': tasks.filter(status='EM ANDAMENTO').count(),
-            'completed': tasks.filter(status='COMPLETADO').count()
-        }
-        
-        return JsonResponse({
-            'user': user_data,
-            'address': address_data,
-            'task_stats': task_stats
-        })
-        
-    except User.DoesNotExist:
+        user = get_object_or_404(details_queryset(), id=user_id)
+        return JsonResponse(serialize_user_details(user, timezone.localdate()))
+    except Http404:
         return handle_json_error('Usuário não encontrado', 404)
     except Exception as e:
         return handle_json_error(f'Erro interno: {str(e)}', 500)
 
 
+@staff_member_required
+def admin_users_details(request):
+    """
+    API com os detalhes de vários usuários (?ids=1,2,3) em uma consulta, para
+    o painel buscar de antemão os da página visível do grid
+    """
+    try:
+        ids = {int(value) for value in request.GET.get('ids', '').split(',') if value}
+    except ValueError:
+        return handle_json_error('Lista de IDs inválida')
+    if len(ids) > MAX_DETAILS_BATCH:
+        return handle_json_error(f'Informe no máximo {MAX_DETAILS_BATCH} IDs')
+
+    try:
+        today = timezone.localdate()
+        users = details_queryset().filter(id__in=ids) if ids else []
+        return JsonResponse({'users': {user.id: serialize_user_details(user, today) for user in users}})
+    except Exception as e:
+        return handle_json_error(f'Erro interno: {str(e)}', 500)
+
+
 @staff_member_required
 def admin_dashboard(request):
     if request.user.user_type == 'A' or request.user.is_staff or request.user.user_type == 'O':
@@ -135,40 +173,30 @@ def admin_dashboard(request):
 @staff_member_required
 def admin_users_data(request):
     """
-    API para obter dados dos usuários para o AG-Grid
+    API do row model do AG-Grid: devolve só o bloco de linhas pedido, já
+    ordenado e filtrado no banco (ver grid.py)
     """
     try:
-        users = User.objects.all().values(
-            'id', 'first_name', 'last_name', 'email', 
-            'birthdate', 'gender', 'user_type', 'is_active', 'date_joined',
-            'cpf', 'phone', 'profile_completed'
-        )
-        
-        users_list = []
-        for user in users:
-            # Calcular idade se birthdate existir
-            age = None
-            if user['birthdate']:
-                today = date.today()
-                age = today.year - user['birthdate'].year - ((today.month, today.day) < (user['birthdate'].month, user['birthdate'].day))
-            
-            users_list.append({
-                'id': user['id'],
-                'full_name': f"{user['first_name']} {user['last_name']}",
-                'email': user['email'],
-                'age': age,
-                'gender_display': dict([('M', 'Masculino'), ('F', 'Feminino'), ('O', 'Outro')]).get(user['gender'], 'Não informado'),
-                'user_type_display': dict([('A', 'Admin'), ('U', 'Usuário'), ('O', 'Observer')]).get(user['user_type'], 'Usuário'),
-                'user_type_code': user['user_type'],  # Adicionar código do tipo para o select
-                'is_active': user['is_active'],
-                'date_joined_formatted': user['date_joined'].strftime('%d/%m/%Y') if user['date_joined'] else '',
-            })
-        
-        return JsonResponse({'users': users_list})
+        rows, row_count = grid.load_block(User.objects.all(), request.GET)
+        return JsonResponse({'users': rows, 'row_count': row_count})
+    except ValueError as e:
+        return handle_json_error(str(e))
     except Exception as e:
         return handle_json_error(f'Erro ao carregar usuários: {str(e)}', 500)
 
 
+@staff_member_required
+def admin_summary(request):
+    """
+    API do resumo do painel (cards, gênero, idade, tipos de usuário e perfis
+    completos): uma leitura do resumo em cache (ver snapshot.py)
+    """
+    try:
+        return JsonResponse(snapshot.get_snapshot())
+    except Exception as e:
+        return handle_json_error(f'Erro ao carregar resumo: {str(e)}', 500)
+
+
 @staff_member_required
 def admin_gender_stats(request):
     """
@@ -198,38 +226,14 @@ def admin_gender_stats(request):
 @staff_member_required
 def admin_age_stats(request):
     """
-    API para estatísticas de idade dos usuários (gráfico barra)
+    API para estatísticas de idade dos usuários (gráfico barra). As faixas
+    podem ser trocadas com ?bounds=18,26,36,46,56 (idade inicial de cada uma)
     """
     try:
-        users_with_birthdate = User.objects.filter(birthdate__isnull=False)
-        
-        age_ranges = {
-            '18-25': 0,
-            '26-35': 0,
-            '36-45': 0,
-            '46-55': 0,
-            '56+': 0
-        }
-        
-        today = date.today()
-        
-        for user in users_with_birthdate:
-            age = today.year - user.birthdate.year - ((today.month, today.day) < (user.birthdate.month, user.birthdate.day))
-            
-            if 18 <= age <= 25:
-                age_ranges['18-25'] += 1
-            elif 26 <= age <= 35:
-                age_ranges['26-35'] += 1
-            elif 36 <= age <= 45:
-                age_ranges['36-45'] += 1
-            elif 46 <= age <= 55:
-                age_ranges['46-55'] += 1
-            elif age > 55:
-                age_ranges['56+'] += 1
-        
-        data = [{'label': k, 'value': v} for k, v in age_ranges.items()]
-        
-        return JsonResponse({'data': data})
+        bounds = stats.parse_age_bounds(request.GET)
+        return JsonResponse({'data': stats.age_buckets(User.objects.all(), bounds)})
+    except ValueError as e:
+        return handle_json_error(str(e))
     except Exception as e:
         return handle_json_error(f'Erro ao carregar estatísticas de idade: {str(e)}', 500)
 
@@ -251,7 +255,10 @@ def admin_user_delete(request, user_id):
             return handle_json_error('Não é possível deletar seu próprio usuário')
         
         user_name = f"{user.first_name} {user.last_name}"
-        user.delete()
+        # Exclusão lógica; o expurgo é feito em segundo plano pelo job purge_account
+        with transaction.atomic():
+            user.soft_delete()
+            jobs.enqueue('purge_account', {'user_id': user.pk})
         
         return handle_json_success(f'Usuário "{user_name}" removido com sucesso!')
         
@@ -308,3 +315,137 @@ def admin_user_activate(request, user_id):
         return handle_json_error(f'Erro interno: {str(e)}', 500)
 
 
+# Limites das ações em lote: IDs por chamada e contas excluídas por transação
+MAX_BULK_IDS = 1000
+BULK_DELETE_CHUNK_SIZE = 200
+
+
+def parse_bulk_request(request):
+    """
+    IDs do corpo JSON das ações em lote ({"ids": [...]}), sem repetição e na
+    ordem recebida. Levanta ValueError se forem inválidos.
+    """
+    try:
+        data = json.loads(request.body)
+    except ValueError:
+        raise ValueError('Dados inválidos')
+    ids = data.get('ids') if isinstance(data, dict) else None
+    if not isinstance(ids, list) or not ids:
+        raise ValueError('Nenhum usuário informado')
+    if len(ids) > MAX_BULK_IDS:
+        raise ValueError(f'Informe no máximo {MAX_BULK_IDS} usuários')
+    # Só inteiros de verdade: int() aceitaria true (pk 1, em geral o superusuário) e 1.9
+    if not all(isinstance(user_id, int) and not isinstance(user_id, bool) for user_id in ids):
+        raise ValueError('Lista de IDs inválida')
+    return list(dict.fromkeys(ids))
+
+
+def bulk_targets(request, ids, own_account_error=None):
+    """
+    Separa os IDs em contas a alterar e resultados de erro por ID: conta
+    inexistente e, se own_account_error for informado, a do próprio admin
+    """
+    found = set(User.objects.filter(pk__in=ids).values_list('pk', flat=True))
+    targets, results = [], {}
+    for user_id in ids:
+        if user_id not in found:
+            results[user_id] = {'success': False, 'error': 'Usuário não encontrado'}
+        elif own_account_error and user_id == request.user.id:
+            results[user_id] = {'success': False, 'error': own_account_error}
+        else:
+            targets.append(user_id)
+    return targets, results
+
+
+def bulk_response(message, ids, targets, results):
+    """Resposta das ações em lote com o resultado de cada ID, na ordem recebida"""
+    return handle_json_success(message, {
+        'updated': len(targets),
+        'results': {user_id: results.get(user_id, {'success': True}) for user_id in ids},
+    })
+
+
+def bulk_update(request, fields, own_account_error, message):
+    """Aplica fields às contas informadas com um único UPDATE"""
+    if request.method != 'POST':
+        return handle_json_error('Método não permitido', 405)
+    try:
+        ids = parse_bulk_request(request)
+        targets, results = bulk_targets(request, ids, own_account_error)
+        if targets:
+            User.objects.filter(pk__in=targets).update(**fields)
+            # update() não dispara post_save
+            snapshot.invalidate_snapshot()
+        return bulk_response(message.format(count=len(targets)), ids, targets, results)
+    except ValueError as e:
+        return handle_json_error(str(e))
+    except Exception as e:
+        return handle_json_error(f'Erro interno: {str(e)}', 500)
+
+
+@staff_member_required
+def admin_users_bulk_activate(request):
+    """
+    API para ativar vários usuários: {"ids": [...]}
+    """
+    return bulk_update(request, {'is_active': True}, 'Não é possível ativar seu próprio usuário',
+                       '{count} usuário(s) ativado(s) com sucesso!')
+
+
+@staff_member_required
+def admin_users_bulk_deactivate(request):
+    """
+    API para desativar vários usuários: {"ids": [...]}
+    """
+    return bulk_update(request, {'is_active': False}, 'Não é possível desativar seu próprio usuário',
+                       '{count} usuário(s) desativado(s) com sucesso!')
+
+
+@staff_member_required
+def admin_users_bulk_update_type(request):
+    """
+    API para alterar o tipo de vários usuários: {"ids": [...], "user_type": "A"}
+    """
+    if request.method != 'POST':
+        return handle_json_error('Método não permitido', 405)
+    try:
+        user_type = json.loads(request.body).get('user_type')
+    except (ValueError, AttributeError):
+        return handle_json_error('Dados inválidos')
+    if user_type not in grid.USER_TYPE_LABELS:
+        return handle_json_error('Tipo de usuário não informado')
+
+    # Mesma regra de admin_user_update_type: Admin vira staff, Observer deixa de ser
+    fields = {'user_type': user_type}
+    if user_type == 'A':
+        fields['is_staff'] = True
+    elif user_type == 'O':
+        fields['is_staff'] = False
+    # Sem a própria conta: um admin não pode se rebaixar e perder o acesso ao painel
+    return bulk_update(request, fields, 'Não é possível alterar o tipo do seu próprio usuário',
+                       f'Tipo de {{count}} usuário(s) alterado para {grid.USER_TYPE_LABELS[user_type]} com sucesso!')
+
+
+@staff_member_required
+def admin_users_bulk_delete(request):
+    """
+    API para remover vários usuários: {"ids": [...]}. Exclusão lógica em
+    blocos, cada um com um UPDATE e os jobs de expurgo na mesma transação
+    """
+    if request.method != 'POST':
+        return handle_json_error('Método não permitido', 405)
+    try:
+        ids = parse_bulk_request(request)
+        targets, results = bulk_targets(request, ids, 'Não é possível deletar seu próprio usuário')
+        for start in range(0, len(targets), BULK_DELETE_CHUNK_SIZE):
+            chunk = targets[start:start + BULK_DELETE_CHUNK_SIZE]
+            with transaction.atomic():
+                User.objects.soft_delete(chunk)
+                jobs.enqueue_many('purge_account', [{'user_id': user_id} for user_id in chunk])
+        if targets:
+            snapshot.invalidate_snapshot()
+        return bulk_response(f'{len(targets)} usuário(s) removido(s) com sucesso!', ids, targets, results)
+    except ValueError as e:
+        return handle_json_error(str(e))
+    except Exception as e:
+        return handle_json_error(f'Erro interno: {str(e)}', 500)
@@ -3,12 +3,13 @@ let usersGrid;
 let genderChart;
 let ageChart;
 let currentEditingUserId = null;
+// Detalhes dos usuários da página visível, buscados de antemão (ver prefetchVisibleDetails)
+const userDetailsCache = new Map();
 
 // Inicialização quando o DOM estiver carregado
 document.addEventListener('DOMContentLoaded', function() {
     initializeGrid();
-    loadCharts();
-    loadStats();
+    loadSummary();
 });
 
 function initializeGrid() {
@@ -17,7 +18,8 @@ function initializeGrid() {
             headerName: 'ID', 
             field: 'id', 
             width: 80,
-            sortable: true
+            sortable: true,
+            filter: 'agNumberColumnFilter'
         },
         { 
             headerName: 'Nome', 
@@ -37,7 +39,8 @@ function initializeGrid() {
             headerName: 'Idade', 
             field: 'age', 
             width: 100,
-            sortable: true
+            sortable: true,
+            filter: 'agNumberColumnFilter'
         },
         { 
             headerName: 'Gênero', 
@@ -60,6 +63,8 @@ function initializeGrid() {
             sortable: true,
             filter: true,
             cellRenderer: function(params) {
+                // Linha de um bloco ainda carregando
+                if (!params.data) return '';
                 return `
                     <input type="checkbox" ${params.data.is_active ? 'checked' : ''} onclick="${params.data.is_active ? `deactivateUser(${params.data.id}, '${params.data.full_name}')` : `activateUser(${params.data.id}, '${params.data.full_name}')`}" >
                 `;
@@ -70,13 +75,14 @@ function initializeGrid() {
             field: 'date_joined_formatted', 
             width: 140,
             sortable: true,
-            filter: true
+            filter: 'agDateColumnFilter'
         },
         {
             headerName: 'Ações',
             field: 'actions',
             width: 300,
             cellRenderer: function(params) {
+                if (!params.data) return '';
                 return `
                     <button class="btn btn-info btn-small" onclick="viewUserDetails(${params.data.id})" title="Ver Detalhes">
                         <i class="fas fa-eye"></i>
@@ -99,69 +105,109 @@ function initializeGrid() {
 
     const gridOptions = {
         columnDefs: columnDefs,
-        rowData: [],
+        // Blocos de linhas pedidos ao servidor, que ordena e filtra no banco
+        rowModelType: 'infinite',
+        cacheBlockSize: 100,
+        maxBlocksInCache: 10,
+        datasource: usersDatasource,
+        getRowId: params => String(params.data.id),
         theme: 'legacy',
-        rowSelection: { mode: 'singleRow' },
+        // Seleção de várias linhas para as ações em lote (o row model infinite não tem "selecionar todos")
+        rowSelection: { mode: 'multiRow', headerCheckbox: false },
+        onSelectionChanged: updateSelectedCount,
         pagination: true,
         paginationPageSize: 20,
         domLayout: 'normal',
         suppressCellFocus: true,
-        rowHeight: 50
+        rowHeight: 50,
+        onPaginationChanged: prefetchVisibleDetails
     };
 
     const gridDiv = document.querySelector('#usersGrid');
     usersGrid = agGrid.createGrid(gridDiv, gridOptions);
-    
-    loadUsersData();
 }
 
-// Carregar dados dos usuários
-async function loadUsersData() {
+// Fonte de dados do row model: um bloco (startRow..endRow) por requisição
+const usersDatasource = {
+    getRows: async function(params) {
+        const query = new URLSearchParams({
+            startRow: params.startRow,
+            endRow: params.endRow,
+            sortModel: JSON.stringify(params.sortModel || []),
+            filterModel: JSON.stringify(params.filterModel || {})
+        });
+        try {
+            const response = await fetch(`/user/api/users/?${query}`);
+            const data = await response.json();
+
+            if (!response.ok) {
+                throw new Error(data.error || response.statusText);
+            }
+            // row_count só vem no primeiro bloco e no último; nos demais o grid mantém o total
+            params.successCallback(data.users, data.row_count ?? undefined);
+        } catch (error) {
+            console.error('Erro ao carregar usuários:', error);
+            showToast('Erro ao carregar dados dos usuários', 'error');
+            params.failCallback();
+        }
+    }
+};
+
+// Recarregar os blocos do grid (mantém ordenação, filtro e página)
+function loadUsersData() {
+    userDetailsCache.clear();
+    usersGrid.refreshInfiniteCache();
+}
+
+// Buscar em uma requisição os detalhes dos usuários da página atual, para o modal abrir sem esperar
+async function prefetchVisibleDetails() {
+    if (!usersGrid) return;
+    const first = usersGrid.paginationGetCurrentPage() * usersGrid.paginationGetPageSize();
+    const last = Math.min(first + usersGrid.paginationGetPageSize(), usersGrid.getDisplayedRowCount());
+    const ids = [];
+    for (let index = first; index < last; index++) {
+        const node = usersGrid.getDisplayedRowAtIndex(index);
+        if (node && node.data && !userDetailsCache.has(node.data.id)) {
+            ids.push(node.data.id);
+        }
+    }
+    if (!ids.length) return;
+
     try {
-        const response = await fetch('/user/api/users/');
+        const response = await fetch(`/user/api/users/details/?ids=${ids.join(',')}`);
         const data = await response.json();
-        
-        if (data.users) {
-            usersGrid.setGridOption('rowData', data.users);
+        if (response.ok) {
+            Object.entries(data.users).forEach(([id, details]) => userDetailsCache.set(Number(id), details));
         }
     } catch (error) {
-        console.error('Erro ao carregar usuários:', error);
-        showToast('Erro ao carregar dados dos usuários', 'error');
+        // Sem prefetch o modal busca os detalhes ao abrir
+        console.error('Erro ao buscar detalhes dos usuários:', error);
     }
 }
 
-// Carregar estatísticas
-async function loadStats() {
+// Carregar cards e gráficos (um único resumo, calculado no servidor e guardado em cache)
+async function loadSummary() {
     try {
-        const response = await fetch('/user/api/users/');
+        const response = await fetch('/user/api/summary/');
         const data = await response.json();
         
-        if (data.users) {
-            const users = data.users;
-            const today = new Date().toLocaleDateString('pt-BR');
-            
-            document.getElementById('total-users').textContent = users.length;
-            document.getElementById('active-users').textContent = users.filter(u => u.is_active).length;
-            document.getElementById('admin-users').textContent = users.filter(u => u.user_type_code === 'A').length;
-            document.getElementById('new-users').textContent = users.filter(u => u.date_joined_formatted === today).length;
+        if (!response.ok) {
+            throw new Error(data.error || response.statusText);
         }
+        document.getElementById('total-users').textContent = data.total;
+        document.getElementById('active-users').textContent = data.active;
+        document.getElementById('admin-users').textContent = data.user_types.find(t => t.code === 'A').value;
+        document.getElementById('new-users').textContent = data.new_today;
+        loadGenderChart(data.gender);
+        loadAgeChart(data.age);
     } catch (error) {
         console.error('Erro ao carregar estatísticas:', error);
     }
 }
 
-// Carregar gráficos
-async function loadCharts() {
-    await loadGenderChart();
-    await loadAgeChart();
-}
-
 // Gráfico de gênero (pizza)
-async function loadGenderChart() {
+function loadGenderChart(items) {
     try {
-        const response = await fetch('/user/api/gender-stats/');
-        const data = await response.json();
-        
         const ctx = document.getElementById('genderChart').getContext('2d');
         
         if (genderChart) {
@@ -171,9 +217,9 @@ async function loadGenderChart() {
         genderChart = new Chart(ctx, {
             type: 'pie',
             data: {
-                labels: data.data.map(item => item.label),
+                labels: items.map(item => item.label),
                 datasets: [{
-                    data: data.data.map(item => item.value),
+                    data: items.map(item => item.value),
                     backgroundColor: [
                         '#3498db',
                         '#e74c3c',
@@ -196,11 +242,8 @@ async function loadGenderChart() {
 }
 
 // Gráfico de idade (barras)
-async function loadAgeChart() {
+function loadAgeChart(items) {
     try {
-        const response = await fetch('/user/api/age-stats/');
-        const data = await response.json();
-        
         const ctx = document.getElementById('ageChart').getContext('2d');
         
         if (ageChart) {
@@ -210,10 +253,10 @@ async function loadAgeChart() {
         ageChart = new Chart(ctx, {
             type: 'bar',
             data: {
-                labels: data.data.map(item => item.label),
+                labels: items.map(item => item.label),
                 datasets: [{
                     label: 'Número de Usuários',
-                    data: data.data.map(item => item.value),
+                    data: items.map(item => item.value),
                     backgroundColor: '#3498db',
                     borderColor: '#2980b9',
                     borderWidth: 1
@@ -256,8 +299,7 @@ async function changeUserType(userId, newType) {
         if (result.success) {
             showToast(result.message, 'success');
             loadUsersData();
-            loadStats();
-            loadCharts();
+            loadSummary();
         } else {
             showToast(result.error, 'error');
         }
@@ -270,8 +312,11 @@ async function changeUserType(userId, newType) {
 // Função para ver detalhes do usuário
 async function viewUserDetails(userId) {
     try {
-        const response = await fetch(`/user/api/user/details/${userId}/`);
-        const data = await response.json();
+        let data = userDetailsCache.get(userId);
+        if (!data) {
+            const response = await fetch(`/user/api/user/details/${userId}/`);
+            data = await response.json();
+        }
         
         if (data.user) {
             // Preencher dados pessoais
@@ -331,8 +376,7 @@ function deleteUser(userId, userName) {
             if (result.success) {
                 showToast(result.message, 'success');
                 loadUsersData();
-                loadStats();
-                loadCharts();
+                loadSummary();
             } else {
                 showToast(result.error, 'error');
             }
@@ -361,8 +405,7 @@ async function deactivateUser(userId, userName) {
         if (result.success) {
             showToast(result.message, 'success');
             loadUsersData();
-            loadStats();
-            loadCharts();
+            loadSummary();
         } else {
             showToast(result.error, 'error');
         }
@@ -386,8 +429,7 @@ async function activateUser(userId, userName) {
         if (result.success) {
             showToast(result.message, 'success');
             loadUsersData();
-            loadStats();
-            loadCharts();
+            loadSummary();
         } else {
             showToast(result.error, 'error');
         }
@@ -397,6 +439,79 @@ async function activateUser(userId, userName) {
     }
 }
 
+// Ações em lote
+function selectedUserIds() {
+    return usersGrid.getSelectedRows().map(row => row.id);
+}
+
+function updateSelectedCount() {
+    document.getElementById('selected-count').textContent = `${selectedUserIds().length} selecionados`;
+}
+
+async function bulkAction(action, extra = {}) {
+    const ids = selectedUserIds();
+    if (!ids.length) {
+        showToast('Selecione ao menos um usuário', 'error');
+        return;
+    }
+
+    try {
+        const response = await fetch(`/user/api/users/bulk/${action}/`, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+                'X-CSRFToken': getCookie('csrftoken')
+            },
+            body: JSON.stringify({ ids: ids, ...extra })
+        });
+        
+        const result = await response.json();
+        
+        if (result.success) {
+            const failures = Object.values(result.results).filter(outcome => !outcome.success);
+            showToast(result.message, 'success');
+            if (failures.length) {
+                // Ex.: a própria conta ou usuário já removido
+                showToast(`${failures.length} não alterado(s): ${failures[0].error}`, 'error');
+            }
+            usersGrid.deselectAll();
+            loadUsersData();
+            loadSummary();
+        } else {
+            showToast(result.error, 'error');
+        }
+    } catch (error) {
+        console.error('Erro na ação em lote:', error);
+        showToast('Erro ao alterar usuários', 'error');
+    }
+}
+
+function bulkChangeUserType(select) {
+    const userType = select.value;
+    select.value = '';
+    if (userType) {
+        bulkAction('update-type', { user_type: userType });
+    }
+}
+
+function bulkDelete() {
+    const ids = selectedUserIds();
+    if (!ids.length) {
+        showToast('Selecione ao menos um usuário', 'error');
+        return;
+    }
+
+    document.getElementById('confirmMessage').textContent = 
+        `Tem certeza que deseja excluir ${ids.length} usuário(s)? Esta ação não pode ser desfeita.`;
+    
+    document.getElementById('confirmButton').onclick = async function() {
+        await bulkAction('delete');
+        closeConfirmModal();
+    };
+    
+    document.getElementById('confirmModal').classList.add('show');
+}
+
 function closeConfirmModal() {
     document.getElementById('confirmModal').classList.remove('show');
 }
@@ -1,6 +1,10 @@
 // Variáveis globais
     let currentTaskId = null;
+    let currentTaskVersion = null;
     let isEditMode = false;
+    // true enquanto o feed de eventos estiver conectado (deploy ASGI)
+    let liveUpdates = false;
+    let reloadScheduled = false;
 
     /**
      * Função para abrir modal de criação de tarefa
@@ -36,6 +40,7 @@
                 document.getElementById('taskTitle').value = data.task.title;
                 document.getElementById('taskDescription').value = data.task.description;
                 document.getElementById('taskStatus').value = data.task.status;
+                currentTaskVersion = data.task.version;
                 
                 showModal('taskModal');
             } else {
@@ -60,21 +65,32 @@
      * Função para marcar tarefa como concluída
      */
     async function completeTask(taskId) {
+        const card = document.querySelector(`.task-card[data-task-id="${taskId}"]`);
+        const version = card ? parseInt(card.dataset.taskVersion, 10) : NaN;
+
         try {
             const response = await fetch(`/complete/${taskId}/`, {
                 method: 'POST',
                 headers: {
+                    'Content-Type': 'application/json',
                     'X-CSRFToken': getCookie('csrftoken')
-                }
+                },
+                body: JSON.stringify(Number.isNaN(version) ? {} : { version: version })
             });
             
             const data = await response.json();
             
             if (data.success) {
                 showToast(data.message, 'success');
-                reloadTasks();
+                if (!liveUpdates) {
+                    reloadTasks();
+                }
             } else {
                 showToast(data.error, 'error');
+                // Versão desatualizada: recarrega para mostrar o estado atual
+                if (response.status === 409) {
+                    reloadTasks();
+                }
             }
         } catch (error) {
             console.error('Erro:', error);
@@ -100,6 +116,7 @@
         if (modalId === 'taskModal') {
             document.getElementById('taskForm').reset();
             currentTaskId = null;
+            currentTaskVersion = null;
             isEditMode = false;
         }
     }
@@ -110,6 +127,7 @@
      * Função para recarregar a lista de tarefas com delay
      */
     function reloadTasks() {
+        reloadScheduled = true;
         setTimeout(() => {
             window.location.reload();
         }, 1500); // Delay para permitir que o toast seja visto
@@ -135,8 +153,12 @@
             description: description,
             status: status
         };
+        if (isEditMode && currentTaskVersion !== null) {
+            taskData.version = currentTaskVersion;
+        }
         
         try {
+            const isUpdate = isEditMode;
             const url = isEditMode ? `/update/${currentTaskId}/` : '/create/';
             const method = 'POST';
             
@@ -154,9 +176,16 @@
             if (data.success) {
                 showToast(data.message, 'success');
                 closeModal('taskModal');
-                reloadTasks();
+                // Tarefas novas precisam do card renderizado pelo servidor
+                if (!liveUpdates || !isUpdate) {
+                    reloadTasks();
+                }
             } else {
                 showToast(data.error, 'error');
+                if (response.status === 409) {
+                    closeModal('taskModal');
+                    reloadTasks();
+                }
             }
         } catch (error) {
             console.error('Erro:', error);
@@ -183,7 +212,9 @@
             if (data.success) {
                 showToast(data.message, 'success');
                 closeModal('deleteModal');
-                reloadTasks();
+                if (!liveUpdates) {
+                    reloadTasks();
+                }
             } else {
                 showToast(data.error, 'error');
             }
@@ -227,7 +258,8 @@
 //capturar os dados pro grafico de datas
 document.addEventListener('DOMContentLoaded', async function() {
     
-    const response = await fetch('/all_dates');
+    const archived = new URLSearchParams(window.location.search).get('include_archived') === '1';
+    const response = await fetch(archived ? '/all_dates/?include_archived=1' : '/all_dates');
     const data = await response.json();
     if (data.success) {
         const ctx = document.getElementById('taskChart').getContext('2d');
@@ -281,6 +313,12 @@ document.addEventListener('DOMContentLoaded', function() {
             document.getElementById('filterForm').submit();
         });
     }
+    const archivedFilter = document.getElementById('archivedFilter');
+    if (archivedFilter) {
+        archivedFilter.addEventListener('change', function() {
+            document.getElementById('filterForm').submit();
+        });
+    }
 });
 
 //shift + enter abrir modal de criacao de tarefa
@@ -289,3 +327,101 @@ document.addEventListener('keydown', function(e) {
         openCreateModal();
     }
 });
+
+/**
+ * Feed de alterações (SSE): aplica nas tarefas e contadores da página as
+ * mudanças feitas nesta aba ou em outros dispositivos, sem recarregar.
+ * Disponível apenas no deploy ASGI; sem ele a página recarrega como antes.
+ */
+const STATUS_LABELS = {
+    'PENDENTE': 'Pendente',
+    'EM ANDAMENTO': 'Em Andamento',
+    'COMPLETADO': 'Concluído'
+};
+
+function findTaskCard(taskId) {
+    return document.querySelector(`.task-card[data-task-id="${taskId}"]`);
+}
+
+function applyTaskChange(task) {
+    const card = findTaskCard(task.id);
+    if (!card) {
+        return;
+    }
+    card.dataset.taskVersion = task.version;
+    card.querySelector('.task-title').textContent = task.title;
+
+    let description = card.querySelector('.task-description');
+    if (task.description) {
+        if (!description) {
+            description = document.createElement('p');
+            description.className = 'task-description';
+            card.querySelector('.task-header').after(description);
+        }
+        description.textContent = task.description;
+    } else if (description) {
+        description.remove();
+    }
+
+    const status = card.querySelector('.task-status');
+    status.className = `task-status ${task.status}`;
+    status.textContent = STATUS_LABELS[task.status] || task.status;
+
+    const completeBtn = card.querySelector('.task-action-btn.complete');
+    if (task.status === 'COMPLETADO' && completeBtn) {
+        completeBtn.remove();
+    }
+}
+
+function applyStatsDelta(delta) {
+    if (delta.archived && document.getElementById('archivedFilter')?.checked) {
+        // Com as arquivadas incluídas, arquivar não muda total nem concluídas
+        delta = {...delta, total: (delta.total || 0) + delta.archived, completed: (delta.completed || 0) + delta.archived};
+    }
+    for (const [field, value] of Object.entries(delta)) {
+        const counter = document.querySelector(`.stat-number[data-stat="${field}"]`);
+        if (counter) {
+            counter.textContent = parseInt(counter.textContent, 10) + value;
+        }
+    }
+}
+
+function connectTaskEvents() {
+    if (!window.EventSource) {
+        return;
+    }
+    const source = new EventSource('/async/events/');
+
+    source.addEventListener('open', () => { liveUpdates = true; });
+    source.addEventListener('error', () => {
+        // O EventSource reconecta sozinho (enviando Last-Event-ID); se o
+        // servidor recusar o feed, a conexão fica fechada de vez
+        liveUpdates = false;
+    });
+
+    source.addEventListener('task.updated', (e) => applyTaskChange(JSON.parse(e.data)));
+    source.addEventListener('task.completed', (e) => applyTaskChange(JSON.parse(e.data)));
+    source.addEventListener('task.deleted', (e) => {
+        const card = findTaskCard(JSON.parse(e.data).id);
+        if (card) {
+            card.remove();
+        }
+    });
+    source.addEventListener('task.archived', (e) => {
+        // Com as arquivadas incluídas o card continua (recarregar mostra a versão arquivada)
+        const card = findTaskCard(JSON.parse(e.data).id);
+        if (card && !document.getElementById('archivedFilter')?.checked) {
+            card.remove();
+        }
+    });
+    source.addEventListener('task.created', (e) => {
+        const task = JSON.parse(e.data);
+        if (!reloadScheduled && !findTaskCard(task.id)) {
+            showToast(`Nova tarefa: "${task.title}"`, 'success');
+        }
+    });
+    source.addEventListener('stats', (e) => applyStatsDelta(JSON.parse(e.data)));
+    source.addEventListener('reset', () => window.location.reload());
+}
+
+document.addEventListener('DOMContentLoaded', connectTaskEvents);